@@ -1,7 +1,14 @@
 from django.apps import AppConfig
+from django.core.signals import request_finished, request_started
 
 
 class CoreConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'core'
     verbose_name = 'Core & Settings'
+
+    def ready(self):
+        from .models import finish_settings_request, start_settings_request
+
+        request_started.connect(start_settings_request, dispatch_uid='core_start_settings_request')
+        request_finished.connect(finish_settings_request, dispatch_uid='core_finish_settings_request')
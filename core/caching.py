@@ -0,0 +1,93 @@
+"""
+Cache helpers
+``get_or_compute`` protects expensive cache entries against stampedes: only one
+process recomputes a missing entry while the others wait for it, and entries
+are refreshed probabilistically shortly before they expire so a hot key rarely
+expires at all.
+"""
+
+import math
+import random
+import time
+
+from django.core.cache import cache
+
+# A lock outlives a crashed holder by at most this long
+LOCK_TIMEOUT = 30
+
+# How long a request waits for another process to fill a missing entry before computing it itself
+WAIT_TIMEOUT = 2
+WAIT_INTERVAL = 0.05
+
+# Expired entries are kept this much longer so they can be served while one process refreshes them
+STALE_GRACE = 60
+
+
+def _lock_key(key):
+    return f"{key}:lock"
+
+
+def _is_entry(entry):
+    return isinstance(entry, tuple) and len(entry) == 3
+
+
+def _should_refresh(expires_at, delta, beta):
+    """
+    Probabilistic early expiration (XFetch): the closer the entry is to
+    expiring and the longer it took to compute, the likelier a refresh.
+    """
+    if expires_at is None:
+        return False
+    return time.time() - delta * beta * math.log(1.0 - random.random()) >= expires_at
+
+
+def refresh(key, compute, timeout):
+    """Recompute and store a ``get_or_compute`` entry, e.g. from a periodic job"""
+    start = time.time()
+    value = compute()
+    delta = time.time() - start
+    if timeout is None:
+        cache.set(key, (value, None, delta), None)
+    else:
+        cache.set(key, (value, time.time() + timeout, delta), timeout + STALE_GRACE)
+    return value
+
+
+def get_or_compute(key, compute, timeout, beta=1.0):
+    """
+    Get a cached value, computing it with single-flight protection.
+
+    Args:
+        key: Cache key
+        compute: Callable returning the value to cache
+        timeout: Seconds the value stays fresh, or None to keep it until deleted
+        beta: Eagerness of early refreshes; 0 disables them
+
+    Returns:
+        The cached or freshly computed value
+    """
+    entry = cache.get(key)
+    if not _is_entry(entry):
+        # Missing, or written in another format by other code
+        entry = None
+    if entry is not None:
+        value, expires_at, delta = entry
+        if not _should_refresh(expires_at, delta, beta):
+            return value
+        if not cache.add(_lock_key(key), 1, LOCK_TIMEOUT):
+            # Someone else is refreshing it; the current value is still usable
+            return value
+    elif not cache.add(_lock_key(key), 1, LOCK_TIMEOUT):
+        deadline = time.time() + WAIT_TIMEOUT
+        while time.time() < deadline:
+            time.sleep(WAIT_INTERVAL)
+            entry = cache.get(key)
+            if _is_entry(entry):
+                return entry[0]
+        # The holder is too slow or gone, compute without the lock
+        return refresh(key, compute, timeout)
+
+    try:
+        return refresh(key, compute, timeout)
+    finally:
+        cache.delete(_lock_key(key))
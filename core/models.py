@@ -3,10 +3,43 @@ Global Settings Model for Ta3lem LMS
 Allows admin to configure platform-wide settings from Django Admin
 """
 
-from django.db import models
+import threading
+import time
+
+from django.db import models, transaction
 from django.core.validators import MinValueValidator, MaxValueValidator
 from django.core.cache import cache
 
+from .caching import get_or_compute, refresh
+
+SETTINGS_VERSION_KEY = 'global_settings_version'
+# Renamed when the cached value format changes, so old entries and workers don't share it
+SETTINGS_CACHE_KEY = 'global_settings:v2'
+SETTINGS_CACHE_TIMEOUT = 3600
+
+# Process-local (version, GlobalSettings) copy shared by all threads
+_local_settings = None
+
+
+class _RequestState(threading.local):
+    in_request = False
+    validated_version = None
+
+
+_request_state = _RequestState()
+
+
+def start_settings_request(**kwargs):
+    """request_started receiver: validate the local settings again in this request"""
+    _request_state.in_request = True
+    _request_state.validated_version = None
+
+
+def finish_settings_request(**kwargs):
+    """request_finished receiver"""
+    _request_state.in_request = False
+    _request_state.validated_version = None
+
 
 class GlobalSettings(models.Model):
     """
@@ -294,25 +327,56 @@ class GlobalSettings(models.Model):
         
         super().save(*args, **kwargs)
         
-        # Clear cache when settings are updated
-        cache.delete('global_settings')
+        # Clear cache once the new row is visible, so readers never pair the new version with old data
+        transaction.on_commit(self._settings_changed)
+
+    @staticmethod
+    def _settings_changed():
+        cache.delete(SETTINGS_CACHE_KEY)
+        version = time.time_ns()
+        cache.set(SETTINGS_VERSION_KEY, version, timeout=None)
+        if _request_state.in_request:
+            _request_state.validated_version = version
     
     @classmethod
     def get_settings(cls):
         """
         Get global settings instance (singleton).
-        Uses caching to avoid repeated database queries.
+
+        Served from a process-local copy that is checked against the settings
+        version in the shared cache once per request (every call outside
+        requests). The shared cache entry stores the version it was loaded
+        under; copies of another version are reloaded from the database.
         """
-        settings = cache.get('global_settings')
-        
-        if settings is None:
-            settings, created = cls.objects.get_or_create(
-                pk=1,
-                defaults={'site_name': 'Ta3lem LMS'}
-            )
-            cache.set('global_settings', settings, timeout=3600)  # Cache for 1 hour
-        
-        return settings
+        global _local_settings
+        version = cls.get_settings_version()
+        local = _local_settings
+        if local is None or local[0] != version:
+            # The version is read before the row, so an entry never carries a newer version than its data
+            def load():
+                return version, cls.objects.get_or_create(pk=1, defaults={'site_name': 'Ta3lem LMS'})[0]
+
+            local = get_or_compute(SETTINGS_CACHE_KEY, load, timeout=SETTINGS_CACHE_TIMEOUT)
+            if local[0] != version:
+                local = refresh(SETTINGS_CACHE_KEY, load, timeout=SETTINGS_CACHE_TIMEOUT)
+            _local_settings = local
+        return local[1]
+
+    @staticmethod
+    def get_settings_version():
+        """
+        Get a version that changes whenever settings are saved, for keying
+        caches of output that depends on settings.
+        """
+        if _request_state.validated_version is not None:
+            return _request_state.validated_version
+        version = cache.get(SETTINGS_VERSION_KEY)
+        if version is None:
+            cache.add(SETTINGS_VERSION_KEY, time.time_ns(), timeout=None)
+            version = cache.get(SETTINGS_VERSION_KEY)
+        if _request_state.in_request:
+            _request_state.validated_version = version
+        return version
     
     def get_allowed_video_formats_list(self):
         """Get list of allowed video formats"""
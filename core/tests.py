@@ -1,3 +1,110 @@
+from unittest import mock
+
+from django.core.cache import cache
 from django.test import TestCase
 
-# Create your tests here.
+from .caching import _lock_key, get_or_compute
+from .models import SETTINGS_CACHE_KEY, SETTINGS_VERSION_KEY, GlobalSettings, finish_settings_request, start_settings_request
+
+
+class GetOrComputeTestCase(TestCase):
+    """Cached values are recomputed by one caller at a time"""
+
+    def setUp(self):
+        cache.clear()
+        self.compute = mock.Mock(return_value='fresh')
+
+    def test_computes_once(self):
+        self.assertEqual(get_or_compute('key', self.compute, 60), 'fresh')
+        self.assertEqual(get_or_compute('key', self.compute, 60), 'fresh')
+        self.compute.assert_called_once()
+        self.assertIsNone(cache.get(_lock_key('key')))
+
+    def test_stale_value_served_while_locked(self):
+        cache.set('key', ('stale', 0, 0.1), 60)
+        cache.add(_lock_key('key'), 1)
+
+        self.assertEqual(get_or_compute('key', self.compute, 60), 'stale')
+        self.compute.assert_not_called()
+
+    def test_expired_value_refreshed_by_lock_holder(self):
+        cache.set('key', ('stale', 0, 0.1), 60)
+
+        self.assertEqual(get_or_compute('key', self.compute, 60), 'fresh')
+        self.assertEqual(cache.get('key')[0], 'fresh')
+
+    def test_foreign_value_is_a_miss(self):
+        cache.set('key', 'bare value', 60)
+
+        self.assertEqual(get_or_compute('key', self.compute, 60), 'fresh')
+        self.compute.assert_called_once()
+
+    @mock.patch('core.caching.WAIT_TIMEOUT', 0.2)
+    def test_waits_for_lock_holder_then_falls_back(self):
+        cache.add(_lock_key('key'), 1)
+
+        self.assertEqual(get_or_compute('key', self.compute, 60), 'fresh')
+        self.compute.assert_called_once()
+
+    def test_global_settings_cached_until_saved(self):
+        settings = GlobalSettings.get_settings()
+        with self.assertNumQueries(0):
+            GlobalSettings.get_settings()
+
+        settings.site_name = 'Renamed'
+        with self.captureOnCommitCallbacks(execute=True):
+            version = GlobalSettings.get_settings_version()
+            settings.save()
+            # Invalidated on commit
+            self.assertEqual(GlobalSettings.get_settings_version(), version)
+            self.assertIsNotNone(cache.get(SETTINGS_CACHE_KEY))
+        self.assertEqual(GlobalSettings.get_settings().site_name, 'Renamed')
+
+
+class LocalSettingsCacheTestCase(TestCase):
+    """Settings are read from a process-local copy validated once per request"""
+
+    def setUp(self):
+        cache.clear()
+        with self.captureOnCommitCallbacks(execute=True):
+            # Creating the row saves it, which changes the version once
+            GlobalSettings.get_settings()
+        GlobalSettings.get_settings()
+
+    def tearDown(self):
+        finish_settings_request()
+
+    def save_elsewhere(self, site_name):
+        # A save in another process: the row and the version change, the shared entry is still the old one
+        GlobalSettings.objects.filter(pk=1).update(site_name=site_name)
+        cache.set(SETTINGS_VERSION_KEY, 'other-process')
+
+    def test_version_checked_once_per_request(self):
+        start_settings_request()
+        with mock.patch.object(cache, 'get', wraps=cache.get) as cache_get, self.assertNumQueries(0):
+            for _ in range(3):
+                GlobalSettings.get_settings()
+        self.assertEqual(cache_get.call_count, 1)
+
+    def test_changes_seen_by_next_request(self):
+        start_settings_request()
+        GlobalSettings.get_settings()
+        self.save_elsewhere('Renamed')
+        self.assertNotEqual(GlobalSettings.get_settings().site_name, 'Renamed')
+
+        finish_settings_request()
+        start_settings_request()
+        self.assertEqual(GlobalSettings.get_settings().site_name, 'Renamed')
+
+    def test_save_within_request_is_visible(self):
+        start_settings_request()
+        settings = GlobalSettings.get_settings()
+        settings.site_name = 'Renamed'
+        with self.captureOnCommitCallbacks(execute=True):
+            settings.save()
+        self.assertEqual(GlobalSettings.get_settings().site_name, 'Renamed')
+
+    def test_entry_of_other_version_is_reloaded(self):
+        self.save_elsewhere('Renamed')
+        self.assertEqual(GlobalSettings.get_settings().site_name, 'Renamed')
+        self.assertEqual(cache.get(SETTINGS_CACHE_KEY)[0][0], 'other-process')
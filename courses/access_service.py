@@ -3,11 +3,20 @@ Course Access and Enrollment Services
 Handles dual pricing system (subscription vs one-time purchase)
 """
 
+from collections import Counter
+
 from django.db import transaction
+from django.db.models import F
+from django.db.models.functions import Greatest
 from django.utils import timezone
 from typing import Tuple, Dict
 
-from .models import Course, CourseEnrollment
+from .models import Course, CourseEnrollment, CourseWaitlist
+from .stats_service import CourseStatsService
+
+
+class CourseFullError(ValueError):
+    """Raised when a capacity-limited course has no seat left"""
 
 
 class CourseAccessService:
@@ -78,6 +87,78 @@ class CourseAccessService:
         
         return False, 'unknown'
     
+    @staticmethod
+    def resolve_access_bulk(user, courses) -> Dict[int, Tuple[bool, str]]:
+        """
+        Resolve access for many courses at once.
+        
+        Follows the same rules as Course.user_has_access, using one query for
+        the user's enrollments plus at most one (memoized) subscription lookup,
+        whatever the number of courses.
+        
+        Args:
+            user: User object
+            courses: Iterable of Course objects
+            
+        Returns:
+            dict: {course_id: (can_access, reason)}
+            
+        Reasons:
+            - 'owner': User owns the course
+            - 'free': Enrolled in a free course, or free enrollment
+            - 'purchased': Paid enrollment
+            - 'subscription_active': Covered by the user's active subscription
+            - 'payment_pending': Enrolled but payment not completed
+            - 'subscription_expired': Subscription enrollment without active subscription
+            - 'not_enrolled': No usable enrollment
+            - 'not_authenticated': Anonymous user
+        """
+        courses = list(courses)
+        if not user or not user.is_authenticated:
+            return {course.pk: (False, 'not_authenticated') for course in courses}
+        
+        enrollments = {}
+        for enrollment in CourseEnrollment.objects.filter(
+            student=user,
+            course__in=[course.pk for course in courses]
+        ).order_by('-enrolled_on'):
+            enrollments.setdefault(enrollment.course_id, enrollment)
+        
+        has_subscription = None
+        results = {}
+        for course in courses:
+            enrollment = enrollments.get(course.pk)
+            active = enrollment is not None and enrollment.status in ['enrolled', 'completed', 'paused']
+            
+            if course.owner_id == user.pk:
+                results[course.pk] = (True, 'owner')
+                continue
+            if active and (course.pricing_type == 'free' or enrollment.payment_status == 'free'):
+                results[course.pk] = (True, 'free')
+                continue
+            if active and enrollment.payment_status == 'paid':
+                results[course.pk] = (True, 'purchased')
+                continue
+            
+            if course.supports_subscription():
+                if has_subscription is None:
+                    from subscriptions.services import SubscriptionService
+                    has_subscription = SubscriptionService.user_has_active_subscription(user)
+                if has_subscription:
+                    results[course.pk] = (True, 'subscription_active')
+                    continue
+            
+            if enrollment is None:
+                results[course.pk] = (False, 'not_enrolled')
+            elif enrollment.access_type == 'subscription':
+                results[course.pk] = (False, 'subscription_expired')
+            elif enrollment.payment_status in ['pending', 'failed']:
+                results[course.pk] = (False, 'payment_pending')
+            else:
+                results[course.pk] = (False, 'not_enrolled')
+        
+        return results
+    
     @staticmethod
     def get_enrollment_options(user, course) -> Dict[str, bool]:
         """
@@ -163,6 +244,60 @@ class CourseAccessService:
 class EnrollmentService:
     """Handle course enrollment logic for dual pricing system"""
     
+    @staticmethod
+    def apply_seats(course_id, delta):
+        """Add ``delta`` to the seat counter of a course with an F() expression"""
+        if delta:
+            Course.objects.filter(pk=course_id).update(
+                enrolled_count=Greatest(F('enrolled_count') + delta, 0)
+            )
+    
+    @staticmethod
+    def seat_delta(old_status, new_status):
+        """Seat counter change for an enrollment status transition (None: no enrollment)"""
+        return (new_status in CourseEnrollment.SEAT_STATUSES) - (old_status in CourseEnrollment.SEAT_STATUSES)
+    
+    @classmethod
+    @transaction.atomic
+    def reserve_seat(cls, user, course, defaults, enforce_capacity=True):
+        """
+        Create or update the enrollment of a user while holding a row lock on
+        the course, so concurrent enrollments cannot exceed max_capacity.
+        
+        Args:
+            user: User object
+            course: Course object
+            defaults: CourseEnrollment field values to set
+            enforce_capacity: False to grant the seat even if the course is full
+            
+        Returns:
+            CourseEnrollment
+            
+        Raises:
+            CourseFullError: The enrollment would take a seat and none is left
+        """
+        max_capacity, enrolled_count = Course.objects.select_for_update().values_list(
+            'max_capacity', 'enrolled_count'
+        ).get(pk=course.pk)
+        
+        enrollment = CourseEnrollment.objects.filter(student=user, course=course).first()
+        old_status = enrollment.status if enrollment else None
+        if enrollment is None:
+            enrollment = CourseEnrollment.objects.create(student=user, course=course, **defaults)
+        else:
+            for field, value in defaults.items():
+                setattr(enrollment, field, value)
+            enrollment.save()
+        
+        # Checked after saving because new enrollments of approval courses start as pending
+        delta = cls.seat_delta(old_status, enrollment.status)
+        if delta > 0 and enforce_capacity and max_capacity and enrolled_count >= max_capacity:
+            # Rolls back the enrollment saved above
+            raise CourseFullError(f'"{course.title}" has no seats left')
+        
+        course.enrolled_count = enrolled_count + delta
+        return enrollment
+    
     @classmethod
     @transaction.atomic
     def enroll_free(cls, user, course):
@@ -170,17 +305,12 @@ class EnrollmentService:
         if course.pricing_type != 'free':
             raise ValueError("Course is not free")
         
-        enrollment, created = CourseEnrollment.objects.get_or_create(
-            student=user,
-            course=course,
-            defaults={
-                'access_type': 'free',
-                'status': 'enrolled',
-                'payment_status': 'free',
-            }
-        )
-        
-        return enrollment
+        enrollment = CourseEnrollment.objects.filter(student=user, course=course).first()
+        return enrollment or cls.reserve_seat(user, course, {
+            'access_type': 'free',
+            'status': 'enrolled',
+            'payment_status': 'free',
+        })
     
     @classmethod
     @transaction.atomic
@@ -196,27 +326,17 @@ class EnrollmentService:
         if course.pricing_type not in ['subscription_only', 'both']:
             raise ValueError("Course does not support subscription access")
         
-        enrollment, created = CourseEnrollment.objects.get_or_create(
-            student=user,
-            course=course,
-            defaults={
-                'access_type': 'subscription',
-                'subscription': subscription,
-                'status': 'enrolled',
-                'payment_status': 'paid',
-            }
-        )
-        
-        if not created:
-            # Update existing enrollment to subscription
-            if enrollment.access_type != 'purchased':  # Don't downgrade purchased access
-                enrollment.access_type = 'subscription'
-                enrollment.subscription = subscription
-                enrollment.status = 'enrolled'
-                enrollment.payment_status = 'paid'
-                enrollment.save()
-        
-        return enrollment
+        enrollment = CourseEnrollment.objects.filter(student=user, course=course).first()
+        if enrollment and enrollment.access_type == 'purchased':  # Don't downgrade purchased access
+            return enrollment
+        
+        # Creates the enrollment or updates an existing one to subscription
+        return cls.reserve_seat(user, course, {
+            'access_type': 'subscription',
+            'subscription': subscription,
+            'status': 'enrolled',
+            'payment_status': 'paid',
+        })
     
     @classmethod
     @transaction.atomic
@@ -232,20 +352,19 @@ class EnrollmentService:
         if course.pricing_type not in ['one_time', 'both']:
             raise ValueError("Course does not support one-time purchase")
         
-        enrollment, created = CourseEnrollment.objects.get_or_create(
-            student=user,
-            course=course,
-            defaults={
+        enrollment = CourseEnrollment.objects.filter(student=user, course=course).first()
+        if enrollment is None:
+            # Paid already, so the seat is granted even on a full course
+            return cls.reserve_seat(user, course, {
                 'access_type': 'purchased',
                 'order': order,
                 'status': 'enrolled',
                 'payment_status': 'paid',
                 'payment_amount': order.total_amount,
                 'payment_date': order.completed_at,
-            }
-        )
+            }, enforce_capacity=False)
         
-        if not created and enrollment.access_type == 'subscription':
+        if enrollment.access_type == 'subscription':
             # Upgrade from subscription to purchased (lifetime access)
             enrollment.access_type = 'purchased'
             enrollment.order = order
@@ -279,8 +398,17 @@ class EnrollmentService:
             query = query.filter(subscription=subscription)
         
         # Mark as paused (not withdrawn, so progress is kept)
+        seats = Counter(query.values_list('course_id', flat=True))
         count = query.update(status='paused')
         
+        # update() skips the receivers that keep the seat and rollup counters in sync
+        # and offer freed seats to the waitlist
+        from .waitlist_service import WaitlistService
+        for course_id, freed in seats.items():
+            cls.apply_seats(course_id, -freed)
+            CourseStatsService.apply(course_id, active_students=-freed, paused_students=freed)
+            transaction.on_commit(lambda course_id=course_id: WaitlistService.promote(course_id))
+        
         return count
     
     @classmethod
@@ -289,6 +417,11 @@ class EnrollmentService:
         """
         Restore access when subscription is renewed.
         
+        A seat freed by the pause may have been given to someone else. On a
+        course that is full now the enrollment stays paused (progress is
+        kept) and the student is put at the head of the waitlist, so the next
+        freed seat restores it (see WaitlistService.promote).
+        
         Args:
             user: User object
             subscription: UserSubscription object
@@ -303,7 +436,23 @@ class EnrollmentService:
             status='paused'
         )
         
-        count = enrollments.update(status='enrolled')
+        restored = []
+        for course_id in enrollments.values_list('course_id', flat=True):
+            # Locked like reserve_seat, so concurrent enrollments can't take the same seat
+            max_capacity, enrolled_count = Course.objects.select_for_update().values_list(
+                'max_capacity', 'enrolled_count'
+            ).get(pk=course_id)
+            if max_capacity and enrolled_count >= max_capacity:
+                CourseWaitlist.objects.update_or_create(course_id=course_id, student=user, defaults={'priority': 0})
+                continue
+            restored.append(course_id)
+        
+        count = enrollments.filter(course_id__in=restored).update(status='enrolled')
+        
+        # update() skips the receivers that keep the seat and rollup counters in sync
+        for course_id, taken in Counter(restored).items():
+            cls.apply_seats(course_id, taken)
+            CourseStatsService.apply(course_id, active_students=taken, paused_students=-taken)
         
         return count
     
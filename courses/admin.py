@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Subject, Course, Module, Text, File, Image, Video, Content, ContentItem, CourseEnrollment, ContentProgress, ModuleProgress, LearningSession
+from .models import Subject, Course, Module, Text, File, Image, Video, Content, ContentItem, CourseEnrollment, ContentProgress, ModuleProgress, LearningSession, CourseStatsRollup, DailyLearningTime
 
 @admin.register(Subject)
 class SubjectAdmin(admin.ModelAdmin):
@@ -92,3 +92,15 @@ class LearningSessionAdmin(admin.ModelAdmin):
     list_filter = ['started_at', 'ended_at']
     search_fields = ['enrollment__student__username', 'content__item__title']
     readonly_fields = ['started_at', 'ended_at']
+
+@admin.register(CourseStatsRollup)
+class CourseStatsRollupAdmin(admin.ModelAdmin):
+    list_display = ['course', 'total_students', 'active_students', 'completed_students', 'total_revenue', 'updated_at']
+    search_fields = ['course__title']
+    readonly_fields = ['updated_at']
+
+@admin.register(DailyLearningTime)
+class DailyLearningTimeAdmin(admin.ModelAdmin):
+    list_display = ['student', 'enrollment', 'date', 'seconds', 'sessions']
+    list_filter = ['date']
+    search_fields = ['student__username']
@@ -11,6 +11,7 @@ from courses.models import (
     CourseEnrollment, CourseWaitlist,
     ContentProgress, ModuleProgress, LearningSession
 )
+from courses.access_service import CourseAccessService
 from users.api.serializers import UserSerializer
 
 
@@ -305,7 +306,19 @@ class CourseDetailSerializer(CourseListSerializer):
     def get_access_options(self, obj):
         request = self.context.get('request')
         user = request.user if request else None
-        return obj.get_access_options(user)
+        if not user or not user.is_authenticated:
+            return obj.get_access_options(user)
+        
+        # Resolve access for every course being serialized in one go
+        access_map = self.context.get('access_map') or {}
+        if obj.pk not in access_map:
+            if isinstance(self.parent, serializers.ListSerializer):
+                courses = self.parent.instance
+            else:
+                courses = [obj]
+            access_map.update(CourseAccessService.resolve_access_bulk(user, courses))
+            self.context['access_map'] = access_map
+        return obj.get_access_options(user, access=access_map[obj.pk])
 
 
 class CourseCreateSerializer(serializers.ModelSerializer):
@@ -482,6 +495,8 @@ class CourseProgressSerializer(serializers.Serializer):
     contents_total = serializers.IntegerField()
     status = serializers.CharField()
     last_accessed = serializers.DateTimeField()
+    learning_time_seconds = serializers.IntegerField()
+    learning_streak = serializers.IntegerField(help_text='Consecutive learning days up to today')
 
 
 class BulkModuleOrderSerializer(serializers.Serializer):
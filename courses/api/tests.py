@@ -114,6 +114,14 @@ class CourseAPITests(APITestCase):
         titles = [c['title'] for c in response.data['results']]
         self.assertIn('Python Basics', titles)
     
+    def test_autocomplete_courses(self):
+        """Test prefix suggestions for search-as-you-type."""
+        url = '/api/v1/courses/autocomplete/'
+        response = self.client.get(url, {'q': 'pyth'})
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([c['slug'] for c in response.data], ['python-basics'])
+    
     def test_create_course_instructor_only(self):
         """Test only instructors can create courses."""
         self.client.force_authenticate(user=self.instructor)
@@ -2,13 +2,15 @@
 API Views for Courses app.
 """
 
-from django.db.models import Count, Avg
+from django.db.models import Count, Prefetch
 from django.shortcuts import get_object_or_404
 from django.utils import timezone
 from rest_framework import viewsets, generics, status
 from rest_framework.decorators import action
+from rest_framework.filters import BaseFilterBackend, OrderingFilter
 from rest_framework.permissions import IsAuthenticated, AllowAny, IsAuthenticatedOrReadOnly
 from rest_framework.response import Response
+from rest_framework.settings import api_settings
 from django_filters import rest_framework as filters
 from drf_spectacular.utils import extend_schema, extend_schema_view, OpenApiParameter
 
@@ -22,6 +24,15 @@ from courses.models import (
     CourseEnrollment, CourseWaitlist,
     ContentProgress, ModuleProgress, LearningSession
 )
+from courses.access_service import CourseFullError, EnrollmentService
+from courses.cleanup_service import ItemCleanupService
+from courses.cloning_service import CloningService
+from courses.learning_time_service import LearningTimeService
+from courses.ordering import apply_order
+from courses.outline import bump_structure_versions
+from courses.search_service import CourseSearchService
+from courses.session_service import LearningSessionService
+from courses.stats_service import CourseStatsService
 from .serializers import (
     SubjectSerializer, SubjectDetailSerializer,
     CourseListSerializer, CourseDetailSerializer, CourseCreateSerializer,
@@ -55,6 +66,23 @@ class CourseFilter(filters.FilterSet):
         fields = ['is_free', 'subject', 'pricing_type', 'difficulty_level', 'certificate_enabled']
 
 
+class CourseSearchFilter(BaseFilterBackend):
+    """
+    Full-text ``search`` over the course search index. Results are ranked
+    by relevance unless an explicit ``ordering`` is requested.
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        query = request.query_params.get('search', '')
+        if not query:
+            return queryset
+        ordering = queryset.query.order_by
+        results = CourseSearchService.search(queryset, query)
+        if request.query_params.get(api_settings.ORDERING_PARAM):
+            results = results.order_by(*ordering)
+        return results
+
+
 # ViewSets
 @extend_schema_view(
     list=extend_schema(tags=['Courses'], summary='List subjects'),
@@ -85,7 +113,7 @@ class SubjectViewSet(viewsets.ReadOnlyModelViewSet):
             OpenApiParameter(name='subject', description='Filter by subject slug'),
             OpenApiParameter(name='difficulty', description='Filter by difficulty level'),
             OpenApiParameter(name='is_free', description='Filter free courses'),
-            OpenApiParameter(name='search', description='Search in title and overview'),
+            OpenApiParameter(name='search', description='Full-text search in title, subject, overview, modules and text content'),
         ]
     ),
     retrieve=extend_schema(
@@ -129,8 +157,8 @@ class CourseViewSet(MultiSerializerMixin, OwnerMixin, viewsets.ModelViewSet):
     }
     permission_classes = [IsAuthenticatedOrReadOnly]
     pagination_class = LargeResultsSetPagination
+    filter_backends = [filters.DjangoFilterBackend, OrderingFilter, CourseSearchFilter]
     filterset_class = CourseFilter
-    search_fields = ['title', 'overview']
     ordering_fields = ['created', 'title', 'price']
     ordering = ['-created']
     lookup_field = 'slug'
@@ -168,6 +196,19 @@ class CourseViewSet(MultiSerializerMixin, OwnerMixin, viewsets.ModelViewSet):
     def perform_create(self, serializer):
         serializer.save(owner=self.request.user)
     
+    @extend_schema(
+        tags=['Courses'],
+        summary='Autocomplete courses',
+        description='Suggest published courses whose words start with the typed query.',
+        parameters=[OpenApiParameter(name='q', description='Partially typed query')]
+    )
+    @action(detail=False, methods=['get'], permission_classes=[AllowAny])
+    def autocomplete(self, request):
+        """
+        Prefix search for search-as-you-type.
+        """
+        return Response(CourseSearchService.autocomplete(request.query_params.get('q', '')))
+
     @extend_schema(
         tags=['Courses'],
         summary='Get my courses',
@@ -212,16 +253,15 @@ class CourseViewSet(MultiSerializerMixin, OwnerMixin, viewsets.ModelViewSet):
         Get course statistics for instructors.
         """
         course = self.get_object()
-        
-        enrollments = CourseEnrollment.objects.filter(course=course)
+        rollup = CourseStatsService.get_rollup(course)
         
         stats = {
-            'total_students': enrollments.count(),
-            'active_students': enrollments.filter(status='enrolled').count(),
-            'completed_students': enrollments.filter(status='completed').count(),
-            'average_progress': enrollments.aggregate(avg=Avg('progress_percentage'))['avg'] or 0,
-            'total_modules': course.modules.count(),
-            'total_contents': Content.objects.filter(module__course=course).count(),
+            'total_students': rollup.total_students,
+            'active_students': rollup.active_students,
+            'completed_students': rollup.completed_students,
+            'average_progress': rollup.avg_progress,
+            'total_modules': rollup.total_modules,
+            'total_contents': rollup.total_contents,
         }
         
         return Response(stats)
@@ -253,6 +293,24 @@ class CourseViewSet(MultiSerializerMixin, OwnerMixin, viewsets.ModelViewSet):
             'message': 'Course published successfully.',
             'data': CourseDetailSerializer(course, context={'request': request}).data
         })
+    
+    @extend_schema(
+        tags=['Courses'],
+        summary='Clone course',
+        description='Copy a course with all modules, contents and items as a new draft. Owner only.'
+    )
+    @action(detail=True, methods=['post'], permission_classes=[IsAuthenticated, IsCourseOwner])
+    def clone(self, request, slug=None):
+        """
+        Clone a course.
+        """
+        copy = CloningService.clone_course(self.get_object(), request.user)
+        
+        return Response({
+            'success': True,
+            'message': 'Course cloned successfully.',
+            'data': CourseDetailSerializer(copy, context={'request': request}).data
+        }, status=status.HTTP_201_CREATED)
 
 
 @extend_schema_view(
@@ -278,11 +336,15 @@ class ModuleViewSet(MultiSerializerMixin, viewsets.ModelViewSet):
     def get_queryset(self):
         course_slug = self.kwargs.get('course_slug')
         if course_slug:
-            return Module.objects.filter(course__slug=course_slug).select_related('course')
-        return Module.objects.all()
+            queryset = Module.objects.filter(course__slug=course_slug).select_related('course')
+        else:
+            queryset = Module.objects.all()
+        if self.action == 'retrieve':
+            queryset = queryset.prefetch_related(Prefetch('contents', queryset=Content.objects.with_items()))
+        return queryset
     
     def get_permissions(self):
-        if self.action in ['create', 'update', 'partial_update', 'destroy']:
+        if self.action in ['create', 'update', 'partial_update', 'destroy', 'clone']:
             return [IsAuthenticated(), IsCourseOwner()]
         return super().get_permissions()
     
@@ -300,13 +362,29 @@ class ModuleViewSet(MultiSerializerMixin, viewsets.ModelViewSet):
         serializer.is_valid(raise_exception=True)
         
         orders = serializer.validated_data['module_orders']
-        for module_id, order in orders.items():
-            Module.objects.filter(
-                id=int(module_id),
-                course__owner=request.user
-            ).update(order=order)
+        modules = Module.objects.filter(course__owner=request.user)
+        pks = apply_order(modules, orders)
+        bump_structure_versions(modules.filter(pk__in=pks).values_list('course_id', flat=True))
         
         return Response({'success': True, 'message': 'Modules reordered successfully.'})
+    
+    @extend_schema(
+        tags=['Courses'],
+        summary='Clone module',
+        description='Copy a module with its contents and items to the end of its course.'
+    )
+    @action(detail=True, methods=['post'])
+    def clone(self, request, *args, **kwargs):
+        """
+        Clone a module.
+        """
+        copy = CloningService.clone_module(self.get_object(), request.user)
+        
+        return Response({
+            'success': True,
+            'message': 'Module cloned successfully.',
+            'data': ModuleSerializer(copy, context={'request': request}).data
+        }, status=status.HTTP_201_CREATED)
 
 
 @extend_schema_view(
@@ -329,14 +407,18 @@ class ContentViewSet(MultiSerializerMixin, viewsets.ModelViewSet):
     def get_queryset(self):
         module_id = self.kwargs.get('module_id')
         if module_id:
-            return Content.objects.filter(module_id=module_id).prefetch_related('items')
-        return Content.objects.all()
+            return Content.objects.filter(module_id=module_id).with_items()
+        return Content.objects.with_items()
     
     def get_permissions(self):
         if self.action in ['create', 'update', 'partial_update', 'destroy']:
             return [IsAuthenticated()]
         return super().get_permissions()
     
+    def perform_destroy(self, instance):
+        # Items are generic relations and do not cascade
+        ItemCleanupService.delete_contents(Content.objects.filter(pk=instance.pk))
+    
     @extend_schema(
         tags=['Courses'],
         summary='Reorder contents',
@@ -351,11 +433,9 @@ class ContentViewSet(MultiSerializerMixin, viewsets.ModelViewSet):
         serializer.is_valid(raise_exception=True)
         
         orders = serializer.validated_data['content_orders']
-        for content_id, order in orders.items():
-            Content.objects.filter(
-                id=int(content_id),
-                module__course__owner=request.user
-            ).update(order=order)
+        contents = Content.objects.filter(module__course__owner=request.user)
+        pks = apply_order(contents, orders)
+        bump_structure_versions(contents.filter(pk__in=pks).values_list('module__course_id', flat=True))
         
         return Response({'success': True, 'message': 'Contents reordered successfully.'})
 
@@ -412,13 +492,19 @@ class EnrollmentViewSet(SuccessResponseMixin, viewsets.ReadOnlyModelViewSet):
         if course.pricing_type == 'free' or course.is_free:
             enrollment_status = 'enrolled' if course.enrollment_type == 'open' else 'pending'
             
-            enrollment = CourseEnrollment.objects.create(
-                student=user,
-                course=course,
-                status=enrollment_status,
-                payment_status='free',
-                access_type='free',
-            )
+            try:
+                enrollment = EnrollmentService.reserve_seat(user, course, {
+                    'status': enrollment_status,
+                    'payment_status': 'free',
+                    'access_type': 'free',
+                })
+            except CourseFullError:
+                # The last seat was taken after the serializer's capacity check
+                return Response(
+                    {'detail': 'Course full - can join waitlist' if course.waitlist_enabled
+                     else 'Course full - no waitlist'},
+                    status=status.HTTP_409_CONFLICT
+                )
             
             if course.enrollment_type == 'open':
                 course.students.add(user)
@@ -497,26 +583,23 @@ class CourseProgressView(SuccessResponseMixin, generics.RetrieveAPIView):
         
         # Calculate progress
         total_modules = course.modules.count()
+        learning_time = LearningTimeService.get_summary(enrollment=enrollment)
         completed_modules = ModuleProgress.objects.filter(
             enrollment=enrollment,
             is_completed=True
         ).count()
         
-        total_contents = Content.objects.filter(module__course=course).count()
-        completed_contents = ContentProgress.objects.filter(
-            enrollment=enrollment,
-            is_completed=True
-        ).count()
-        
         data = {
             'course_id': course.id,
             'progress_percentage': enrollment.progress_percentage,
             'modules_completed': completed_modules,
             'modules_total': total_modules,
-            'contents_completed': completed_contents,
-            'contents_total': total_contents,
+            'contents_completed': enrollment.completed_contents_count,
+            'contents_total': enrollment.total_contents_count,
             'status': enrollment.status,
             'last_accessed': enrollment.last_accessed,
+            'learning_time_seconds': learning_time['total_seconds'],
+            'learning_streak': learning_time['current_streak'],
         }
         
         return self.success_response(data=data)
@@ -556,11 +639,9 @@ class MarkContentCompleteView(SuccessResponseMixin, generics.CreateAPIView):
             content=content
         )
         
-        if not content_progress.is_completed:
-            content_progress.mark_completed()
-        
-        # Update enrollment progress
-        enrollment.update_progress()
+        # Counters on the enrollment are updated in place
+        content_progress.enrollment = enrollment
+        content_progress.mark_completed()
         
         return self.success_response(
             data={
@@ -620,31 +701,63 @@ class LearningSessionViewSet(SuccessResponseMixin, viewsets.ModelViewSet):
             enrollment__student=self.request.user
         ).order_by('-started_at')
     
+    def _get_enrollment_and_content(self, request):
+        content = get_object_or_404(Content.objects.select_related('module'), pk=request.data.get('content_id'))
+        enrollment = get_object_or_404(
+            CourseEnrollment,
+            student=request.user,
+            course_id=content.module.course_id,
+            status__in=['enrolled', 'completed']
+        )
+        return enrollment, content
+    
     @extend_schema(
         tags=['Progress'],
         summary='Start learning session',
-        description='Start a new learning session for a content.'
+        description='Start a learning session for a content. Sessions are buffered and '
+                    'written in batches, so the returned session has no id yet.'
     )
     def create(self, request, *args, **kwargs):
-        content_id = request.data.get('content_id')
-        content = get_object_or_404(Content, pk=content_id)
+        enrollment, content = self._get_enrollment_and_content(request)
+        session = LearningSessionService.touch(enrollment, content)
         
-        enrollment = get_object_or_404(
-            CourseEnrollment,
-            student=request.user,
-            course=content.module.course,
-            status__in=['enrolled', 'completed']
+        return self.success_response(
+            data=LearningSessionSerializer(session).data,
+            message='Learning session started.',
+            status_code=status.HTTP_201_CREATED
         )
+    
+    @extend_schema(
+        tags=['Progress'],
+        summary='Learning session heartbeat',
+        description='Keep the learning session of a content open.'
+    )
+    @action(detail=False, methods=['post'])
+    def heartbeat(self, request):
+        enrollment, content = self._get_enrollment_and_content(request)
+        session = LearningSessionService.touch(enrollment, content)
         
-        session = LearningSession.objects.create(
-            enrollment=enrollment,
-            content=content
-        )
+        return self.success_response(data=LearningSessionSerializer(session).data)
+    
+    @extend_schema(
+        tags=['Progress'],
+        summary='Close learning session',
+        description='Close the open learning session of a content.'
+    )
+    @action(detail=False, methods=['post'])
+    def close(self, request):
+        enrollment, content = self._get_enrollment_and_content(request)
+        session = LearningSessionService.close(enrollment, content)
+        
+        if session is None:
+            return Response(
+                {'detail': 'No active session.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
         
         return self.success_response(
             data=LearningSessionSerializer(session).data,
-            message='Learning session started.',
-            status_code=status.HTTP_201_CREATED
+            message='Learning session ended.'
         )
     
     @extend_schema(
@@ -0,0 +1,75 @@
+"""
+Completion Bitmap
+Compact per-enrollment completion state: bit ``i`` is set when the content at
+position ``i`` of the course outline (see courses.outline) has been completed.
+"""
+
+
+class CompletionBitmap:
+    """
+    Growable bit array stored as bytes (least significant bit first).
+
+    Usage:
+        bitmap = CompletionBitmap(enrollment.completion_bitmap)
+        bitmap.set(3)
+        bitmap.is_set(3)          # True
+        bitmap.count()            # 1
+        bitmap.first_unset(10)    # 0
+        enrollment.completion_bitmap = bitmap.to_bytes()
+    """
+
+    def __init__(self, data=b''):
+        self._bits = bytearray(data or b'')
+
+    @classmethod
+    def from_positions(cls, positions):
+        bitmap = cls()
+        for position in positions:
+            bitmap.set(position)
+        return bitmap
+
+    def is_set(self, position):
+        index, offset = divmod(position, 8)
+        if position < 0 or index >= len(self._bits):
+            return False
+        return bool(self._bits[index] & (1 << offset))
+
+    def set(self, position):
+        if position < 0:
+            raise ValueError("Bit position must be positive")
+        index, offset = divmod(position, 8)
+        if index >= len(self._bits):
+            self._bits.extend(bytes(index - len(self._bits) + 1))
+        self._bits[index] |= 1 << offset
+
+    def clear(self, position):
+        index, offset = divmod(position, 8)
+        if 0 <= position and index < len(self._bits):
+            self._bits[index] &= ~(1 << offset) & 0xFF
+
+    def count(self, size=None):
+        """Number of set bits, optionally only among the first ``size`` positions"""
+        value = int.from_bytes(self._bits, 'little')
+        if size is not None:
+            value &= (1 << size) - 1
+        return value.bit_count()
+
+    def first_unset(self, size):
+        """Lowest position below ``size`` that is not set, or None if all are set"""
+        for index, byte in enumerate(self._bits):
+            if byte != 0xFF:
+                position = index * 8 + ((~byte & (byte + 1)).bit_length() - 1)
+                return position if position < size else None
+        position = len(self._bits) * 8
+        return position if position < size else None
+
+    def to_bytes(self):
+        return bytes(self._bits)
+
+    def __eq__(self, other):
+        if not isinstance(other, CompletionBitmap):
+            return NotImplemented
+        return self._bits.rstrip(b'\x00') == other._bits.rstrip(b'\x00')
+
+    def __repr__(self):
+        return f"<CompletionBitmap {self.count()} set>"
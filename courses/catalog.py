@@ -0,0 +1,127 @@
+"""
+Public Course Catalog Cache
+Caches the ordered ids of published courses per listing and the card data of
+each course separately, so a page costs one id list lookup plus one
+``get_many`` for its cards. Listings are keyed by a catalog version bumped by
+signals when the set of published courses or subjects changes, and are
+recomputed single-flight; cards are deleted individually when their course
+changes.
+"""
+
+import time
+
+from django.core.cache import cache
+from django.db.models import Count, Q
+
+from core.caching import get_or_compute
+
+from .models import Course, Subject
+
+# Everything here is invalidated by signals, the timeout only bounds stale owner names
+CATALOG_CACHE_TIMEOUT = 60 * 60 * 6
+
+VERSION_KEY = 'course_catalog_version'
+
+
+def _new_version():
+    # Time based so a version evicted from the cache never reuses an old namespace
+    return int(time.time() * 1000)
+
+
+def _card_key(course_id):
+    return f"course_catalog_card_{course_id}"
+
+
+def get_catalog_version():
+    """Get the current catalog version"""
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        cache.add(VERSION_KEY, _new_version(), timeout=None)
+        version = cache.get(VERSION_KEY)
+    return version
+
+
+def bump_catalog_version():
+    """Invalidate every cached listing and the subject sidebar"""
+    try:
+        cache.incr(VERSION_KEY)
+    except ValueError:
+        cache.set(VERSION_KEY, _new_version(), timeout=None)
+
+
+def invalidate_course_cards(course_ids):
+    """Drop the cached cards of the given courses"""
+    cache.delete_many([_card_key(course_id) for course_id in set(course_ids)])
+
+
+def get_subjects():
+    """
+    Get all subjects with their number of published courses.
+
+    Returns:
+        list: Dicts with ``pk``, ``title``, ``slug`` and ``total_courses``
+    """
+    return get_or_compute(
+        f"course_catalog_subjects_{get_catalog_version()}",
+        lambda: list(Subject.objects.annotate(
+            total_courses=Count('courses', filter=Q(courses__status='published'))
+        ).values('pk', 'title', 'slug', 'total_courses')),
+        CATALOG_CACHE_TIMEOUT,
+    )
+
+
+def get_course_ids(subject_id=None):
+    """
+    Get the ids of published courses, newest first.
+
+    Args:
+        subject_id: Only list courses of this subject
+
+    Returns:
+        list: Course ids
+    """
+    # SECURITY: Only published courses are visible to students/public
+    queryset = Course.objects.filter(status='published')
+    if subject_id:
+        queryset = queryset.filter(subject_id=subject_id)
+    return get_or_compute(
+        f"course_catalog_ids_{subject_id or 'all'}_{get_catalog_version()}",
+        lambda: list(queryset.order_by('-created').values_list('pk', flat=True)),
+        CATALOG_CACHE_TIMEOUT,
+    )
+
+
+def get_course_cards(course_ids):
+    """
+    Get card data for courses, building only the ones missing from the cache.
+
+    Cards are plain dicts shaped like the course attributes the catalog
+    templates use (``course.subject.title``, ``course.owner.username``).
+
+    Returns:
+        list: Cards in the order of ``course_ids``; deleted courses are skipped
+    """
+    cached = cache.get_many([_card_key(course_id) for course_id in course_ids])
+    cards = {course_id: cached[_card_key(course_id)] for course_id in course_ids if _card_key(course_id) in cached}
+
+    missing = [course_id for course_id in course_ids if course_id not in cards]
+    if missing:
+        courses = Course.objects.filter(pk__in=missing).select_related(
+            'subject', 'owner'
+        ).annotate(total_modules=Count('modules'))
+        built = {
+            course.pk: {
+                'pk': course.pk,
+                'slug': course.slug,
+                'title': course.title,
+                'overview': course.overview,
+                'subject': {'pk': course.subject_id, 'title': course.subject.title, 'slug': course.subject.slug},
+                'owner': {'pk': course.owner_id, 'username': course.owner.username},
+                'total_modules': course.total_modules,
+            }
+            for course in courses
+        }
+        cache.set_many({_card_key(course_id): card for course_id, card in built.items()}, CATALOG_CACHE_TIMEOUT)
+        cards.update(built)
+
+    return [cards[course_id] for course_id in course_ids if course_id in cards]
@@ -0,0 +1,143 @@
+"""
+Content Item Cleanup Services
+ContentItem.item is a GenericForeignKey, so deleting contents, modules or
+courses does not cascade to the Text/Video/Image/File rows. These services
+delete items together with their ContentItems, and garbage-collect items that
+are no longer referenced, including their stored files.
+"""
+
+from collections import defaultdict
+from datetime import timedelta
+
+from django.contrib.contenttypes.models import ContentType
+from django.db import models, transaction
+from django.db.models import Exists, OuterRef
+from django.utils import timezone
+
+from .models import Content, ContentItem, File, Image, Text, Video
+
+ITEM_MODELS = [Text, Video, Image, File]
+
+# Items are created just before their ContentItem; younger items are never collected
+ORPHAN_GRACE_PERIOD = timedelta(hours=1)
+
+DEFAULT_BATCH_SIZE = 1000
+
+
+def _file_fields(model):
+    return [field for field in model._meta.concrete_fields if isinstance(field, models.FileField)]
+
+
+class ItemCleanupService:
+    """Batched deletion of content items and their stored files"""
+
+    @staticmethod
+    def delete_stored_files(files):
+        """
+        Delete stored files that no remaining item references. Cloned items
+        share files with their originals, so references are checked first.
+
+        Args:
+            files: Iterable of (storage, name)
+
+        Returns:
+            int: Number of files deleted
+        """
+        files = {(storage, name) for storage, name in files if name}
+        names = {name for _, name in files}
+        for model in ITEM_MODELS:
+            for field in _file_fields(model):
+                if names:
+                    names -= set(model.objects.filter(
+                        **{f'{field.attname}__in': names}
+                    ).values_list(field.attname, flat=True))
+
+        deleted = 0
+        for storage, name in files:
+            if name in names:
+                storage.delete(name)
+                deleted += 1
+        return deleted
+
+    @classmethod
+    def _delete_item_rows(cls, model, pks):
+        """Delete items of one model; their files go once the transaction commits"""
+        files = [
+            (field.storage, name)
+            for field in _file_fields(model)
+            for name in model.objects.filter(pk__in=pks).values_list(field.attname, flat=True)
+        ]
+        model.objects.filter(pk__in=pks).delete()
+        if files:
+            transaction.on_commit(lambda: cls.delete_stored_files(files))
+
+    @classmethod
+    @transaction.atomic
+    def delete_content_items(cls, content_items):
+        """
+        Delete ContentItems and their items with one query per item type.
+
+        Returns:
+            int: Number of deleted ContentItems
+        """
+        rows = list(content_items.values_list('pk', 'content_type_id', 'object_id'))
+        item_ids = defaultdict(list)
+        for _, content_type_id, object_id in rows:
+            item_ids[content_type_id].append(object_id)
+
+        ContentItem.objects.filter(pk__in=[pk for pk, _, _ in rows]).delete()
+        for content_type_id, pks in item_ids.items():
+            model = ContentType.objects.get_for_id(content_type_id).model_class()
+            if model in ITEM_MODELS:
+                cls._delete_item_rows(model, pks)
+        return len(rows)
+
+    @classmethod
+    @transaction.atomic
+    def delete_contents(cls, contents):
+        """
+        Delete contents together with their items.
+
+        Returns:
+            int: Number of deleted contents
+        """
+        content_ids = list(contents.values_list('pk', flat=True))
+        cls.delete_content_items(ContentItem.objects.filter(content_id__in=content_ids))
+        Content.objects.filter(pk__in=content_ids).delete()
+        return len(content_ids)
+
+    @staticmethod
+    def find_orphans(model, grace_period=ORPHAN_GRACE_PERIOD):
+        """Items of ``model`` that no ContentItem points to (NOT EXISTS anti-join)"""
+        content_type = ContentType.objects.get_for_model(model)
+        return model.objects.filter(
+            created__lt=timezone.now() - grace_period
+        ).exclude(Exists(
+            ContentItem.objects.filter(content_type=content_type, object_id=OuterRef('pk'))
+        ))
+
+    @classmethod
+    def collect(cls, batch_size=DEFAULT_BATCH_SIZE, grace_period=ORPHAN_GRACE_PERIOD, dry_run=False):
+        """
+        Delete unreferenced items in chunks of ``batch_size``.
+
+        Returns:
+            dict: Number of orphans per item model name (found, for a dry run)
+        """
+        counts = {}
+        for model in ITEM_MODELS:
+            orphans = cls.find_orphans(model, grace_period)
+            if dry_run:
+                counts[model._meta.model_name] = orphans.count()
+                continue
+
+            deleted = 0
+            while True:
+                pks = list(orphans.values_list('pk', flat=True)[:batch_size])
+                if not pks:
+                    break
+                with transaction.atomic():
+                    cls._delete_item_rows(model, pks)
+                deleted += len(pks)
+            counts[model._meta.model_name] = deleted
+        return counts
@@ -0,0 +1,175 @@
+"""
+Course Cloning Services
+Copies courses, modules and contents together with their Text/Video/Image/File
+items using one bulk_create per model inside a single transaction. File items
+keep referencing the original stored file.
+"""
+
+from collections import defaultdict
+
+from django.db import transaction
+
+from .models import Content, ContentItem, Course, Module
+from .outline import bump_structure_version
+from .progress_service import ProgressService
+from .search_service import CourseSearchService
+from .stats_service import CourseStatsService
+
+COPY_SUFFIX = ' (Copy)'
+
+
+class CloningService:
+    """Duplicate course structure with a constant number of queries per model"""
+
+    @staticmethod
+    def _copy(instance, **overrides):
+        """Unsaved copy of every concrete field except the primary key"""
+        copy = type(instance)()
+        for field in instance._meta.concrete_fields:
+            if not field.primary_key:
+                setattr(copy, field.attname, getattr(instance, field.attname))
+        for name, value in overrides.items():
+            setattr(copy, name, value)
+        return copy
+
+    @classmethod
+    def _clone_contents(cls, pairs, owner):
+        """
+        Save copies of contents and their items.
+
+        Args:
+            pairs: (source content loaded with Content.objects.with_items(), unsaved copy)
+            owner: User owning the copied items
+
+        Returns:
+            int: Number of copied items
+        """
+        Content.objects.bulk_create([copy for _, copy in pairs], batch_size=500)
+
+        copies = []
+        items_by_model = defaultdict(list)
+        for source, content in pairs:
+            for content_item in source.items.all():
+                if content_item.item is None:
+                    # Dangling reference, nothing to copy
+                    continue
+                item = cls._copy(content_item.item, owner_id=owner.pk)
+                items_by_model[type(item)].append(item)
+                copies.append((content_item, content, item))
+
+        for model, items in items_by_model.items():
+            model.objects.bulk_create(items, batch_size=500)
+
+        ContentItem.objects.bulk_create([
+            ContentItem(
+                content=content,
+                content_type_id=content_item.content_type_id,
+                object_id=item.pk,
+                order=content_item.order,
+            )
+            for content_item, content, item in copies
+        ], batch_size=500)
+        return len(copies)
+
+    @staticmethod
+    def _copy_title(instance):
+        max_length = instance._meta.get_field('title').max_length
+        return f"{instance.title[:max_length - len(COPY_SUFFIX)]}{COPY_SUFFIX}"
+
+    @staticmethod
+    def _unique_slug(slug):
+        base = f"{slug}-copy"[:Course._meta.get_field('slug').max_length - 4]
+        taken = set(Course.objects.filter(slug__startswith=base).values_list('slug', flat=True))
+        candidate, number = base, 2
+        while candidate in taken:
+            candidate = f"{base}-{number}"
+            number += 1
+        return candidate
+
+    @classmethod
+    @transaction.atomic
+    def clone_contents(cls, contents, module, owner):
+        """
+        Copy contents to the end of a module (their own module for duplicates).
+
+        Args:
+            contents: Content queryset
+            module: Target Module
+            owner: User owning the copied items
+
+        Returns:
+            list: New Content instances
+        """
+        sources = list(contents.order_by('order', 'pk').with_items())
+        position = Content._meta.get_field('order').next_value(Content(module=module))
+        pairs = [
+            (source, cls._copy(source, module_id=module.pk, title=cls._copy_title(source), order=position + i))
+            for i, source in enumerate(sources)
+        ]
+        cls._clone_contents(pairs, owner)
+
+        # bulk_create skips the post_save receivers that keep these and the search document in sync
+        ProgressService.contents_added(module.pk, len(pairs))
+        CourseStatsService.apply(module.course_id, total_contents=len(pairs))
+        bump_structure_version(module.course_id)
+        CourseSearchService.update_documents([module.course_id])
+        return [content for _, content in pairs]
+
+    @classmethod
+    @transaction.atomic
+    def clone_module(cls, module, owner, course=None):
+        """
+        Copy a module with its contents to the end of a course (default: its own).
+
+        Returns:
+            Module: The new module
+        """
+        course = course or module.course
+        copy = cls._copy(module, course_id=course.pk, title=cls._copy_title(module), order=None)
+        copy.save()
+
+        sources = list(module.contents.order_by('order', 'pk').with_items())
+        cls._clone_contents([(source, cls._copy(source, module_id=copy.pk)) for source in sources], owner)
+
+        ProgressService.contents_added(copy.pk, len(sources))
+        CourseStatsService.apply(course.pk, total_contents=len(sources))
+        bump_structure_version(course.pk)
+        CourseSearchService.update_documents([course.pk])
+        return copy
+
+    @classmethod
+    @transaction.atomic
+    def clone_course(cls, course, owner):
+        """
+        Copy a course with all modules, contents and items as a new draft.
+
+        Enrollments, students and analytics are not copied.
+
+        Returns:
+            Course: The new course
+        """
+        copy = cls._copy(
+            course,
+            owner_id=owner.pk,
+            title=cls._copy_title(course),
+            slug=cls._unique_slug(course.slug),
+            status='draft',
+            published_at=None,
+            # Denormalized from the source's enrollments, which are not copied
+            enrolled_count=0,
+        )
+        copy.save()
+
+        modules = list(course.modules.order_by('order', 'pk'))
+        module_copies = {module.pk: cls._copy(module, course_id=copy.pk) for module in modules}
+        Module.objects.bulk_create(module_copies.values(), batch_size=500)
+
+        sources = Content.objects.filter(module__course=course).order_by('module', 'order', 'pk').with_items()
+        cls._clone_contents(
+            [(source, cls._copy(source, module_id=module_copies[source.module_id].pk)) for source in sources],
+            owner
+        )
+
+        bump_structure_version(copy.pk)
+        CourseSearchService.update_documents([copy.pk])
+        return copy
@@ -0,0 +1,31 @@
+from django.conf import settings
+from django.core.mail import send_mail
+from django.template.loader import render_to_string
+from django.utils.html import strip_tags
+
+
+def send_waitlist_offer_email(entry):
+    """Send email when a seat is offered to a waitlisted student"""
+    user = entry.student
+    if not user.email or not user.email_notifications:
+        return
+
+    subject = f'Kursi Tersedia - {entry.course.title}'
+
+    html_message = render_to_string('courses/emails/waitlist_offer.html', {
+        'entry': entry,
+        'user': user,
+    })
+    plain_message = strip_tags(html_message)
+
+    try:
+        send_mail(
+            subject=subject,
+            message=plain_message,
+            from_email=settings.DEFAULT_FROM_EMAIL,
+            recipient_list=[user.email],
+            html_message=html_message,
+            fail_silently=True,
+        )
+    except Exception:
+        pass  # Log in production
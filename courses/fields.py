@@ -1,32 +1,72 @@
-from django.core.exceptions import ObjectDoesNotExist
-from django.db import models, transaction
+from django.db import connections, models, router, transaction
+from django.db.models import Max
 
 
 class OrderField(models.PositiveIntegerField):
     """
     Custom field that automatically assigns order values.
-    Thread-safe implementation using select_for_update.
+
+    A new row is placed after the last row sharing its ``for_fields`` with a
+    single scoped MAX() aggregate. Inside a transaction the parent rows of the
+    scope are locked, so concurrent inserts only wait for inserts under the
+    same parent instead of the whole table. Models using the field inherit
+    OrderedModel so the lookup and the insert share that transaction.
     """
-    
+
     def __init__(self, for_fields=None, *args, **kwargs):
         self.for_fields = for_fields
         super().__init__(*args, **kwargs)
 
     def pre_save(self, model_instance, add):
         if getattr(model_instance, self.attname) is None:
-            with transaction.atomic():
-                try:
-                    qs = self.model.objects.select_for_update().all()
-                    if self.for_fields:
-                        query = {
-                            field: getattr(model_instance, field) for field in self.for_fields
-                        }
-                        qs = qs.filter(**query)
-                    last_item = qs.latest(self.attname)
-                    value = getattr(last_item, self.attname) + 1
-                except ObjectDoesNotExist:
-                    value = 0
-                setattr(model_instance, self.attname, value)
-                return value
-        else:
-            return super().pre_save(model_instance, add)
+            value = self.next_value(model_instance)
+            setattr(model_instance, self.attname, value)
+            return value
+        return super().pre_save(model_instance, add)
+
+    def get_scope(self, model_instance):
+        return {field: getattr(model_instance, field) for field in self.for_fields or []}
+
+    def next_value(self, model_instance):
+        """Position after the last row in the scope of ``model_instance``"""
+        using = router.db_for_write(self.model, instance=model_instance)
+        if connections[using].in_atomic_block:
+            self._lock_scope(model_instance, using)
+
+        last = self.model._default_manager.using(using).filter(
+            **self.get_scope(model_instance)
+        ).aggregate(last=Max(self.attname))['last']
+        return 0 if last is None else last + 1
+
+    def _lock_scope(self, model_instance, using):
+        # The lock is held until the surrounding transaction ends
+        for name in self.for_fields or []:
+            field = self.model._meta.get_field(name)
+            value = getattr(model_instance, field.attname)
+            if field.is_relation and value is not None:
+                list(field.related_model._default_manager.using(using).select_for_update().filter(
+                    pk=value
+                ).values_list('pk', flat=True))
+
+
+class OrderedModel(models.Model):
+    """
+    Saves rows that are assigned a new OrderField position in a transaction.
+
+    In autocommit mode the scope lock taken by OrderField.next_value would be
+    released before the row is inserted, letting two inserts read the same
+    MAX() and get the same position.
+    """
+
+    class Meta:
+        abstract = True
+
+    def save(self, *args, **kwargs):
+        if any(
+            isinstance(field, OrderField) and getattr(self, field.attname) is None
+            for field in self._meta.concrete_fields
+        ):
+            using = kwargs.get('using') or router.db_for_write(type(self), instance=self)
+            with transaction.atomic(using=using, savepoint=False):
+                return super().save(*args, **kwargs)
+        return super().save(*args, **kwargs)
@@ -0,0 +1,70 @@
+"""
+Landing Page Services
+Everything the landing page shows from the database is computed into one
+cached snapshot. A periodic ``refresh_landing_snapshot`` run keeps it warm, so
+anonymous visitors are served from the cache; if it has not run, the snapshot
+is rebuilt single-flight when it expires.
+"""
+
+import time
+
+from django.db.models import Count
+
+from core.caching import get_or_compute, refresh
+from core.models import GlobalSettings
+from core.utils import get_setting
+from users.models import User
+
+from .catalog import get_catalog_version
+from .models import Course
+
+LANDING_SNAPSHOT_TIMEOUT = 60 * 15
+
+# Rendered sections are keyed by the settings and snapshot versions, the timeout only frees memory
+LANDING_FRAGMENT_TIMEOUT = 60 * 60 * 24
+
+PRICING_PLANS_COUNT = 3
+
+
+def _snapshot_key():
+    # Publishing a course or saving settings (e.g. featured_courses_count) switches to a new snapshot
+    return f"landing_page_snapshot_{get_catalog_version()}_{GlobalSettings.get_settings_version()}"
+
+
+class LandingPageService:
+    """Cached landing page data"""
+
+    @staticmethod
+    def build_snapshot():
+        """
+        Compute the landing page data.
+
+        Returns:
+            dict: Featured courses, statistics, subscription plans and the
+            snapshot ``version`` used to key rendered fragments
+        """
+        from subscriptions.models import SubscriptionPlan
+
+        featured_count = get_setting('featured_courses_count', 6)
+        published = Course.objects.filter(status='published')
+        return {
+            'version': time.time_ns(),
+            'featured_courses': list(published.select_related('subject', 'owner').annotate(
+                total_modules=Count('modules')
+            ).order_by('-created')[:featured_count]),
+            'total_students': User.objects.count(),
+            'total_courses': published.count(),
+            'total_instructors': User.objects.filter(role='instructor').count(),
+            'subscription_plans': list(SubscriptionPlan.objects.filter(
+                is_active=True
+            ).order_by('display_order', 'price')[:PRICING_PLANS_COUNT]),
+        }
+
+    @classmethod
+    def get_snapshot(cls):
+        return get_or_compute(_snapshot_key(), cls.build_snapshot, LANDING_SNAPSHOT_TIMEOUT)
+
+    @classmethod
+    def refresh_snapshot(cls):
+        """Rebuild the snapshot ahead of expiry. Returns the new snapshot."""
+        return refresh(_snapshot_key(), cls.build_snapshot, LANDING_SNAPSHOT_TIMEOUT)
@@ -0,0 +1,145 @@
+"""
+Learning Time Rollup Services
+Maintains DailyLearningTime rows so dashboards read learning totals and streaks
+without loading every LearningSession of a student.
+"""
+
+from collections import defaultdict
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import Count, DurationField, ExpressionWrapper, F, Min, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from .models import CourseEnrollment, DailyLearningTime, LearningSession
+
+# Longest streak that is reported; bounds the rows read per streak lookup
+MAX_STREAK_DAYS = 366
+
+
+class LearningTimeService:
+    """Incremental and full maintenance of daily learning time"""
+
+    @staticmethod
+    def record(sessions):
+        """
+        Add ended sessions to the daily rollup. A session counts towards the day
+        it started on.
+
+        Args:
+            sessions: LearningSession instances (saved or not) with ended_at set
+        """
+        totals = defaultdict(lambda: [0, 0])
+        for session in sessions:
+            if session.ended_at is None or session.started_at is None:
+                continue
+            key = (session.enrollment_id, timezone.localdate(session.started_at))
+            totals[key][0] += max(int((session.ended_at - session.started_at).total_seconds()), 0)
+            totals[key][1] += 1
+        if not totals:
+            return
+
+        students = dict(CourseEnrollment.objects.filter(
+            pk__in={enrollment_id for enrollment_id, _ in totals}
+        ).values_list('pk', 'student_id'))
+
+        with transaction.atomic():
+            # Create missing days first so concurrent writers only ever increment
+            DailyLearningTime.objects.bulk_create([
+                DailyLearningTime(enrollment_id=enrollment_id, student_id=students[enrollment_id], date=date)
+                for enrollment_id, date in totals if enrollment_id in students
+            ], ignore_conflicts=True)
+            for (enrollment_id, date), (seconds, count) in totals.items():
+                if enrollment_id in students:
+                    DailyLearningTime.objects.filter(enrollment_id=enrollment_id, date=date).update(
+                        seconds=F('seconds') + seconds, sessions=F('sessions') + count
+                    )
+
+    @staticmethod
+    def get_summary(student=None, enrollment=None):
+        """
+        Learning totals of a student (all enrollments) or of one enrollment.
+
+        Returns:
+            dict: total_seconds, total_hours, total_sessions, current_streak (days)
+        """
+        days = DailyLearningTime.objects.all()
+        if student is not None:
+            days = days.filter(student=student)
+        if enrollment is not None:
+            days = days.filter(enrollment=enrollment)
+
+        totals = days.aggregate(total_seconds=Sum('seconds'), total_sessions=Sum('sessions'))
+        total_seconds = totals['total_seconds'] or 0
+
+        # A streak is still running when the last learning day is today or yesterday
+        dates = days.order_by('-date').values_list('date', flat=True).distinct()[:MAX_STREAK_DAYS]
+        expected = timezone.localdate()
+        streak = 0
+        for date in dates:
+            if streak == 0 and date == expected - timedelta(days=1):
+                expected = date
+            if date != expected:
+                break
+            streak += 1
+            expected = date - timedelta(days=1)
+
+        return {
+            'total_seconds': total_seconds,
+            'total_hours': round(total_seconds / 3600, 2),
+            'total_sessions': totals['total_sessions'] or 0,
+            'current_streak': streak,
+        }
+
+    @staticmethod
+    @transaction.atomic
+    def rebuild(enrollments=None, start=None, end=None):
+        """
+        Rebuild daily learning time from ended LearningSession rows.
+
+        Only days from ``start`` (default: the day of the oldest remaining
+        session) up to ``end`` (exclusive) are rebuilt, so days whose sessions
+        were archived keep their summaries.
+
+        Args:
+            enrollments: CourseEnrollment queryset (default: all)
+            start: First date to rebuild
+            end: Date to stop before
+
+        Returns:
+            int: Number of daily rows written
+        """
+        enrollments = CourseEnrollment.objects.all() if enrollments is None else enrollments
+        sessions = LearningSession.objects.filter(enrollment__in=enrollments)
+        if start is None:
+            first = sessions.aggregate(first=Min('started_at'))['first']
+            if first is None:
+                return 0
+            start = timezone.localdate(first)
+
+        days = DailyLearningTime.objects.filter(enrollment__in=enrollments, date__gte=start)
+        sessions = sessions.filter(ended_at__isnull=False, started_at__date__gte=start)
+        if end is not None:
+            days = days.filter(date__lt=end)
+            sessions = sessions.filter(started_at__date__lt=end)
+        days.delete()
+
+        rows = sessions.annotate(
+            date=TruncDate('started_at'),
+            duration=ExpressionWrapper(F('ended_at') - F('started_at'), output_field=DurationField()),
+        ).values('enrollment', 'enrollment__student', 'date').annotate(
+            total=Sum('duration'), count=Count('id')
+        ).order_by()
+
+        created = DailyLearningTime.objects.bulk_create([
+            DailyLearningTime(
+                enrollment_id=row['enrollment'],
+                student_id=row['enrollment__student'],
+                date=row['date'],
+                seconds=max(int(row['total'].total_seconds()), 0),
+                sessions=row['count'],
+            )
+            for row in rows
+        ], batch_size=500)
+        return len(created)
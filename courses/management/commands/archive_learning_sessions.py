@@ -0,0 +1,47 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from courses.retention_service import DEFAULT_BATCH_SIZE, DEFAULT_RETENTION_DAYS, SessionRetentionService
+
+
+class Command(BaseCommand):
+    help = 'Summarize, archive and delete learning sessions older than the retention window'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days',
+            type=int,
+            default=DEFAULT_RETENTION_DAYS,
+            help=f'Keep sessions of the last N days (default: {DEFAULT_RETENTION_DAYS})'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=DEFAULT_BATCH_SIZE,
+            help=f'Sessions archived and deleted per batch (default: {DEFAULT_BATCH_SIZE})'
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Only report how many sessions would be archived'
+        )
+
+    def handle(self, *args, **options):
+        if options['days'] < 1 or options['batch_size'] < 1:
+            raise CommandError('--days and --batch-size must be positive')
+
+        cutoff_date = SessionRetentionService.get_cutoff_date(options['days'])
+
+        if options['dry_run']:
+            count = SessionRetentionService.get_expired_sessions(cutoff_date).count()
+            self.stdout.write(f'{count} learning session(s) started before {cutoff_date} would be archived')
+            return
+
+        self.stdout.write(f'Archiving learning sessions started before {cutoff_date}...')
+
+        result = SessionRetentionService.archive(cutoff_date, batch_size=options['batch_size'])
+
+        for name in result['files']:
+            self.stdout.write(f'  {name}')
+        self.stdout.write(self.style.SUCCESS(
+            f"Archived {result['sessions']} learning session(s) to {len(result['files'])} file(s)"
+        ))
@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from courses.learning_time_service import LearningTimeService
+from courses.models import Course, CourseEnrollment
+
+
+class Command(BaseCommand):
+    help = 'Rebuild daily learning time from ended learning sessions'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--course',
+            type=int,
+            help='Only rebuild learning time of enrollments in the course with this ID'
+        )
+
+    def handle(self, *args, **options):
+        enrollments = CourseEnrollment.objects.all()
+        if options.get('course'):
+            if not Course.objects.filter(pk=options['course']).exists():
+                raise CommandError(f"Course {options['course']} does not exist")
+            enrollments = enrollments.filter(course_id=options['course'])
+
+        self.stdout.write('Rebuilding daily learning time...')
+
+        count = LearningTimeService.rebuild(enrollments)
+
+        self.stdout.write(self.style.SUCCESS(f'Wrote {count} daily learning time row(s)'))
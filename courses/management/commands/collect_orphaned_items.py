@@ -0,0 +1,50 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+
+from courses.cleanup_service import DEFAULT_BATCH_SIZE, ORPHAN_GRACE_PERIOD, ItemCleanupService
+
+DEFAULT_GRACE_MINUTES = int(ORPHAN_GRACE_PERIOD.total_seconds() // 60)
+
+
+class Command(BaseCommand):
+    help = 'Delete Text/Video/Image/File items no content references, together with their files'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=DEFAULT_BATCH_SIZE,
+            help=f'Items deleted per batch (default: {DEFAULT_BATCH_SIZE})'
+        )
+        parser.add_argument(
+            '--grace-minutes',
+            type=int,
+            default=DEFAULT_GRACE_MINUTES,
+            help=f'Skip items created in the last N minutes (default: {DEFAULT_GRACE_MINUTES})'
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Only report how many items would be deleted'
+        )
+
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1 or options['grace_minutes'] < 0:
+            raise CommandError('--batch-size must be positive and --grace-minutes not negative')
+
+        if not options['dry_run']:
+            self.stdout.write('Collecting orphaned content items...')
+
+        counts = ItemCleanupService.collect(
+            batch_size=options['batch_size'],
+            grace_period=timedelta(minutes=options['grace_minutes']),
+            dry_run=options['dry_run'],
+        )
+
+        for model_name, count in counts.items():
+            self.stdout.write(f'  {model_name}: {count}')
+        if options['dry_run']:
+            self.stdout.write(f'{sum(counts.values())} orphaned item(s) would be deleted')
+        else:
+            self.stdout.write(self.style.SUCCESS(f'Deleted {sum(counts.values())} orphaned item(s)'))
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from courses.session_service import LearningSessionService
+
+
+class Command(BaseCommand):
+    help = 'Write buffered learning sessions that are closed or idle to the database'
+
+    def handle(self, *args, **options):
+        self.stdout.write('Flushing buffered learning sessions...')
+
+        count = LearningSessionService.flush()
+
+        self.stdout.write(self.style.SUCCESS(f'Flushed {count} learning session(s)'))
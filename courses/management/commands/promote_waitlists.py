@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from courses.waitlist_service import PROMOTION_BATCH_SIZE, WaitlistService
+
+
+class Command(BaseCommand):
+    help = 'Offer free seats of capacity-limited courses to their waitlists'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=PROMOTION_BATCH_SIZE,
+            help=f'Waitlisted students promoted per course (default: {PROMOTION_BATCH_SIZE})'
+        )
+
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size must be positive')
+
+        self.stdout.write('Promoting waitlisted students...')
+
+        count = WaitlistService.promote_all(batch_size=options['batch_size'])
+
+        self.stdout.write(self.style.SUCCESS(f'Promoted {count} waitlisted student(s)'))
@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from courses.models import Course
+from courses.search_service import CourseSearchService
+
+
+class Command(BaseCommand):
+    help = 'Rebuild course search documents from course, module and text content'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--course',
+            type=int,
+            help='Only rebuild the search document of the course with this ID'
+        )
+
+    def handle(self, *args, **options):
+        courses = Course.objects.all()
+        if options.get('course'):
+            courses = courses.filter(pk=options['course'])
+            if not courses.exists():
+                raise CommandError(f"Course {options['course']} does not exist")
+
+        self.stdout.write('Rebuilding course search documents...')
+
+        count = CourseSearchService.rebuild(courses)
+
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt {count} search document(s)'))
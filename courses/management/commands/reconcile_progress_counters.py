@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from courses.models import Course
+from courses.progress_service import ProgressService
+
+
+class Command(BaseCommand):
+    help = 'Recompute denormalized progress counters on enrollments and module progress'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--course',
+            type=int,
+            help='Only reconcile counters for the course with this ID'
+        )
+
+    def handle(self, *args, **options):
+        course = None
+        if options.get('course'):
+            try:
+                course = Course.objects.get(pk=options['course'])
+            except Course.DoesNotExist:
+                raise CommandError(f"Course {options['course']} does not exist")
+
+        self.stdout.write('Reconciling progress counters...')
+
+        enrollments, module_progress = ProgressService.reconcile(course=course)
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'Reconciled {enrollments} enrollment(s) and {module_progress} module progress record(s)'
+            )
+        )
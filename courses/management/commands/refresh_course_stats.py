@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from courses.models import Course
+from courses.stats_service import CourseStatsService
+
+
+class Command(BaseCommand):
+    help = 'Rebuild course analytics rollups from enrollment, progress and order data'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--course',
+            type=int,
+            help='Only refresh the rollup of the course with this ID'
+        )
+
+    def handle(self, *args, **options):
+        courses = Course.objects.all()
+        if options.get('course'):
+            courses = courses.filter(pk=options['course'])
+            if not courses.exists():
+                raise CommandError(f"Course {options['course']} does not exist")
+
+        self.stdout.write('Refreshing course analytics rollups...')
+
+        count = CourseStatsService.refresh_all(courses)
+
+        self.stdout.write(self.style.SUCCESS(f'Refreshed {count} course rollup(s)'))
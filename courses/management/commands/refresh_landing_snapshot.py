@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from courses.landing_service import LandingPageService
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the cached landing page snapshot; run it more often than it expires'
+
+    def handle(self, *args, **options):
+        self.stdout.write('Refreshing landing page snapshot...')
+
+        snapshot = LandingPageService.refresh_snapshot()
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Cached {len(snapshot['featured_courses'])} featured course(s) and "
+            f"{len(snapshot['subscription_plans'])} plan(s)"
+        ))
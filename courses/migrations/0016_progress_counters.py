@@ -0,0 +1,69 @@
+# Generated by Django 6.0.9 on 2026-10-16 23:03
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def _count(queryset, group_field):
+    return Coalesce(
+        Subquery(queryset.order_by().values(group_field).annotate(total=Count('pk')).values('total')[:1]),
+        0
+    )
+
+
+def backfill_counters(apps, schema_editor):
+    Content = apps.get_model('courses', 'Content')
+    ContentProgress = apps.get_model('courses', 'ContentProgress')
+    CourseEnrollment = apps.get_model('courses', 'CourseEnrollment')
+    ModuleProgress = apps.get_model('courses', 'ModuleProgress')
+
+    CourseEnrollment.objects.update(
+        total_contents_count=_count(Content.objects.filter(module__course=OuterRef('course')), 'module__course'),
+        completed_contents_count=_count(
+            ContentProgress.objects.filter(
+                enrollment=OuterRef('pk'), content__module__course=OuterRef('course'), is_completed=True
+            ),
+            'enrollment'
+        ),
+    )
+    ModuleProgress.objects.update(
+        total_contents_count=_count(Content.objects.filter(module=OuterRef('module')), 'module'),
+        completed_contents_count=_count(
+            ContentProgress.objects.filter(
+                enrollment=OuterRef('enrollment'), content__module=OuterRef('module'), is_completed=True
+            ),
+            'enrollment'
+        ),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0015_update_pricing_constraint'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='courseenrollment',
+            name='completed_contents_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='courseenrollment',
+            name='total_contents_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='moduleprogress',
+            name='completed_contents_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='moduleprogress',
+            name='total_contents_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_counters, migrations.RunPython.noop),
+    ]
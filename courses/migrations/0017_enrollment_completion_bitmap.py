@@ -0,0 +1,23 @@
+# Generated by Django 6.0.9 on 2026-10-16 23:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0016_progress_counters'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='courseenrollment',
+            name='completion_bitmap',
+            field=models.BinaryField(blank=True, default=b''),
+        ),
+        migrations.AddField(
+            model_name='courseenrollment',
+            name='completion_bitmap_signature',
+            field=models.CharField(blank=True, default='', max_length=32),
+        ),
+    ]
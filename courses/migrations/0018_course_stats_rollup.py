@@ -0,0 +1,32 @@
+# Generated by Django 6.0.9 on 2026-10-16 23:13
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0017_enrollment_completion_bitmap'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CourseStatsRollup',
+            fields=[
+                ('course', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats_rollup', serialize=False, to='courses.course')),
+                ('total_students', models.PositiveIntegerField(default=0)),
+                ('active_students', models.PositiveIntegerField(default=0)),
+                ('completed_students', models.PositiveIntegerField(default=0)),
+                ('paused_students', models.PositiveIntegerField(default=0)),
+                ('progress_sum', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('total_modules', models.PositiveIntegerField(default=0)),
+                ('total_contents', models.PositiveIntegerField(default=0)),
+                ('total_sessions', models.PositiveIntegerField(default=0)),
+                ('module_completions', models.JSONField(blank=True, default=dict, help_text='Completed ModuleProgress count keyed by module id')),
+                ('total_orders', models.PositiveIntegerField(default=0)),
+                ('total_revenue', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 6.0.9 on 2026-10-16 23:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0018_course_stats_rollup'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='text',
+            name='rendered_html',
+            field=models.TextField(blank=True, editable=False),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 6.0.9 on 2026-10-16 23:22
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0019_text_rendered_html'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='learningsession',
+            name='started_at',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+    ]
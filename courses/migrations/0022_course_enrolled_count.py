@@ -0,0 +1,35 @@
+# Generated by Django 6.0.9 on 2026-10-16 23:38
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def backfill_enrolled_count(apps, schema_editor):
+    Course = apps.get_model('courses', 'Course')
+    CourseEnrollment = apps.get_model('courses', 'CourseEnrollment')
+
+    Course.objects.update(enrolled_count=Coalesce(
+        Subquery(
+            CourseEnrollment.objects.filter(
+                course=OuterRef('pk'), status__in=['enrolled', 'completed']
+            ).order_by().values('course').annotate(total=Count('pk')).values('total')[:1]
+        ),
+        0
+    ))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0021_daily_learning_time'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='course',
+            name='enrolled_count',
+            field=models.PositiveIntegerField(default=0, editable=False, help_text='Seats taken by enrolled and completed students, kept in sync by signal receivers'),
+        ),
+        migrations.RunPython(backfill_enrolled_count, migrations.RunPython.noop),
+    ]
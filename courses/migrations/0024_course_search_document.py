@@ -0,0 +1,129 @@
+# Generated by Django 6.0.9 on 2026-10-17 00:12
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+POSTGRES_INDEX_SQL = [
+    """
+    ALTER TABLE courses_coursesearchdocument ADD COLUMN search_vector tsvector GENERATED ALWAYS AS (
+        setweight(to_tsvector('simple', title), 'A') ||
+        setweight(to_tsvector('simple', subject), 'B') ||
+        setweight(to_tsvector('simple', body), 'C')
+    ) STORED
+    """,
+    "CREATE INDEX courses_coursesearch_vector_gin ON courses_coursesearchdocument USING GIN (search_vector)",
+]
+
+POSTGRES_DROP_SQL = [
+    "DROP INDEX IF EXISTS courses_coursesearch_vector_gin",
+    "ALTER TABLE courses_coursesearchdocument DROP COLUMN IF EXISTS search_vector",
+]
+
+# External-content FTS5 table kept in sync with the document table by triggers
+SQLITE_INDEX_SQL = [
+    """
+    CREATE VIRTUAL TABLE courses_coursesearch_fts USING fts5(
+        title, subject, body,
+        content='courses_coursesearchdocument', content_rowid='course_id',
+        tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+    """
+    CREATE TRIGGER courses_coursesearch_ai AFTER INSERT ON courses_coursesearchdocument BEGIN
+        INSERT INTO courses_coursesearch_fts(rowid, title, subject, body)
+        VALUES (new.course_id, new.title, new.subject, new.body);
+    END
+    """,
+    """
+    CREATE TRIGGER courses_coursesearch_ad AFTER DELETE ON courses_coursesearchdocument BEGIN
+        INSERT INTO courses_coursesearch_fts(courses_coursesearch_fts, rowid, title, subject, body)
+        VALUES ('delete', old.course_id, old.title, old.subject, old.body);
+    END
+    """,
+    """
+    CREATE TRIGGER courses_coursesearch_au AFTER UPDATE ON courses_coursesearchdocument BEGIN
+        INSERT INTO courses_coursesearch_fts(courses_coursesearch_fts, rowid, title, subject, body)
+        VALUES ('delete', old.course_id, old.title, old.subject, old.body);
+        INSERT INTO courses_coursesearch_fts(rowid, title, subject, body)
+        VALUES (new.course_id, new.title, new.subject, new.body);
+    END
+    """,
+]
+
+SQLITE_DROP_SQL = [
+    "DROP TRIGGER IF EXISTS courses_coursesearch_ai",
+    "DROP TRIGGER IF EXISTS courses_coursesearch_ad",
+    "DROP TRIGGER IF EXISTS courses_coursesearch_au",
+    "DROP TABLE IF EXISTS courses_coursesearch_fts",
+]
+
+
+def _sqlite_has_fts5(connection):
+    with connection.cursor() as cursor:
+        cursor.execute("PRAGMA compile_options")
+        return 'ENABLE_FTS5' in {row[0] for row in cursor.fetchall()}
+
+
+def _run(schema_editor, statements):
+    for statement in statements:
+        schema_editor.execute(statement)
+
+
+def create_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        _run(schema_editor, POSTGRES_INDEX_SQL)
+    elif vendor == 'sqlite' and _sqlite_has_fts5(schema_editor.connection):
+        _run(schema_editor, SQLITE_INDEX_SQL)
+    # Other databases fall back to icontains lookups
+
+
+def drop_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        _run(schema_editor, POSTGRES_DROP_SQL)
+    elif vendor == 'sqlite':
+        _run(schema_editor, SQLITE_DROP_SQL)
+
+
+def backfill_search_documents(apps, schema_editor):
+    Course = apps.get_model('courses', 'Course')
+    Module = apps.get_model('courses', 'Module')
+    ContentItem = apps.get_model('courses', 'ContentItem')
+    ContentType = apps.get_model('contenttypes', 'ContentType')
+    Text = apps.get_model('courses', 'Text')
+    CourseSearchDocument = apps.get_model('courses', 'CourseSearchDocument')
+
+    text_type = ContentType.objects.filter(app_label='courses', model='text').first()
+    for course in Course.objects.select_related('subject').iterator():
+        parts = [course.overview, *Module.objects.filter(course=course).values_list('title', flat=True)]
+        if text_type:
+            parts += Text.objects.filter(pk__in=ContentItem.objects.filter(
+                content__module__course=course, content_type=text_type
+            ).values('object_id')).values_list('content', flat=True)
+        CourseSearchDocument.objects.create(
+            course=course, title=course.title, subject=course.subject.title, body='\n'.join(parts)
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contenttypes', '0002_remove_content_type_name'),
+        ('courses', '0023_enrollment_resume_pointer'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CourseSearchDocument',
+            fields=[
+                ('course', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='search_document', serialize=False, to='courses.course')),
+                ('title', models.CharField(max_length=200)),
+                ('subject', models.CharField(blank=True, max_length=100)),
+                ('body', models.TextField(blank=True, help_text='Overview, module titles and text content')),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.RunPython(create_search_index, drop_search_index),
+        migrations.RunPython(backfill_search_documents, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 6.0.9 on 2026-10-17 09:41
+
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def backfill_offered_at(apps, schema_editor):
+    # Outstanding offers start their expiry window now
+    CourseWaitlist = apps.get_model('courses', 'CourseWaitlist')
+    CourseWaitlist.objects.filter(notified_of_opening=True).update(offered_at=timezone.now())
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0024_course_search_document'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='coursewaitlist',
+            name='offered_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.RunPython(backfill_offered_at, migrations.RunPython.noop),
+    ]
@@ -3,13 +3,16 @@ from datetime import timedelta
 from django.contrib.contenttypes.fields import GenericForeignKey
 from django.contrib.contenttypes.models import ContentType
 from django.core.validators import MinValueValidator, MaxValueValidator
-from django.db import models
-from django.template.loader import render_to_string
+from django.db import models, transaction
+from django.db.models import F, Prefetch
 from django.utils import timezone
 from embed_video.fields import EmbedVideoField
 
 from users.models import User
-from .fields import OrderField
+from .bitmap import CompletionBitmap
+from .fields import OrderedModel, OrderField
+from .outline import get_course_outline
+from .rendering import prerender_markdown, render_item
 
 
 class ItemBase(models.Model):
@@ -34,14 +37,28 @@ class ItemBase(models.Model):
         return self._meta.model_name
 
     def render(self):
-        return render_to_string(
-            f'courses/content/{self._meta.model_name}.html',
-            {'item': self}
-        )
+        return render_item(self)
 
 
 class Text(ItemBase):
     content = models.TextField()
+    # Markdown converted on save so lessons are not re-rendered on every view
+    rendered_html = models.TextField(blank=True, editable=False)
+
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get('update_fields')
+        if (update_fields is None or 'content' in update_fields) and self._needs_render():
+            self.rendered_html = prerender_markdown(self.content)
+            if update_fields is not None:
+                kwargs['update_fields'] = {*update_fields, 'rendered_html'}
+        super().save(*args, **kwargs)
+
+    def _needs_render(self):
+        if self._state.adding or not self.rendered_html:
+            # New, or an earlier render failed
+            return True
+        previous = Text.objects.filter(pk=self.pk).values_list('content', flat=True).first()
+        return previous != self.content
 
 
 class File(ItemBase):
@@ -221,6 +238,11 @@ class Course(models.Model):
         default=True,
         help_text='Enable waitlist when capacity reached'
     )
+    enrolled_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        help_text='Seats taken by enrolled and completed students, kept in sync by signal receivers'
+    )
 
     # Course metadata
     difficulty_level = models.CharField(
@@ -280,9 +302,7 @@ class Course(models.Model):
 
     def get_enrollment_count(self):
         """Get current enrollment count including active enrollments"""
-        return self.course_enrollments.filter(
-            status__in=['enrolled', 'completed']
-        ).count()
+        return self.enrolled_count
 
     def get_pending_approvals_count(self):
         """Get number of pending approval requests"""
@@ -375,12 +395,13 @@ class Course(models.Model):
         Called when a course purchase is completed.
         Creates or updates enrollment with paid status and lifetime access.
         """
-        from courses.models import CourseEnrollment
+        from .access_service import EnrollmentService
         
-        enrollment, created = CourseEnrollment.objects.update_or_create(
-            student=user,
-            course=self,
-            defaults={
+        # The payment is already taken, so the seat is granted even if the course filled up meanwhile
+        enrollment = EnrollmentService.reserve_seat(
+            user,
+            self,
+            {
                 'status': 'enrolled',
                 'payment_status': 'paid',
                 'payment_amount': order.total_amount,
@@ -388,7 +409,8 @@ class Course(models.Model):
                 'access_type': 'purchased',  # Lifetime access
                 'order': order,  # Link to order
                 'payment_date': order.completed_at if hasattr(order, 'completed_at') else timezone.now(),
-            }
+            },
+            enforce_capacity=False
         )
         
         # Add to students ManyToMany
@@ -415,42 +437,17 @@ class Course(models.Model):
         if not user or not user.is_authenticated:
             return False
         
-        # Course owner always has access
-        if self.owner == user:
-            return True
-        
-        # Free courses - check for any enrollment
-        if self.pricing_type == 'free':
-            return self.course_enrollments.filter(
-                student=user,
-                status__in=['enrolled', 'completed', 'paused']
-            ).exists()
-        
-        # Check direct enrollment with valid payment
-        has_direct_access = self.course_enrollments.filter(
-            student=user,
-            status__in=['enrolled', 'completed', 'paused'],
-            payment_status__in=['paid', 'free']
-        ).exists()
-        
-        if has_direct_access:
-            return True
-        
-        # Check subscription access for subscription-enabled courses
-        if self.supports_subscription():
-            try:
-                from subscriptions.services import SubscriptionService
-                if SubscriptionService.user_has_active_subscription(user):
-                    return True
-            except ImportError:
-                pass
-        
-        return False
+        from .access_service import CourseAccessService
+        can_access, _ = CourseAccessService.resolve_access_bulk(user, [self])[self.pk]
+        return can_access
     
-    def get_access_options(self, user):
+    def get_access_options(self, user, access=None):
         """
         Get available access options for a user viewing this course.
         Returns dict with available options and current status.
+        
+        access: optional (can_access, reason) already resolved by
+        CourseAccessService.resolve_access_bulk, e.g. for a list of courses.
         """
         options = {
             'can_purchase': False,
@@ -467,26 +464,18 @@ class Course(models.Model):
             return options
         
         # Check current access
-        if self.user_has_access(user):
+        if access is None:
+            from .access_service import CourseAccessService
+            access = CourseAccessService.resolve_access_bulk(user, [self])[self.pk]
+        has_access, reason = access
+        
+        if has_access:
             options['has_access'] = True
-            
-            # Determine access type
-            enrollment = self.course_enrollments.filter(student=user).first()
-            if enrollment:
-                if enrollment.payment_status == 'paid':
-                    options['access_type'] = 'purchased'
-                elif enrollment.payment_status == 'free':
-                    options['access_type'] = 'free'
-            
-            # Check if access is via subscription
-            if not options['access_type'] and self.supports_subscription():
-                try:
-                    from subscriptions.services import SubscriptionService
-                    if SubscriptionService.user_has_active_subscription(user):
-                        options['access_type'] = 'subscription'
-                except ImportError:
-                    pass
-            
+            options['access_type'] = {
+                'purchased': 'purchased',
+                'free': 'free',
+                'subscription_active': 'subscription',
+            }.get(reason)
             return options
         
         # User doesn't have access - show available options
@@ -504,7 +493,7 @@ class Course(models.Model):
         super().save(*args, **kwargs)
 
 
-class Module(models.Model):
+class Module(OrderedModel):
     course = models.ForeignKey(Course, on_delete=models.CASCADE, related_name='modules')
     title = models.CharField(max_length=200)
     description = models.TextField(blank=True)
@@ -522,23 +511,42 @@ class Module(models.Model):
 
     def get_previous_in_order(self):
         """Get the previous module in the course by order"""
-        return self.course.modules.filter(order__lt=self.order).order_by('-order').first()
+        module = get_course_outline(self.course_id).get_previous_module(self.pk)
+        return Module.objects.filter(pk=module['id']).first() if module else None
 
     def get_next_in_order(self):
         """Get the next module in the course by order"""
-        return self.course.modules.filter(order__gt=self.order).order_by('order').first()
+        module = get_course_outline(self.course_id).get_next_module(self.pk)
+        return Module.objects.filter(pk=module['id']).first() if module else None
 
     def get_first_content(self):
         """Get the first content in this module"""
-        return self.contents.order_by('order').first()
+        content = get_course_outline(self.course_id).get_first_content(self.pk)
+        return Content.objects.filter(pk=content['id']).first() if content else None
 
 
 # Content model - can have multiple content items of different types
-class Content(models.Model):
+class ContentQuerySet(models.QuerySet):
+    def with_items(self):
+        """
+        Prefetch each content's ContentItems together with their Text/Video/Image/File
+        items. Items are loaded with one query per item type instead of one per item.
+        """
+        return self.prefetch_related(
+            Prefetch(
+                'items',
+                queryset=ContentItem.objects.select_related('content_type').prefetch_related('item')
+            )
+        )
+
+
+class Content(OrderedModel):
     module = models.ForeignKey(Module, on_delete=models.CASCADE, related_name='contents')
     title = models.CharField(max_length=250, blank=True)
     order = OrderField(blank=True, for_fields=['module'])
 
+    objects = ContentQuerySet.as_manager()
+
     class Meta:
         ordering = ['order']
         indexes = [
@@ -549,21 +557,28 @@ class Content(models.Model):
     def __str__(self):
         return self.title
 
+    def _get_first_content_item(self):
+        # Use the items loaded by Content.objects.with_items() when available
+        if 'items' in getattr(self, '_prefetched_objects_cache', {}):
+            items = self.items.all()
+            return items[0] if items else None
+        return self.items.select_related('content_type').first()
+
     def get_first_item(self):
         """Get the first ContentItem's actual item (Text/Video/Image/File)"""
-        first_content_item = self.items.first()
+        first_content_item = self._get_first_content_item()
         return first_content_item.item if first_content_item else None
 
     def get_primary_content_type(self):
         """Get the content type model name of the first item for icon display"""
-        first_content_item = self.items.first()
+        first_content_item = self._get_first_content_item()
         if first_content_item:
             return first_content_item.content_type.model
         return None
 
 
 
-class ContentItem(models.Model):
+class ContentItem(OrderedModel):
     """Each Content can have multiple ContentItems of different types"""
     content = models.ForeignKey(Content, on_delete=models.CASCADE, related_name='items')
     content_type = models.ForeignKey(ContentType, on_delete=models.CASCADE, limit_choices_to={
@@ -587,6 +602,7 @@ class CourseWaitlist(models.Model):
     student = models.ForeignKey(User, on_delete=models.CASCADE, related_name='waitlist_entries')
     joined_waitlist = models.DateTimeField(auto_now_add=True)
     notified_of_opening = models.BooleanField(default=False)
+    offered_at = models.DateTimeField(null=True, blank=True)  # Set with notified_of_opening
     priority = models.PositiveIntegerField(default=1)  # Lower numbers = higher priority
 
     class Meta:
@@ -603,10 +619,16 @@ class CourseWaitlist(models.Model):
 
     def get_position(self):
         """Get position in waitlist (1-indexed)"""
-        return self.course.waitlist_entries.filter(
-            models.Q(priority__lt=self.priority) |
-            (models.Q(priority=self.priority) & models.Q(joined_waitlist__lt=self.joined_waitlist))
-        ).count() + 1
+        from .waitlist_service import WaitlistService
+        return WaitlistService.get_position(self)
+
+    @property
+    def offer_expires_at(self):
+        """When an unanswered seat offer lapses and passes to the next student"""
+        from .waitlist_service import OFFER_EXPIRY
+        if not self.notified_of_opening or self.offered_at is None:
+            return None
+        return self.offered_at + OFFER_EXPIRY
 
 
 class CourseEnrollment(models.Model):
@@ -621,6 +643,9 @@ class CourseEnrollment(models.Model):
         ('rejected', 'Rejected')  # New status for approval workflow
     ]
 
+    # Statuses that occupy a seat of a capacity-limited course
+    SEAT_STATUSES = ('enrolled', 'completed')
+
     PAYMENT_STATUS_CHOICES = [
         ('pending', 'Payment Pending'),
         ('paid', 'Paid'),
@@ -708,6 +733,20 @@ class CourseEnrollment(models.Model):
         help_text='Engagement score from 0.0 to 1.0'
     )
 
+    # Denormalized progress counters (see courses.progress_service)
+    completed_contents_count = models.PositiveIntegerField(default=0)
+    total_contents_count = models.PositiveIntegerField(default=0)
+
+    # Completion bitmap keyed by position in the course outline (see courses.bitmap);
+    # the signature records which outline order the bits refer to
+    completion_bitmap = models.BinaryField(default=b'', blank=True)
+    completion_bitmap_signature = models.CharField(max_length=32, blank=True, default='')
+
+    # Resume pointer for "continue learning" links: the last viewed content,
+    # advanced to the next incomplete content on completion
+    current_module = models.ForeignKey(Module, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    current_content = models.ForeignKey(Content, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+
     class Meta:
         constraints = [
             models.UniqueConstraint(fields=['student', 'course'], name='unique_enrollment'),
@@ -761,34 +800,127 @@ class CourseEnrollment(models.Model):
             self.status = 'pending'
             self.approval_requested_at = timezone.now()
 
+        # Seed the content total once; Content signals keep it current afterwards
+        if not self.pk and not self.total_contents_count:
+            self.total_contents_count = Content.objects.filter(module__course_id=self.course_id).count()
+
         super().save(*args, **kwargs)
 
     # Add helper methods used by views/tests for progress tracking
-    def get_current_module(self):
+    def get_current_module(self, outline=None):
         """Return the next module the student should work on.
 
         Strategy:
-        - Iterate course modules in order.
+        - Walk the course outline in order.
         - If ModuleProgress exists and is not completed -> return that module.
         - If no ModuleProgress exists for a module -> return that module (first not started).
         - If all modules completed -> return None.
         """
-        for module in self.course.modules.order_by('order'):
-            mp = ModuleProgress.objects.filter(enrollment=self, module=module).first()
-            if not mp or not mp.is_completed:
-                return module
-        return None
+        outline = outline or get_course_outline(self.course_id)
+        completed = set(self.module_progress.filter(is_completed=True).values_list('module_id', flat=True))
+        module = next((module for module in outline.modules if module['id'] not in completed), None)
+        return Module.objects.filter(pk=module['id']).first() if module else None
 
     def calculate_progress(self):
         """Compute progress percentage across all contents for this enrollment.
 
-        Returns a float (0.0 - 100.0). Does not persist the value.
+        Returns a float (0.0 - 100.0) derived from the denormalized counters,
+        so no query is issued. Does not persist the value.
         """
-        total_contents = Content.objects.filter(module__course=self.course).count()
-        if total_contents == 0:
+        if not self.total_contents_count:
             return 0.0
-        completed = ContentProgress.objects.filter(enrollment=self, is_completed=True).count()
-        return round((completed / total_contents) * 100, 2)
+        completed = min(self.completed_contents_count, self.total_contents_count)
+        return round((completed / self.total_contents_count) * 100, 2)
+
+    def increment_completed_contents(self):
+        """Atomically bump the completed counter and persist the new progress."""
+        CourseEnrollment.objects.filter(pk=self.pk).update(
+            completed_contents_count=F('completed_contents_count') + 1
+        )
+        self.refresh_from_db(fields=['completed_contents_count', 'total_contents_count'])
+        self.update_progress()
+
+    def _build_completion_bitmap(self, outline):
+        positions = outline.positions
+        completed_ids = ContentProgress.objects.filter(
+            enrollment=self, is_completed=True
+        ).values_list('content_id', flat=True)
+        return CompletionBitmap.from_positions(
+            positions[content_id] for content_id in completed_ids if content_id in positions
+        )
+
+    def _store_completion_bitmap(self, bitmap, outline):
+        self.completion_bitmap = bitmap.to_bytes()
+        self.completion_bitmap_signature = outline.signature
+        CourseEnrollment.objects.filter(pk=self.pk).update(
+            completion_bitmap=self.completion_bitmap,
+            completion_bitmap_signature=self.completion_bitmap_signature
+        )
+
+    def get_completion_bitmap(self, outline=None):
+        """Return the completion bitmap for the current course outline.
+
+        The stored bitmap is used as-is while the outline order is unchanged;
+        otherwise it is rebuilt from ContentProgress rows and persisted.
+        """
+        outline = outline or get_course_outline(self.course_id)
+        if self.completion_bitmap_signature == outline.signature:
+            return CompletionBitmap(self.completion_bitmap)
+
+        with transaction.atomic():
+            CourseEnrollment.objects.select_for_update().filter(pk=self.pk).exists()
+            bitmap = self._build_completion_bitmap(outline)
+            self._store_completion_bitmap(bitmap, outline)
+        return bitmap
+
+    def set_content_completed_bit(self, content_id):
+        """Set the bit of a newly completed content, under a row lock."""
+        outline = get_course_outline(self.course_id)
+        position = outline.positions.get(content_id)
+        if position is None:
+            return
+
+        with transaction.atomic(savepoint=False):
+            stored = CourseEnrollment.objects.select_for_update().filter(pk=self.pk).values_list(
+                'completion_bitmap', 'completion_bitmap_signature'
+            ).first()
+            if stored is None:
+                return
+            data, signature = stored
+            if signature == outline.signature:
+                bitmap = CompletionBitmap(data)
+                bitmap.set(position)
+            else:
+                bitmap = self._build_completion_bitmap(outline)
+            self._store_completion_bitmap(bitmap, outline)
+
+    def is_content_completed(self, content_id, outline=None):
+        outline = outline or get_course_outline(self.course_id)
+        position = outline.positions.get(content_id)
+        return position is not None and self.get_completion_bitmap(outline).is_set(position)
+
+    def get_next_incomplete_content(self, outline=None):
+        """Return the first outline content dict not yet completed, or None."""
+        outline = outline or get_course_outline(self.course_id)
+        contents = outline.contents
+        position = self.get_completion_bitmap(outline).first_unset(len(contents))
+        return contents[position] if position is not None else None
+
+    def set_resume_point(self, content_id, module_id):
+        """Persist the resume pointer; nothing is written when it is unchanged."""
+        if (self.current_content_id, self.current_module_id) == (content_id, module_id):
+            return
+        self.current_content_id = content_id
+        self.current_module_id = module_id
+        CourseEnrollment.objects.filter(pk=self.pk).update(current_content_id=content_id, current_module_id=module_id)
+
+    def advance_resume_point(self, outline=None):
+        """Point the resume pointer at the next incomplete content (cleared when all are done)."""
+        content = self.get_next_incomplete_content(outline)
+        if content:
+            self.set_resume_point(content['id'], content['module_id'])
+        else:
+            self.set_resume_point(None, None)
 
     def update_progress(self):
         """Recalculate and persist progress_percentage and update enrollment status if complete."""
@@ -858,18 +990,38 @@ class ContentProgress(models.Model):
         return f"{self.enrollment.student.username} - {content_title} ({'Completed' if self.is_completed else 'In Progress'})"
 
     def mark_completed(self):
-        if not self.is_completed:
-            self.is_completed = True
-            self.completed_at = timezone.now()
-            self.save()
+        """Mark content as completed and propagate to module and course progress.
 
-            # get or create module progress
+        Module and course counters are incremented with F() expressions and the
+        enrollment's completion bitmap gets one bit set, so the number of queries
+        does not depend on the size of the course. Returns the
+        ModuleProgress for the content's module, or None if already completed.
+        """
+        if self.is_completed:
+            return None
+
+        with transaction.atomic():
+            # Must exist before the flip below: a freshly created ModuleProgress
+            # seeds its counters from the rows already completed
             module_progress, created = ModuleProgress.objects.get_or_create(enrollment=self.enrollment,
-                                                                            module=self.content.module)
+                                                                            module_id=self.content.module_id)
 
-            # Check if module is now completed
-            if module_progress.calculate_completion():
-                module_progress.mark_completed()
+            now = timezone.now()
+            updated = ContentProgress.objects.filter(pk=self.pk, is_completed=False).update(
+                is_completed=True, completed_at=now, last_viewed=now
+            )
+            self.is_completed = True
+            self.completed_at = now
+            if not updated:
+                # Completed concurrently by another request; counters already bumped
+                return module_progress
+
+            module_progress.increment_completed_contents()
+            self.enrollment.increment_completed_contents()
+            self.enrollment.set_content_completed_bit(self.content_id)
+            self.enrollment.advance_resume_point()
+
+        return module_progress
 
 
 class ModuleProgress(models.Model):
@@ -879,6 +1031,10 @@ class ModuleProgress(models.Model):
     completed_at = models.DateTimeField(null=True, blank=True)
     is_completed = models.BooleanField(default=False)
 
+    # Denormalized progress counters (see courses.progress_service)
+    completed_contents_count = models.PositiveIntegerField(default=0)
+    total_contents_count = models.PositiveIntegerField(default=0)
+
     class Meta:
         constraints = [
             models.UniqueConstraint(fields=['enrollment', 'module'], name='unique_module_progress')
@@ -893,25 +1049,35 @@ class ModuleProgress(models.Model):
     def __str__(self):
         return f"{self.enrollment.student.username} - {self.module.title} ({'Completed' if self.is_completed else 'In Progress'})"
 
-    def calculate_completion(self):
-        total_contents = self.module.contents.count()
+    def save(self, *args, **kwargs):
+        # Seed counters on creation; afterwards they are maintained incrementally
+        if not self.pk:
+            self.total_contents_count = Content.objects.filter(module_id=self.module_id).count()
+            self.completed_contents_count = ContentProgress.objects.filter(
+                enrollment_id=self.enrollment_id, content__module_id=self.module_id, is_completed=True
+            ).count()
+        super().save(*args, **kwargs)
 
-        if total_contents == 0:
+    def calculate_completion(self):
+        if self.total_contents_count == 0:
             return False
 
-        completed_contents = ContentProgress.objects.filter(enrollment=self.enrollment, content__module=self.module,
-                                                            is_completed=True).count()
+        return self.completed_contents_count >= self.total_contents_count
 
-        return total_contents == completed_contents
+    def increment_completed_contents(self):
+        """Atomically bump the completed counter and complete the module when it is full."""
+        ModuleProgress.objects.filter(pk=self.pk).update(
+            completed_contents_count=F('completed_contents_count') + 1
+        )
+        self.refresh_from_db(fields=['completed_contents_count', 'total_contents_count'])
+        if self.calculate_completion():
+            self.mark_completed()
 
     def mark_completed(self):
         if not self.is_completed:
             self.is_completed = True
             self.completed_at = timezone.now()
-            self.save()
-
-            # Update overall courseprogress
-            self.enrollment.update_progress()
+            self.save(update_fields=['is_completed', 'completed_at'])
 
 
 class LearningSession(models.Model):
@@ -920,7 +1086,8 @@ class LearningSession(models.Model):
     content = models.ForeignKey(Content, on_delete=models.CASCADE, related_name='learning_sessions', null=True,
                                 blank=True)
 
-    started_at = models.DateTimeField(auto_now_add=True)
+    # Not auto_now_add: buffered sessions are written later with their real start
+    started_at = models.DateTimeField(default=timezone.now)
     ended_at = models.DateTimeField(null=True, blank=True)
 
     class Meta:
@@ -939,3 +1106,93 @@ class LearningSession(models.Model):
             self.ended_at = timezone.now()
             self.duration = self.ended_at - self.started_at
             self.save()
+
+            from .learning_time_service import LearningTimeService
+            LearningTimeService.record([self])
+
+
+class DailyLearningTime(models.Model):
+    """
+    Learning time of an enrollment per day.
+
+    Updated when sessions end (see courses.learning_time_service) and rebuilt
+    from LearningSession rows by the ``backfill_learning_time`` command.
+    """
+    enrollment = models.ForeignKey(CourseEnrollment, on_delete=models.CASCADE, related_name='daily_learning_time')
+    student = models.ForeignKey(User, on_delete=models.CASCADE, related_name='daily_learning_time')
+    date = models.DateField()
+    seconds = models.PositiveIntegerField(default=0)
+    sessions = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        ordering = ['-date']
+        constraints = [
+            models.UniqueConstraint(fields=['enrollment', 'date'], name='unique_enrollment_learning_day')
+        ]
+        indexes = [
+            models.Index(fields=['student', '-date']),
+        ]
+
+    def __str__(self):
+        return f"{self.student.username} learned {self.seconds}s on {self.date}"
+
+
+class CourseStatsRollup(models.Model):
+    """
+    Materialized analytics for a course.
+
+    Kept up to date incrementally by signal receivers (see courses.stats_service)
+    and rebuilt from raw rows by the ``refresh_course_stats`` command.
+    """
+    course = models.OneToOneField(Course, on_delete=models.CASCADE, primary_key=True, related_name='stats_rollup')
+
+    # Enrollments
+    total_students = models.PositiveIntegerField(default=0)
+    active_students = models.PositiveIntegerField(default=0)
+    completed_students = models.PositiveIntegerField(default=0)
+    paused_students = models.PositiveIntegerField(default=0)
+    progress_sum = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    # Structure and activity
+    total_modules = models.PositiveIntegerField(default=0)
+    total_contents = models.PositiveIntegerField(default=0)
+    total_sessions = models.PositiveIntegerField(default=0)
+    module_completions = models.JSONField(default=dict, blank=True,
+                                          help_text='Completed ModuleProgress count keyed by module id')
+
+    # Revenue (completed orders only)
+    total_orders = models.PositiveIntegerField(default=0)
+    total_revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Stats for {self.course.title}"
+
+    @property
+    def avg_progress(self):
+        if not self.total_students:
+            return 0
+        return self.progress_sum / self.total_students
+
+    def get_module_completed_count(self, module_id):
+        return self.module_completions.get(str(module_id), 0)
+
+
+class CourseSearchDocument(models.Model):
+    """
+    Denormalized search text of a course.
+
+    Kept up to date by signal receivers (see courses.search_service) and
+    rebuilt by the ``rebuild_search_index`` command. The full-text index over
+    these columns is database specific: a generated tsvector column with a
+    GIN index on PostgreSQL, an external-content FTS5 table on SQLite.
+    """
+    course = models.OneToOneField(Course, on_delete=models.CASCADE, primary_key=True, related_name='search_document')
+    title = models.CharField(max_length=200)
+    subject = models.CharField(max_length=100, blank=True)
+    body = models.TextField(blank=True, help_text='Overview, module titles and text content')
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Search document for {self.title}"
@@ -0,0 +1,38 @@
+"""
+Bulk Reordering
+Applies a {pk: position} mapping (as posted by the drag-and-drop reorder
+views and API actions) with a single UPDATE ... CASE statement.
+"""
+
+from django.db import models, transaction
+from django.db.models import Case, Value, When
+
+
+def apply_order(queryset, orders, field_name='order'):
+    """
+    Set the positions of rows in ``queryset``.
+
+    Rows outside ``queryset`` (e.g. not owned by the user) are left alone.
+
+    Args:
+        queryset: Rows that may be reordered
+        orders: Mapping of primary key to position; keys and values may be strings
+        field_name: Name of the OrderField
+
+    Returns:
+        list: Primary keys of the reordered rows
+    """
+    orders = {int(pk): int(position) for pk, position in orders.items()}
+    if not orders:
+        return []
+
+    with transaction.atomic():
+        pks = list(queryset.filter(pk__in=orders).values_list('pk', flat=True))
+        if pks:
+            queryset.model._default_manager.filter(pk__in=pks).update(**{
+                field_name: Case(
+                    *[When(pk=pk, then=Value(orders[pk])) for pk in pks],
+                    output_field=models.PositiveIntegerField()
+                )
+            })
+    return pks
@@ -0,0 +1,171 @@
+"""
+Course Outline Cache
+Caches the module/content structure of a course, keyed by a structure version
+that is bumped whenever modules, contents or content items change.
+"""
+
+import hashlib
+import time
+from functools import cached_property
+
+from django.core.cache import cache
+
+# Outlines are invalidated by version bumps, so they can live for a long time
+OUTLINE_CACHE_TIMEOUT = 60 * 60 * 24
+
+
+def _version_key(course_id):
+    return f"course_structure_version_{course_id}"
+
+
+def _new_version():
+    # Time based so a version evicted from the cache never reuses an old namespace
+    return int(time.time() * 1000)
+
+
+def get_structure_version(course_id):
+    """Get the current structure version of a course"""
+    key = _version_key(course_id)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, _new_version(), timeout=None)
+        version = cache.get(key)
+    return version
+
+
+def bump_structure_version(course_id):
+    """Invalidate every cached outline of a course"""
+    try:
+        cache.incr(_version_key(course_id))
+    except ValueError:
+        cache.set(_version_key(course_id), _new_version(), timeout=None)
+
+
+def bump_structure_versions(course_ids):
+    """Invalidate the outlines of several courses, e.g. after a bulk reorder"""
+    for course_id in set(course_ids):
+        bump_structure_version(course_id)
+
+
+class CourseOutline:
+    """
+    Read-only snapshot of a course structure.
+
+    Modules and contents are plain dicts so they can be cached cheaply and used
+    directly in templates (``module.pk``, ``content.title``, ``content.content_type``).
+    """
+
+    def __init__(self, course_id, version, modules):
+        self.course_id = course_id
+        self.version = version
+        self.modules = modules
+
+    @cached_property
+    def contents(self):
+        """All contents of the course in display order"""
+        return [content for module in self.modules for content in module['contents']]
+
+    @cached_property
+    def content_ids(self):
+        return [content['id'] for content in self.contents]
+
+    @cached_property
+    def positions(self):
+        """Map of content id to its position in the outline (used as bitmap index)"""
+        return {content_id: position for position, content_id in enumerate(self.content_ids)}
+
+    @cached_property
+    def signature(self):
+        """Fingerprint of the content order; changes whenever bitmap positions shift"""
+        return hashlib.md5(','.join(map(str, self.content_ids)).encode()).hexdigest()
+
+    @cached_property
+    def module_positions(self):
+        """Map of module id to its index in ``modules``"""
+        return {module['id']: position for position, module in enumerate(self.modules)}
+
+    def get_module(self, module_id):
+        position = self.module_positions.get(module_id)
+        return self.modules[position] if position is not None else None
+
+    def get_previous_module(self, module_id):
+        position = self.module_positions.get(module_id)
+        return self.modules[position - 1] if position else None
+
+    def get_next_module(self, module_id):
+        position = self.module_positions.get(module_id)
+        if position is None or position + 1 >= len(self.modules):
+            return None
+        return self.modules[position + 1]
+
+    def get_content(self, content_id):
+        position = self.positions.get(content_id)
+        return self.contents[position] if position is not None else None
+
+    def get_first_content(self, module_id):
+        module = self.get_module(module_id)
+        return module['contents'][0] if module and module['contents'] else None
+
+    def get_previous_content(self, content_id):
+        """Content before ``content_id`` in course order, crossing module boundaries"""
+        position = self.positions.get(content_id)
+        return self.contents[position - 1] if position else None
+
+    def get_next_content(self, content_id):
+        """Content after ``content_id`` in course order, crossing module boundaries"""
+        position = self.positions.get(content_id)
+        if position is None or position + 1 >= len(self.contents):
+            return None
+        return self.contents[position + 1]
+
+    @classmethod
+    def build(cls, course_id, version=None):
+        """Load the outline from the database (three queries)"""
+        from .models import Module, Content, ContentItem
+
+        primary_types = {}
+        item_types = ContentItem.objects.filter(
+            content__module__course_id=course_id
+        ).order_by('content_id', 'order').values_list('content_id', 'content_type__model')
+        for content_id, model_name in item_types:
+            primary_types.setdefault(content_id, model_name)
+
+        contents_by_module = {}
+        contents = Content.objects.filter(
+            module__course_id=course_id
+        ).order_by('order', 'id').values('id', 'module_id', 'title', 'order')
+        for content in contents:
+            content['pk'] = content['id']
+            content['content_type'] = primary_types.get(content['id'])
+            contents_by_module.setdefault(content['module_id'], []).append(content)
+
+        modules = []
+        for module in Module.objects.filter(course_id=course_id).order_by('order', 'id').values(
+                'id', 'title', 'description', 'order'):
+            module['pk'] = module['id']
+            module['contents'] = contents_by_module.get(module['id'], [])
+            modules.append(module)
+
+        return cls(course_id, version, modules)
+
+
+def get_course_outline(course):
+    """
+    Get the cached outline of a course (Course instance or id).
+
+    Usage:
+        outline = get_course_outline(course)
+        for module in outline.modules:
+            for content in module['contents']:
+                ...
+    """
+    course_id = getattr(course, 'pk', course)
+    version = get_structure_version(course_id)
+    cache_key = f"course_outline_{course_id}_v{version}"
+
+    modules = cache.get(cache_key)
+    if modules is None:
+        outline = CourseOutline.build(course_id, version)
+        cache.set(cache_key, outline.modules, timeout=OUTLINE_CACHE_TIMEOUT)
+        return outline
+    return CourseOutline(course_id, version, modules)
@@ -0,0 +1,136 @@
+"""
+Progress Counter Services
+Maintains the denormalized content counters on CourseEnrollment and ModuleProgress
+"""
+
+from django.db import transaction
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from .models import Content, ContentProgress, CourseEnrollment, ModuleProgress
+
+
+def count_subquery(queryset, group_field):
+    """Wrap a filtered queryset as a scalar COUNT subquery grouped by group_field"""
+    return Coalesce(
+        Subquery(
+            queryset.order_by().values(group_field).annotate(total=Count('pk')).values('total')[:1]
+        ),
+        0
+    )
+
+
+class ProgressService:
+    """Keep per-enrollment progress counters in sync with course structure"""
+
+    @classmethod
+    def content_added(cls, content):
+        """A new content was added to a module: grow the totals of everyone enrolled"""
+        cls.contents_added(content.module_id, 1)
+
+    @staticmethod
+    def contents_added(module_id, count):
+        """``count`` contents were added to a module at once (e.g. by bulk_create)"""
+        ModuleProgress.objects.filter(module_id=module_id).update(
+            total_contents_count=F('total_contents_count') + count
+        )
+        CourseEnrollment.objects.filter(course__modules=module_id).update(
+            total_contents_count=F('total_contents_count') + count
+        )
+
+    @staticmethod
+    def content_removed(content, module_id=None, course_id=None):
+        """
+        A content is leaving a module (deleted or moved away).
+
+        Must run before its ContentProgress rows are removed so completed
+        counters can be decremented for the students who had finished it.
+        """
+        module_id = module_id or content.module_id
+        completed = ContentProgress.objects.filter(content=content, is_completed=True)
+
+        ModuleProgress.objects.filter(
+            module_id=module_id,
+            enrollment__in=completed.values('enrollment'),
+            completed_contents_count__gt=0
+        ).update(completed_contents_count=F('completed_contents_count') - 1)
+        ModuleProgress.objects.filter(module_id=module_id, total_contents_count__gt=0).update(
+            total_contents_count=F('total_contents_count') - 1
+        )
+
+        if course_id is None:
+            enrollments = CourseEnrollment.objects.filter(course__modules=module_id)
+        else:
+            enrollments = CourseEnrollment.objects.filter(course_id=course_id)
+        enrollments.filter(
+            pk__in=completed.values('enrollment'),
+            completed_contents_count__gt=0
+        ).update(completed_contents_count=F('completed_contents_count') - 1)
+        enrollments.filter(total_contents_count__gt=0).update(
+            total_contents_count=F('total_contents_count') - 1
+        )
+
+    @classmethod
+    def content_moved(cls, content, old_module):
+        """A content changed module: shift its contribution between the two modules"""
+        cls.content_removed(content, module_id=old_module.pk, course_id=old_module.course_id)
+        cls.content_added(content)
+
+        # Completions carry over to the new module for students enrolled there
+        completed = ContentProgress.objects.filter(content=content, is_completed=True)
+        ModuleProgress.objects.filter(
+            module_id=content.module_id,
+            enrollment__in=completed.values('enrollment')
+        ).update(completed_contents_count=F('completed_contents_count') + 1)
+        CourseEnrollment.objects.filter(
+            course__modules=content.module_id,
+            pk__in=completed.values('enrollment')
+        ).update(completed_contents_count=F('completed_contents_count') + 1)
+
+    @staticmethod
+    @transaction.atomic
+    def reconcile(course=None):
+        """
+        Recompute all counters from the underlying rows.
+
+        Args:
+            course: Optional Course to limit the reconciliation to
+
+        Returns:
+            tuple: (enrollments_updated, module_progress_updated)
+        """
+        enrollments = CourseEnrollment.objects.all()
+        module_progress = ModuleProgress.objects.all()
+        if course is not None:
+            enrollments = enrollments.filter(course=course)
+            module_progress = module_progress.filter(module__course=course)
+
+        enrollments_updated = enrollments.update(
+            # Cleared signatures make bitmaps rebuild from ContentProgress on next read
+            completion_bitmap_signature='',
+            total_contents_count=count_subquery(
+                Content.objects.filter(module__course=OuterRef('course')), 'module__course'
+            ),
+            completed_contents_count=count_subquery(
+                ContentProgress.objects.filter(
+                    enrollment=OuterRef('pk'),
+                    content__module__course=OuterRef('course'),
+                    is_completed=True
+                ),
+                'enrollment'
+            ),
+        )
+        module_progress_updated = module_progress.update(
+            total_contents_count=count_subquery(
+                Content.objects.filter(module=OuterRef('module')), 'module'
+            ),
+            completed_contents_count=count_subquery(
+                ContentProgress.objects.filter(
+                    enrollment=OuterRef('enrollment'),
+                    content__module=OuterRef('module'),
+                    is_completed=True
+                ),
+                'enrollment'
+            ),
+        )
+        return enrollments_updated, module_progress_updated
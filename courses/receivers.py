@@ -1,7 +1,22 @@
+from django.contrib.contenttypes.models import ContentType
+from django.db import transaction
+from django.db.models.signals import pre_save, post_save, pre_delete, post_delete
 from django.dispatch import receiver
 from payments.signals import payment_completed
 
-from .models import Course
+from payments.models import Order
+
+from .access_service import EnrollmentService
+from .catalog import bump_catalog_version, invalidate_course_cards
+from .models import (
+    Course, Content, ContentItem, CourseEnrollment, CourseSearchDocument, CourseWaitlist, LearningSession, Module,
+    ModuleProgress, Subject, Text
+)
+from .outline import bump_structure_version
+from .progress_service import ProgressService
+from .search_service import CourseSearchService
+from .stats_service import CourseStatsService
+from .waitlist_service import WaitlistService
 
 
 @receiver(payment_completed)
@@ -15,3 +30,391 @@ def grant_course_access_on_payment(sender, order, user, **kwargs):
 
     course = order.item
     course.on_purchase_completed(user, order)
+
+
+@receiver(pre_save, sender=Content)
+def remember_previous_module(sender, instance, update_fields=None, **kwargs):
+    """
+    Remember which module an existing content belonged to, so a move can be
+    reflected in the progress counters after save.
+    """
+    instance._previous_module_id = None
+    if instance.pk and (update_fields is None or 'module' in update_fields):
+        instance._previous_module_id = Content.objects.filter(
+            pk=instance.pk
+        ).values_list('module_id', flat=True).first()
+
+
+@receiver(post_save, sender=Content)
+def update_progress_counters_on_content_save(sender, instance, created, raw=False, **kwargs):
+    """
+    Keep enrollment/module content totals in sync when content is added or moved.
+    """
+    if raw:
+        return
+
+    if created:
+        ProgressService.content_added(instance)
+        return
+
+    previous_module_id = getattr(instance, '_previous_module_id', None)
+    if previous_module_id and previous_module_id != instance.module_id:
+        old_module = Module.objects.filter(pk=previous_module_id).first()
+        if old_module:
+            ProgressService.content_moved(instance, old_module)
+
+
+@receiver(post_save, sender=Content)
+def update_resume_pointers_on_content_move(sender, instance, raw=False, **kwargs):
+    """
+    Keep resume pointers at a moved content valid; pointers into another course are cleared.
+    """
+    previous_module_id = getattr(instance, '_previous_module_id', None)
+    if raw or not previous_module_id or previous_module_id == instance.module_id:
+        return
+    course_id = Module.objects.filter(pk=instance.module_id).values_list('course_id', flat=True).first()
+    pointers = CourseEnrollment.objects.filter(current_content=instance)
+    pointers.filter(course_id=course_id).update(current_module_id=instance.module_id)
+    pointers.exclude(course_id=course_id).update(current_module=None, current_content=None)
+
+
+@receiver(pre_delete, sender=Content)
+def update_progress_counters_on_content_delete(sender, instance, **kwargs):
+    """
+    Decrement counters before the content's progress rows are cascaded away.
+    """
+    ProgressService.content_removed(instance)
+
+
+@receiver(post_save, sender=Module)
+@receiver(post_delete, sender=Module)
+def invalidate_outline_on_module_change(sender, instance, raw=False, **kwargs):
+    """
+    Bump the course structure version so cached outlines are rebuilt.
+    """
+    if not raw:
+        bump_structure_version(instance.course_id)
+
+
+@receiver(post_save, sender=Content)
+@receiver(post_delete, sender=Content)
+def invalidate_outline_on_content_change(sender, instance, raw=False, **kwargs):
+    """
+    Bump the structure version of the course owning the content.
+    """
+    if raw:
+        return
+    course_id = Module.objects.filter(pk=instance.module_id).values_list('course_id', flat=True).first()
+    if course_id:
+        bump_structure_version(course_id)
+    previous_module_id = getattr(instance, '_previous_module_id', None)
+    if previous_module_id and previous_module_id != instance.module_id:
+        # Moved across courses: the source course changed as well
+        previous_course_id = Module.objects.filter(
+            pk=previous_module_id
+        ).values_list('course_id', flat=True).first()
+        if previous_course_id and previous_course_id != course_id:
+            bump_structure_version(previous_course_id)
+
+
+@receiver(post_save, sender=ContentItem)
+@receiver(post_delete, sender=ContentItem)
+def invalidate_outline_on_content_item_change(sender, instance, raw=False, **kwargs):
+    """
+    Item changes can alter a content's primary type shown in the outline.
+    """
+    if raw:
+        return
+    course_id = Content.objects.filter(
+        pk=instance.content_id
+    ).values_list('module__course_id', flat=True).first()
+    if course_id:
+        bump_structure_version(course_id)
+
+
+@receiver(pre_save, sender=Course)
+def remember_previous_catalog_state(sender, instance, update_fields=None, **kwargs):
+    """
+    Remember status and subject before save; only changes to them alter the
+    catalog listings.
+    """
+    instance._previous_catalog_state = None
+    if instance.pk and (update_fields is None or {'status', 'subject'} & set(update_fields)):
+        instance._previous_catalog_state = Course.objects.filter(
+            pk=instance.pk
+        ).values_list('status', 'subject_id').first()
+
+
+@receiver(post_save, sender=Course)
+def invalidate_catalog_on_course_save(sender, instance, created, raw=False, update_fields=None, **kwargs):
+    """
+    Drop the course card, and the listings when the course enters, leaves or
+    moves within the published catalog.
+    """
+    if raw:
+        return
+    invalidate_course_cards([instance.pk])
+    if created:
+        listed = instance.status == 'published'
+    else:
+        previous = getattr(instance, '_previous_catalog_state', None)
+        listed = previous is not None and previous != (instance.status, instance.subject_id) and (
+            'published' in (previous[0], instance.status)
+        )
+    if listed:
+        bump_catalog_version()
+
+
+@receiver(post_delete, sender=Course)
+def invalidate_catalog_on_course_delete(sender, instance, **kwargs):
+    invalidate_course_cards([instance.pk])
+    if instance.status == 'published':
+        bump_catalog_version()
+
+
+@receiver(post_save, sender=Subject)
+@receiver(post_delete, sender=Subject)
+def invalidate_catalog_on_subject_change(sender, instance, raw=False, **kwargs):
+    """
+    Subjects appear in the sidebar and on the cards of their courses.
+    """
+    if raw:
+        return
+    bump_catalog_version()
+    invalidate_course_cards(Course.objects.filter(subject_id=instance.pk).values_list('pk', flat=True))
+
+
+@receiver(post_save, sender=Module)
+@receiver(post_delete, sender=Module)
+def invalidate_course_card_on_module_change(sender, instance, created=True, raw=False, **kwargs):
+    """
+    Cards show the module count, so only creates and deletes matter.
+    """
+    if created and not raw:
+        invalidate_course_cards([instance.course_id])
+
+
+@receiver(pre_save, sender=CourseEnrollment)
+def remember_previous_enrollment_state(sender, instance, update_fields=None, **kwargs):
+    """
+    Remember status and progress before save so the stats rollup can apply deltas.
+    """
+    instance._previous_stats_state = None
+    if instance.pk and (update_fields is None or {'status', 'progress_percentage'} & set(update_fields)):
+        instance._previous_stats_state = CourseEnrollment.objects.filter(
+            pk=instance.pk
+        ).values_list('status', 'progress_percentage').first()
+
+
+@receiver(post_save, sender=CourseEnrollment)
+def update_stats_on_enrollment_save(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    if created:
+        CourseStatsService.enrollment_changed(
+            instance.course_id, new_status=instance.status, new_progress=instance.progress_percentage
+        )
+        return
+
+    previous = getattr(instance, '_previous_stats_state', None)
+    if previous:
+        old_status, old_progress = previous
+        CourseStatsService.enrollment_changed(
+            instance.course_id,
+            old_status=old_status, old_progress=old_progress,
+            new_status=instance.status, new_progress=instance.progress_percentage
+        )
+
+
+@receiver(pre_delete, sender=CourseEnrollment)
+def update_stats_on_enrollment_delete(sender, instance, **kwargs):
+    """
+    Subtract the enrollment before its sessions and module progress cascade away.
+    """
+    CourseStatsService.enrollment_removed(instance)
+
+
+def _seats_changed(enrollment, delta):
+    EnrollmentService.apply_seats(enrollment.course_id, delta)
+    if delta > 0:
+        # Enrolled students leave the waitlist
+        CourseWaitlist.objects.filter(course_id=enrollment.course_id, student_id=enrollment.student_id).delete()
+    elif delta < 0:
+        course_id = enrollment.course_id
+        transaction.on_commit(lambda: WaitlistService.promote(course_id))
+
+
+@receiver(post_save, sender=CourseEnrollment)
+def update_seats_on_enrollment_save(sender, instance, created, raw=False, **kwargs):
+    """
+    Keep Course.enrolled_count in sync with enrollment status transitions and
+    offer freed seats to the waitlist.
+    """
+    if raw:
+        return
+    if created:
+        _seats_changed(instance, EnrollmentService.seat_delta(None, instance.status))
+        return
+
+    previous = getattr(instance, '_previous_stats_state', None)
+    if previous:
+        _seats_changed(instance, EnrollmentService.seat_delta(previous[0], instance.status))
+
+
+@receiver(pre_delete, sender=CourseEnrollment)
+def update_seats_on_enrollment_delete(sender, instance, **kwargs):
+    _seats_changed(instance, EnrollmentService.seat_delta(instance.status, None))
+
+
+@receiver(post_save, sender=CourseWaitlist)
+@receiver(post_delete, sender=CourseWaitlist)
+def invalidate_waitlist_ranks(sender, instance, raw=False, **kwargs):
+    if not raw:
+        WaitlistService.invalidate(instance.course_id)
+
+
+@receiver(pre_save, sender=ModuleProgress)
+def remember_previous_module_completion(sender, instance, update_fields=None, **kwargs):
+    instance._was_completed = False
+    if instance.pk and (update_fields is None or 'is_completed' in update_fields):
+        instance._was_completed = ModuleProgress.objects.filter(
+            pk=instance.pk, is_completed=True
+        ).exists()
+
+
+@receiver(post_save, sender=ModuleProgress)
+def update_stats_on_module_completion(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    was_completed = getattr(instance, '_was_completed', False)
+    if instance.is_completed != was_completed:
+        course_id = Module.objects.filter(pk=instance.module_id).values_list('course_id', flat=True).first()
+        CourseStatsService.module_completions_changed(
+            course_id, {instance.module_id: 1 if instance.is_completed else -1}
+        )
+
+
+@receiver(post_save, sender=Module)
+def update_stats_on_module_create(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        CourseStatsService.apply(instance.course_id, total_modules=1)
+
+
+@receiver(post_delete, sender=Module)
+def update_stats_on_module_delete(sender, instance, **kwargs):
+    CourseStatsService.module_removed(instance.course_id, instance.pk)
+
+
+@receiver(post_save, sender=Content)
+@receiver(post_delete, sender=Content)
+def update_stats_on_content_change(sender, instance, created=False, raw=False, **kwargs):
+    """
+    Keep the content total in sync; a content moved across courses counts for both.
+    """
+    if raw:
+        return
+    deleted = kwargs.get('signal') is post_delete
+    previous_module_id = getattr(instance, '_previous_module_id', None)
+    if not (created or deleted or (previous_module_id and previous_module_id != instance.module_id)):
+        return
+
+    course_ids = dict(Module.objects.filter(
+        pk__in=[instance.module_id, previous_module_id]
+    ).values_list('pk', 'course_id'))
+    course_id = course_ids.get(instance.module_id)
+    if created:
+        CourseStatsService.apply(course_id, total_contents=1)
+    elif deleted:
+        CourseStatsService.apply(course_id, total_contents=-1)
+    elif course_ids.get(previous_module_id) != course_id:
+        CourseStatsService.apply(course_ids.get(previous_module_id), total_contents=-1)
+        CourseStatsService.apply(course_id, total_contents=1)
+
+
+@receiver(post_save, sender=LearningSession)
+def update_stats_on_session_start(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        course_id = CourseEnrollment.objects.filter(
+            pk=instance.enrollment_id
+        ).values_list('course_id', flat=True).first()
+        CourseStatsService.apply(course_id, total_sessions=1)
+
+
+@receiver(post_save, sender=Order)
+def update_stats_on_order_change(sender, instance, raw=False, **kwargs):
+    """
+    Refresh revenue figures when an order for a course changes.
+    """
+    if raw or instance.content_type_id != ContentType.objects.get_for_model(Course).pk:
+        return
+    CourseStatsService.orders_changed(instance.object_id)
+
+
+def _update_search_documents(course_ids, deleted=False):
+    course_ids = {course_id for course_id in course_ids if course_id}
+    if not course_ids:
+        return
+    if deleted:
+        # Deletes may cascade from the course itself; after commit its document is not recreated
+        transaction.on_commit(lambda: CourseSearchService.update_documents(course_ids))
+    else:
+        CourseSearchService.update_documents(course_ids)
+
+
+@receiver(post_save, sender=Course)
+def update_search_document_on_course_save(sender, instance, raw=False, **kwargs):
+    if not raw:
+        _update_search_documents([instance.pk])
+
+
+@receiver(post_save, sender=Subject)
+def update_search_documents_on_subject_save(sender, instance, created, raw=False, **kwargs):
+    if not created and not raw:
+        CourseSearchDocument.objects.filter(course__subject=instance).update(subject=instance.title)
+
+
+@receiver(post_save, sender=Module)
+def update_search_document_on_module_save(sender, instance, raw=False, **kwargs):
+    if not raw:
+        _update_search_documents([instance.course_id])
+
+
+@receiver(post_delete, sender=Module)
+def update_search_document_on_module_delete(sender, instance, **kwargs):
+    _update_search_documents([instance.course_id], deleted=True)
+
+
+@receiver(post_save, sender=Content)
+def update_search_documents_on_content_move(sender, instance, raw=False, **kwargs):
+    """
+    Text items of a content moved to another course move their text along.
+    """
+    previous_module_id = getattr(instance, '_previous_module_id', None)
+    if raw or not previous_module_id or previous_module_id == instance.module_id:
+        return
+    _update_search_documents(Module.objects.filter(
+        pk__in=[instance.module_id, previous_module_id]
+    ).values_list('course_id', flat=True).distinct())
+
+
+@receiver(post_save, sender=ContentItem)
+@receiver(post_delete, sender=ContentItem)
+def update_search_document_on_content_item_change(sender, instance, raw=False, signal=None, **kwargs):
+    if raw or instance.content_type_id != ContentType.objects.get_for_model(Text).pk:
+        return
+    _update_search_documents(Content.objects.filter(
+        pk=instance.content_id
+    ).values_list('module__course_id', flat=True), deleted=signal is post_delete)
+
+
+@receiver(post_save, sender=Text)
+def update_search_documents_on_text_save(sender, instance, created, raw=False, **kwargs):
+    """
+    Edited text is reindexed in every course that uses it. New text is
+    indexed once its ContentItem is created.
+    """
+    if created or raw:
+        return
+    _update_search_documents(ContentItem.objects.filter(
+        content_type=ContentType.objects.get_for_model(Text), object_id=instance.pk
+    ).values_list('content__module__course_id', flat=True))
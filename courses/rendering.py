@@ -0,0 +1,72 @@
+"""
+Content Rendering
+Markdown conversion and cached HTML fragments of course items. Fragments are
+keyed by (model, pk, updated) so editing an item never serves stale HTML.
+"""
+
+import logging
+import threading
+
+import markdown
+from django.core.cache import cache
+from django.template.loader import render_to_string
+
+MARKDOWN_EXTENSIONS = [
+    'extra', 'toc', 'abbr', 'attr_list', 'def_list', 'fenced_code', 'footnotes', 'md_in_html', 'admonition',
+    'tables', 'codehilite', 'legacy_em', 'legacy_attrs', 'meta', 'nl2br', 'sane_lists', 'smarty', 'mdx_gfm',
+    'mdx_cite', 'mdx_emdash'
+]
+
+# Keys change whenever an item is updated, so fragments can live for a long time
+RENDER_CACHE_TIMEOUT = 60 * 60 * 24
+
+_local = threading.local()
+
+logger = logging.getLogger(__name__)
+
+
+def render_markdown(text):
+    """
+    Convert Markdown text to HTML with extended features.
+
+    Loading the extensions is expensive, so each thread keeps one converter
+    and resets it between documents.
+    """
+    if not text:
+        return ''
+    converter = getattr(_local, 'markdown', None)
+    if converter is None:
+        converter = _local.markdown = markdown.Markdown(extensions=MARKDOWN_EXTENSIONS)
+    return converter.reset().convert(text)
+
+
+def prerender_markdown(text):
+    """
+    Convert Markdown text to HTML ahead of display.
+
+    Returns '' if rendering fails, which leaves it to the display-time
+    ``markdown`` filter instead of failing the save.
+    """
+    try:
+        return render_markdown(text)
+    except Exception:
+        logger.exception('Markdown rendering failed, rendering at display time instead')
+        return ''
+
+
+def render_cache_key(item):
+    return f"course_item_html_{item._meta.label_lower}_{item.pk}_{item.updated.timestamp()}"
+
+
+def render_item(item):
+    """Render the template of an item (Text/Video/Image/File), cached per version"""
+    template_name = f'courses/content/{item._meta.model_name}.html'
+    if item.pk is None or item.updated is None:
+        return render_to_string(template_name, {'item': item})
+
+    cache_key = render_cache_key(item)
+    html = cache.get(cache_key)
+    if html is None:
+        html = render_to_string(template_name, {'item': item})
+        cache.set(cache_key, html, timeout=RENDER_CACHE_TIMEOUT)
+    return html
@@ -0,0 +1,79 @@
+"""
+Learning Session Retention
+Keeps the LearningSession table small: sessions older than the retention
+window are summarized into DailyLearningTime, written to gzip-compressed JSONL
+files in the default storage (MEDIA_ROOT) and deleted in batches.
+"""
+
+import gzip
+import json
+from collections import Counter
+from datetime import datetime, time, timedelta
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.utils import timezone
+
+from .learning_time_service import LearningTimeService
+from .models import LearningSession
+from .stats_service import CourseStatsService
+
+DEFAULT_RETENTION_DAYS = 180
+DEFAULT_BATCH_SIZE = 5000
+ARCHIVE_DIRECTORY = 'archives/learning_sessions'
+
+ARCHIVE_FIELDS = ['id', 'enrollment_id', 'enrollment__course_id', 'enrollment__student_id', 'content_id',
+                  'started_at', 'ended_at']
+
+
+class SessionRetentionService:
+    """Summarize, archive and delete old learning sessions"""
+
+    @staticmethod
+    def get_cutoff_date(days=DEFAULT_RETENTION_DAYS):
+        """First day that is kept; older days are archived as a whole"""
+        return timezone.localdate() - timedelta(days=days)
+
+    @staticmethod
+    def get_expired_sessions(cutoff_date):
+        cutoff = timezone.make_aware(datetime.combine(cutoff_date, time.min))
+        return LearningSession.objects.filter(started_at__lt=cutoff)
+
+    @staticmethod
+    def _write_archive(cutoff_date, part, rows):
+        lines = ''.join(json.dumps(row, cls=DjangoJSONEncoder) + '\n' for row in rows)
+        name = f"{ARCHIVE_DIRECTORY}/before-{cutoff_date.isoformat()}/part-{part:05d}.jsonl.gz"
+        return default_storage.save(name, ContentFile(gzip.compress(lines.encode())))
+
+    @classmethod
+    def archive(cls, cutoff_date, batch_size=DEFAULT_BATCH_SIZE):
+        """
+        Archive and delete every session that started before ``cutoff_date``.
+
+        Daily summaries of the archived days are rebuilt from the raw rows
+        first, so learning totals and streaks survive the deletion. Course
+        rollups count stored sessions and are decremented per batch.
+
+        Returns:
+            dict: sessions (archived count) and files (storage names written)
+        """
+        expired = cls.get_expired_sessions(cutoff_date)
+        LearningTimeService.rebuild(end=cutoff_date)
+
+        archived = 0
+        files = []
+        while True:
+            rows = list(expired.order_by('pk').values(*ARCHIVE_FIELDS)[:batch_size])
+            if not rows:
+                break
+
+            files.append(cls._write_archive(cutoff_date, len(files) + 1, rows))
+            with transaction.atomic():
+                LearningSession.objects.filter(pk__in=[row['id'] for row in rows]).delete()
+                for course_id, count in Counter(row['enrollment__course_id'] for row in rows).items():
+                    CourseStatsService.apply(course_id, total_sessions=-count)
+            archived += len(rows)
+
+        return {'sessions': archived, 'files': files}
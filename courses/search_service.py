@@ -0,0 +1,176 @@
+"""
+Course Search Services
+Maintains one search document per course (title, subject, overview, module
+titles and text content) and queries the full-text index built over it by
+migration 0024: a weighted tsvector with a GIN index on PostgreSQL, an FTS5
+table on SQLite. Other databases fall back to ``icontains`` lookups.
+"""
+
+import re
+
+from django.contrib.contenttypes.models import ContentType
+from django.db import connection
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+
+from .models import ContentItem, Course, CourseSearchDocument, Module, Text
+
+SEARCH_CONFIG = 'simple'
+FTS_TABLE = 'courses_coursesearch_fts'
+
+# bm25 column weights for title, subject and body
+FTS_WEIGHTS = '10.0, 5.0, 1.0'
+
+AUTOCOMPLETE_LIMIT = 10
+MAX_TERMS = 8
+
+TERM_RE = re.compile(r'\w+')
+
+_fts_tables = {}
+
+
+def _terms(query):
+    # Only word characters reach the index queries, so user input can't inject query syntax
+    return TERM_RE.findall(query.lower())[:MAX_TERMS]
+
+
+def _has_fts_table():
+    alias = connection.alias
+    if alias not in _fts_tables:
+        _fts_tables[alias] = FTS_TABLE in connection.introspection.table_names()
+    return _fts_tables[alias]
+
+
+class CourseSearchService:
+    """Search document maintenance and ranked course search"""
+
+    @staticmethod
+    def backend():
+        """Get the full-text backend of the current database, or None for the fallback"""
+        if connection.vendor == 'postgresql':
+            return 'postgresql'
+        if connection.vendor == 'sqlite' and _has_fts_table():
+            return 'sqlite'
+        return None
+
+    @staticmethod
+    def update_document(course_id):
+        """
+        Rebuild the search document of a course.
+
+        Returns:
+            CourseSearchDocument, or None if the course no longer exists
+        """
+        course = Course.objects.select_related('subject').filter(pk=course_id).first()
+        if course is None:
+            return None
+
+        text_ids = ContentItem.objects.filter(
+            content__module__course_id=course_id,
+            content_type=ContentType.objects.get_for_model(Text),
+        ).values('object_id')
+        parts = [
+            course.overview,
+            *Module.objects.filter(course_id=course_id).values_list('title', flat=True),
+            *Text.objects.filter(pk__in=text_ids).values_list('content', flat=True),
+        ]
+
+        document, _ = CourseSearchDocument.objects.update_or_create(course_id=course_id, defaults={
+            'title': course.title,
+            'subject': course.subject.title,
+            'body': '\n'.join(parts),
+        })
+        return document
+
+    @classmethod
+    def update_documents(cls, course_ids):
+        for course_id in set(course_ids):
+            cls.update_document(course_id)
+
+    @classmethod
+    def rebuild(cls, courses=None):
+        """Rebuild the documents of ``courses`` (default: all). Returns the number rebuilt."""
+        courses = Course.objects.all() if courses is None else courses
+        count = 0
+        for course_id in courses.values_list('pk', flat=True).iterator():
+            cls.update_document(course_id)
+            count += 1
+        return count
+
+    @classmethod
+    def _match(cls, terms, prefix):
+        """
+        Build the match condition and rank expression for a list of terms.
+
+        Returns:
+            tuple: (subquery of matching course ids, rank expression), or None without an index
+        """
+        course_pk = f'{Course._meta.db_table}.{Course._meta.pk.column}'
+        backend = cls.backend()
+        if backend == 'postgresql':
+            tsquery = ' & '.join(terms) + (':*' if prefix else '')
+            condition = f"search_vector @@ to_tsquery('{SEARCH_CONFIG}', %s)"
+            return (
+                RawSQL(f"SELECT course_id FROM courses_coursesearchdocument WHERE {condition}", [tsquery]),
+                RawSQL(
+                    f"SELECT ts_rank(search_vector, to_tsquery('{SEARCH_CONFIG}', %s)) "
+                    f"FROM courses_coursesearchdocument WHERE course_id = {course_pk}",
+                    [tsquery]
+                ),
+            )
+        if backend == 'sqlite':
+            match = ' '.join(f'"{term}"' for term in terms) + ('*' if prefix else '')
+            return (
+                RawSQL(f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s", [match]),
+                # bm25 is lower for better matches
+                RawSQL(
+                    f"SELECT -bm25({FTS_TABLE}, {FTS_WEIGHTS}) FROM {FTS_TABLE} "
+                    f"WHERE {FTS_TABLE} MATCH %s AND rowid = {course_pk}",
+                    [match]
+                ),
+            )
+        return None
+
+    @classmethod
+    def search(cls, queryset, query, prefix=False):
+        """
+        Filter courses by a full-text query, best matches first.
+
+        All terms must match. With ``prefix`` the last term also matches
+        longer words, for search-as-you-type.
+
+        Args:
+            queryset: Course queryset to search in
+            query: User input
+
+        Returns:
+            QuerySet: Matching courses annotated with ``search_rank``
+        """
+        terms = _terms(query)
+        if not terms:
+            return queryset
+
+        match = cls._match(terms, prefix)
+        if match is None:
+            lookups = Q()
+            for term in terms:
+                lookups &= (
+                    Q(title__icontains=term) | Q(overview__icontains=term) | Q(subject__title__icontains=term)
+                )
+            return queryset.filter(lookups)
+
+        matching_ids, rank = match
+        return queryset.filter(pk__in=matching_ids).annotate(search_rank=rank).order_by('-search_rank', '-created')
+
+    @classmethod
+    def autocomplete(cls, prefix, limit=AUTOCOMPLETE_LIMIT):
+        """
+        Suggest published courses for a partially typed query.
+
+        Returns:
+            list: Dicts with ``id``, ``title`` and ``slug``
+        """
+        if not _terms(prefix):
+            return []
+        courses = cls.search(Course.objects.filter(status='published'), prefix, prefix=True)
+        return list(courses.values('id', 'title', 'slug')[:limit])
@@ -0,0 +1,327 @@
+"""
+Learning Session Ingestion
+Open sessions live in the cache, one per (enrollment, content), and are extended
+by page views and client heartbeats. Closed sessions are written to the database
+in batches with bulk_create instead of one insert per page view.
+
+Buffered sessions are numbered by a cache counter and tracked by two queues of
+those numbers: sessions closed but not yet written, and sessions still open.
+``flush`` writes exactly the closed queue. It also sweeps the open queue, moving
+idle sessions to the closed queue and sessions still in use to its back, so a
+long-lived session never holds up the others.
+
+Flushes run when enough sessions are pending, when activity finds the last
+flush older than ``FLUSH_INTERVAL``, and from the ``flush_learning_sessions``
+command, which should be scheduled so idle sessions are written on quiet sites
+too. Sessions still buffered after ``BUFFER_TIMEOUT`` are lost.
+"""
+
+import time
+from collections import Counter
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+
+from .learning_time_service import LearningTimeService
+from .models import Content, CourseEnrollment, LearningSession
+from .stats_service import CourseStatsService
+
+# A session without page views or heartbeats for this long is closed at its last activity
+SESSION_IDLE_TIMEOUT = timedelta(minutes=30)
+
+# Closing a session flushes the buffer once this many sessions are pending
+FLUSH_BATCH_SIZE = 200
+
+# Activity also flushes the buffer when the last flush is older than this, so
+# sessions reach the database on quiet sites without the flush_learning_sessions job
+FLUSH_INTERVAL = 60 * 5
+
+# Upper bound of queued sessions taken by a single flush, per queue
+MAX_FLUSH_SCAN = 10000
+
+BUFFER_TIMEOUT = 60 * 60 * 24
+
+# A queue slot is written right after it is taken; one still empty after this long was evicted
+SLOT_WRITE_GRACE = 60
+
+_SEQUENCE_KEY = 'learning_session_sequence'
+_FLUSH_LOCK_KEY = 'learning_session_flush_lock'
+_FLUSH_DUE_KEY = 'learning_session_flush_due'
+
+
+def _open_key(enrollment_id, content_id):
+    return f"learning_session_open_{enrollment_id}_{content_id}"
+
+
+def _entry_key(number):
+    return f"learning_session_entry_{number}"
+
+
+class _SessionQueue:
+    """Append-only queue of session numbers in the cache, consumed in order by flushes"""
+
+    def __init__(self, name):
+        self.name = name
+        self.sequence_key = f"learning_session_{name}_sequence"
+        self.cursor_key = f"learning_session_{name}_cursor"
+
+    def _slot_key(self, slot):
+        return f"learning_session_{self.name}_{slot}"
+
+    def _missing_key(self, slot):
+        return f"learning_session_{self.name}_{slot}_missing"
+
+    def push(self, number):
+        cache.add(self.sequence_key, 0, timeout=None)
+        slot = cache.incr(self.sequence_key)
+        cache.set(self._slot_key(slot), number, timeout=BUFFER_TIMEOUT)
+
+    def pending(self):
+        return (cache.get(self.sequence_key) or 0) - (cache.get(self.cursor_key) or 0)
+
+    def _lost(self, slot):
+        # Empty either because push() has not written it yet, or because it was evicted
+        cache.add(self._missing_key(slot), time.time(), timeout=BUFFER_TIMEOUT)
+        missing_since = cache.get(self._missing_key(slot))
+        return missing_since is None or time.time() - missing_since >= SLOT_WRITE_GRACE
+
+    def peek(self, limit):
+        """
+        Read queued numbers without consuming them.
+
+        Returns:
+            tuple: (session numbers, cursor to pass to ``consume``). Reading
+            stops before a slot that may still be written.
+        """
+        start = cursor = cache.get(self.cursor_key) or 0
+        slots = range(start + 1, min(cache.get(self.sequence_key) or 0, start + limit) + 1)
+        values = cache.get_many([self._slot_key(slot) for slot in slots])
+
+        numbers = []
+        for slot in slots:
+            number = values.get(self._slot_key(slot))
+            if number is None and not self._lost(slot):
+                break
+            if number is not None:
+                numbers.append(number)
+            cursor = slot
+        return numbers, cursor
+
+    def consume(self, cursor):
+        """Drop everything up to ``cursor``"""
+        start = cache.get(self.cursor_key) or 0
+        slots = range(start + 1, cursor + 1)
+        cache.delete_many([self._slot_key(slot) for slot in slots] + [self._missing_key(slot) for slot in slots])
+        cache.set(self.cursor_key, cursor, timeout=None)
+
+
+_closed_queue = _SessionQueue('closed')
+_open_queue = _SessionQueue('open')
+
+
+class LearningSessionService:
+    """Coalesce learning sessions in the cache and flush them in batches"""
+
+    @staticmethod
+    def _to_session(entry):
+        """Unsaved LearningSession for views and serializers"""
+        return LearningSession(
+            enrollment_id=entry['enrollment_id'],
+            content_id=entry['content_id'],
+            started_at=entry['started_at'],
+            ended_at=entry['ended_at'],
+        )
+
+    @staticmethod
+    def _next_number():
+        cache.add(_SEQUENCE_KEY, 0, timeout=None)
+        return cache.incr(_SEQUENCE_KEY)
+
+    @staticmethod
+    def _get_open(enrollment_id, content_id):
+        number = cache.get(_open_key(enrollment_id, content_id))
+        entry = cache.get(_entry_key(number)) if number else None
+        if entry is None or entry['ended_at'] is not None:
+            return None, None
+        return number, entry
+
+    @classmethod
+    def _start(cls, open_key, previous, entry):
+        """
+        Make ``entry`` the open session of a content, unless a concurrent
+        request already started one.
+
+        The open key is claimed with ``cache.add``; replacing an ended session
+        ``previous`` claims a successor key of it instead, so of two first
+        views only one session is started and queued.
+
+        Returns:
+            tuple: (number, entry) of the session that won the claim
+        """
+        number = cls._next_number()
+        # Written before claiming, so the loser always finds the winner's entry
+        cache.set(_entry_key(number), entry, timeout=BUFFER_TIMEOUT)
+
+        claim_key = open_key if previous is None else f"{open_key}_after_{previous}"
+        if cache.add(claim_key, number, timeout=BUFFER_TIMEOUT):
+            if previous is not None:
+                cache.set(open_key, number, timeout=BUFFER_TIMEOUT)
+            _open_queue.push(number)
+            return number, entry
+
+        cache.delete(_entry_key(number))
+        winner = cache.get(claim_key)
+        winner_entry = cache.get(_entry_key(winner)) if winner else None
+        if winner_entry is None:
+            # The winner's entry was evicted already; record the view as a session of its own
+            cache.set(_entry_key(number), entry, timeout=BUFFER_TIMEOUT)
+            _open_queue.push(number)
+            return number, entry
+        return winner, winner_entry
+
+    @classmethod
+    def touch(cls, enrollment, content):
+        """
+        Record activity on a content: extends the open session, or starts a new
+        one when there is none or it went idle. Used by page views and heartbeats.
+
+        Returns:
+            Unsaved LearningSession
+        """
+        now = timezone.now()
+        open_key = _open_key(enrollment.pk, content.pk)
+        number = cache.get(open_key)
+        entry = cache.get(_entry_key(number)) if number else None
+
+        if entry is not None and entry['ended_at'] is None and now - entry['last_seen'] >= SESSION_IDLE_TIMEOUT:
+            entry['ended_at'] = entry['last_seen']
+            cache.set(_entry_key(number), entry, timeout=BUFFER_TIMEOUT)
+            _closed_queue.push(number)
+
+        if entry is None or entry['ended_at'] is not None:
+            number, entry = cls._start(open_key, number, {
+                'enrollment_id': enrollment.pk,
+                'course_id': enrollment.course_id,
+                'content_id': content.pk,
+                'started_at': now,
+                'ended_at': None,
+                'last_seen': now,
+            })
+
+        entry['last_seen'] = now
+        cache.set(_entry_key(number), entry, timeout=BUFFER_TIMEOUT)
+        cls._flush_if_due()
+        return cls._to_session(entry)
+
+    @classmethod
+    def close(cls, enrollment, content):
+        """
+        Close the open session of a content, if any.
+
+        Returns:
+            Unsaved LearningSession or None
+        """
+        number, entry = cls._get_open(enrollment.pk, content.pk)
+        cache.delete(_open_key(enrollment.pk, content.pk))
+        if entry is None:
+            return None
+
+        now = timezone.now()
+        entry['ended_at'] = entry['last_seen'] if now - entry['last_seen'] >= SESSION_IDLE_TIMEOUT else now
+        cache.set(_entry_key(number), entry, timeout=BUFFER_TIMEOUT)
+        _closed_queue.push(number)
+
+        if cls.pending_count() >= FLUSH_BATCH_SIZE:
+            cls.flush()
+        else:
+            cls._flush_if_due()
+        return cls._to_session(entry)
+
+    @staticmethod
+    def pending_count():
+        """Number of closed sessions not yet written"""
+        return _closed_queue.pending()
+
+    @classmethod
+    def _flush_if_due(cls):
+        # The marker expires FLUSH_INTERVAL after a flush; the request that sets it again flushes
+        if cache.add(_FLUSH_DUE_KEY, 1, timeout=FLUSH_INTERVAL):
+            cls.flush()
+
+    @classmethod
+    def flush(cls):
+        """
+        Write closed and idle sessions to the database.
+
+        Returns:
+            int: Number of sessions written (0 when another flush is running)
+        """
+        if not cache.add(_FLUSH_LOCK_KEY, 1, timeout=300):
+            return 0
+        try:
+            return cls._flush()
+        finally:
+            cache.delete(_FLUSH_LOCK_KEY)
+
+    @staticmethod
+    def _sweep_open(now):
+        """Queue idle sessions as closed and move sessions still in use to the back"""
+        numbers, cursor = _open_queue.peek(MAX_FLUSH_SCAN)
+        entries = cache.get_many([_entry_key(number) for number in numbers])
+        for number in numbers:
+            entry = entries.get(_entry_key(number))
+            if entry is None or entry['ended_at'] is not None:
+                # Already written, expired, or queued as closed
+                continue
+            if now - entry['last_seen'] >= SESSION_IDLE_TIMEOUT:
+                cache.set(_entry_key(number), {**entry, 'ended_at': entry['last_seen']}, timeout=BUFFER_TIMEOUT)
+                _closed_queue.push(number)
+            else:
+                _open_queue.push(number)
+        _open_queue.consume(cursor)
+
+    @classmethod
+    def _flush(cls):
+        cls._sweep_open(timezone.now())
+
+        numbers, cursor = _closed_queue.peek(MAX_FLUSH_SCAN)
+        entries = cache.get_many([_entry_key(number) for number in numbers])
+        closed = {}
+        for number in numbers:
+            entry = entries.get(_entry_key(number))
+            if entry is None:
+                # Expired from the buffer, or queued twice and already written
+                continue
+            if entry['ended_at'] is None:
+                # Extended by a page view racing the idle sweep; it is open again
+                _open_queue.push(number)
+                continue
+            closed[_entry_key(number)] = entry
+
+        # Enrollments or contents may have been deleted while buffered
+        enrollment_ids = set(CourseEnrollment.objects.filter(
+            pk__in={entry['enrollment_id'] for entry in closed.values()}
+        ).values_list('pk', flat=True))
+        content_ids = set(Content.objects.filter(
+            pk__in={entry['content_id'] for entry in closed.values()}
+        ).values_list('pk', flat=True))
+        entries = [
+            entry for entry in closed.values()
+            if entry['enrollment_id'] in enrollment_ids and entry['content_id'] in content_ids
+        ]
+
+        with transaction.atomic():
+            # bulk_create skips post_save, so rollups are updated here
+            sessions = LearningSession.objects.bulk_create(
+                [cls._to_session(entry) for entry in entries], batch_size=500
+            )
+            LearningTimeService.record(sessions)
+            for course_id, count in Counter(entry['course_id'] for entry in entries).items():
+                CourseStatsService.apply(course_id, total_sessions=count)
+
+        cache.delete_many(list(closed))
+        _closed_queue.consume(cursor)
+        cache.set(_FLUSH_DUE_KEY, 1, timeout=FLUSH_INTERVAL)
+        return len(entries)
@@ -0,0 +1,199 @@
+"""
+Course Analytics Rollup Services
+Maintains CourseStatsRollup rows so analytics pages read a single row
+instead of aggregating raw enrollment/progress/order data per request.
+"""
+
+from decimal import Decimal
+
+from django.contrib.contenttypes.models import ContentType
+from django.db import transaction
+from django.db.models import Count, F, Q, Sum
+from django.utils import timezone
+
+from .models import (
+    Course, CourseEnrollment, CourseStatsRollup, Content, LearningSession, Module, ModuleProgress
+)
+
+# Enrollment status -> rollup counter
+STATUS_FIELDS = {
+    'enrolled': 'active_students',
+    'completed': 'completed_students',
+    'paused': 'paused_students',
+}
+
+
+class CourseStatsService:
+    """Incremental and full maintenance of course analytics rollups"""
+
+    @staticmethod
+    def _order_stats(course_id):
+        try:
+            from payments.models import Order
+        except ImportError:
+            # payments app not installed
+            return {'total_orders': 0, 'total_revenue': Decimal('0')}
+
+        stats = Order.objects.filter(
+            content_type=ContentType.objects.get_for_model(Course),
+            object_id=course_id,
+            status='completed'
+        ).aggregate(total_orders=Count('id'), total_revenue=Sum('total_amount'))
+        return {'total_orders': stats['total_orders'], 'total_revenue': stats['total_revenue'] or Decimal('0')}
+
+    @classmethod
+    @transaction.atomic
+    def refresh(cls, course):
+        """
+        Rebuild the rollup of a course from raw rows.
+
+        Args:
+            course: Course instance or id
+
+        Returns:
+            CourseStatsRollup
+        """
+        course_id = getattr(course, 'pk', course)
+        enrollments = CourseEnrollment.objects.filter(course_id=course_id).aggregate(
+            total_students=Count('id'),
+            active_students=Count('id', filter=Q(status='enrolled')),
+            completed_students=Count('id', filter=Q(status='completed')),
+            paused_students=Count('id', filter=Q(status='paused')),
+            progress_sum=Sum('progress_percentage'),
+        )
+        enrollments['progress_sum'] = enrollments['progress_sum'] or Decimal('0')
+
+        # The seat counter is derived from the same rows
+        Course.objects.filter(pk=course_id).update(
+            enrolled_count=enrollments['active_students'] + enrollments['completed_students']
+        )
+
+        module_completions = {
+            str(row['module']): row['completed']
+            for row in ModuleProgress.objects.filter(
+                module__course_id=course_id, is_completed=True
+            ).values('module').annotate(completed=Count('id'))
+        }
+
+        rollup, _ = CourseStatsRollup.objects.update_or_create(
+            course_id=course_id,
+            defaults={
+                **enrollments,
+                **cls._order_stats(course_id),
+                'total_modules': Module.objects.filter(course_id=course_id).count(),
+                'total_contents': Content.objects.filter(module__course_id=course_id).count(),
+                'total_sessions': LearningSession.objects.filter(enrollment__course_id=course_id).count(),
+                'module_completions': module_completions,
+            }
+        )
+        return rollup
+
+    @classmethod
+    def get_rollup(cls, course):
+        """Get the rollup of a course, building it on first access"""
+        course_id = getattr(course, 'pk', course)
+        rollup = CourseStatsRollup.objects.filter(course_id=course_id).first()
+        return rollup or cls.refresh(course_id)
+
+    @classmethod
+    def get_rollups(cls, course_ids):
+        """Get rollups for several courses as {course_id: rollup}"""
+        course_ids = list(course_ids)
+        rollups = CourseStatsRollup.objects.in_bulk(course_ids)
+        for course_id in course_ids:
+            if course_id not in rollups:
+                rollups[course_id] = cls.refresh(course_id)
+        return rollups
+
+    @staticmethod
+    def apply(course_id, **deltas):
+        """
+        Add deltas to rollup counters with F() expressions.
+
+        Only existing rollups are touched: a missing one is built from raw rows
+        on first read, which already includes the change.
+        """
+        deltas = {field: delta for field, delta in deltas.items() if delta}
+        if deltas:
+            CourseStatsRollup.objects.filter(course_id=course_id).update(
+                updated_at=timezone.now(),
+                **{field: F(field) + delta for field, delta in deltas.items()}
+            )
+
+    @classmethod
+    def enrollment_changed(cls, course_id, old_status=None, old_progress=None, new_status=None, new_progress=None):
+        """
+        Apply an enrollment transition. Pass only the new values for a created
+        enrollment and only the old values for a deleted one.
+        """
+        deltas = {}
+        if old_status is None and new_status is not None:
+            deltas['total_students'] = 1
+        elif old_status is not None and new_status is None:
+            deltas['total_students'] = -1
+
+        if old_status != new_status:
+            if old_status in STATUS_FIELDS:
+                deltas[STATUS_FIELDS[old_status]] = -1
+            if new_status in STATUS_FIELDS:
+                deltas[STATUS_FIELDS[new_status]] = deltas.get(STATUS_FIELDS[new_status], 0) + 1
+
+        deltas['progress_sum'] = Decimal(new_progress or 0) - Decimal(old_progress or 0)
+        cls.apply(course_id, **deltas)
+
+    @classmethod
+    def enrollment_removed(cls, enrollment):
+        """Subtract an enrollment and everything cascading from it"""
+        cls.enrollment_changed(
+            enrollment.course_id, old_status=enrollment.status, old_progress=enrollment.progress_percentage
+        )
+        cls.apply(enrollment.course_id, total_sessions=-enrollment.learning_sessions.count())
+        cls.module_completions_changed(enrollment.course_id, {
+            module_id: -1
+            for module_id in enrollment.module_progress.filter(is_completed=True).values_list('module_id', flat=True)
+        })
+
+    @staticmethod
+    def module_completions_changed(course_id, deltas):
+        """Adjust completed counts per module ({module_id: delta}) under a row lock"""
+        if not deltas:
+            return
+        with transaction.atomic():
+            rollup = CourseStatsRollup.objects.select_for_update().filter(course_id=course_id).first()
+            if rollup is None:
+                return
+            for module_id, delta in deltas.items():
+                key = str(module_id)
+                count = max(rollup.module_completions.get(key, 0) + delta, 0)
+                if count:
+                    rollup.module_completions[key] = count
+                else:
+                    rollup.module_completions.pop(key, None)
+            rollup.save(update_fields=['module_completions', 'updated_at'])
+
+    @staticmethod
+    def module_removed(course_id, module_id):
+        with transaction.atomic():
+            rollup = CourseStatsRollup.objects.select_for_update().filter(course_id=course_id).first()
+            if rollup is None:
+                return
+            rollup.module_completions.pop(str(module_id), None)
+            rollup.total_modules = max(rollup.total_modules - 1, 0)
+            rollup.save(update_fields=['module_completions', 'total_modules', 'updated_at'])
+
+    @classmethod
+    def orders_changed(cls, course_id):
+        """Recompute revenue figures; orders change rarely so a full aggregate is fine"""
+        CourseStatsRollup.objects.filter(course_id=course_id).update(
+            updated_at=timezone.now(), **cls._order_stats(course_id)
+        )
+
+    @classmethod
+    def refresh_all(cls, courses=None):
+        """Rebuild rollups for the given courses (default: all). Returns the count."""
+        courses = Course.objects.all() if courses is None else courses
+        count = 0
+        for course_id in courses.values_list('pk', flat=True).iterator():
+            cls.refresh(course_id)
+            count += 1
+        return count
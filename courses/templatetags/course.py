@@ -3,6 +3,8 @@ from django import template
 from django.utils import timezone
 from django.utils.safestring import mark_safe
 
+from courses.rendering import render_markdown
+
 register = template.Library()
 
 
@@ -240,11 +242,7 @@ def video_thumbnail(url, size='default'):
 @register.filter(name='markdown')
 def markdown_format(text):
     """Convert Markdown text to HTML with extended features."""
-    if not text:
-        return ''
-    import markdown
-    html = markdown.markdown(text, extensions=['extra', 'toc', 'abbr', 'attr_list', 'def_list', 'fenced_code', 'footnotes', 'md_in_html', 'admonition', 'tables', 'codehilite', 'legacy_em', 'legacy_attrs', 'meta', 'nl2br', 'sane_lists', 'smarty', 'mdx_gfm', 'mdx_cite', 'mdx_emdash'])
-    return mark_safe(html)
+    return mark_safe(render_markdown(text))
 
 
 @register.filter
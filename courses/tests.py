@@ -1,7 +1,45 @@
-from django.test import TestCase
+import gzip
+import json
+import tempfile
+from datetime import timedelta
+from decimal import Decimal
+from io import StringIO
+from unittest import mock
+
+from django.contrib.contenttypes.models import ContentType
+from django.core import mail
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.test import RequestFactory, TestCase
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
+from django.utils import timezone
+
+from subscriptions.models import SubscriptionPlan
+from subscriptions.services import SubscriptionService
 
-from .models import Course, User, CourseEnrollment, Subject
+from .models import (
+    Course, User, CourseEnrollment, Subject, Module, Content, ContentItem, ContentProgress, ModuleProgress,
+    LearningSession, CourseSearchDocument, CourseStatsRollup, CourseWaitlist, DailyLearningTime, Image, Text, Video
+)
+from .access_service import CourseAccessService, CourseFullError, EnrollmentService
+from .bitmap import CompletionBitmap
+from . import catalog
+from .cleanup_service import ItemCleanupService
+from .cloning_service import CloningService
+from .learning_time_service import LearningTimeService
+from .ordering import apply_order
+from .outline import get_course_outline
+from .rendering import render_item
+from .retention_service import SessionRetentionService
+from .search_service import CourseSearchService
+from .session_service import _FLUSH_DUE_KEY, LearningSessionService, _open_key
+from .stats_service import CourseStatsService
+from .views import InstructorCourseAnalyticsView
+from .waitlist_service import OFFER_EXPIRY, WaitlistService
 
 
 # Create your tests here.
@@ -142,3 +180,1601 @@ class CourseAccessViewTestCase(TestCase):
         # Should not raise 404
         self.assertIn(response.status_code, [200, 302])
 
+
+class ProgressCounterTestCase(TestCase):
+    """Denormalized progress counters stay in sync with completions and structure changes"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='student', password='testpass')
+        self.subject = Subject.objects.create(title='Test Subject', slug='test-subject')
+        self.course = Course.objects.create(
+            owner=self.user,
+            subject=self.subject,
+            title='Test Course',
+            slug='test-course',
+            overview='Test',
+            status='published',
+            is_free=True
+        )
+        self.module = Module.objects.create(course=self.course, title='Module 1')
+        self.contents = [Content.objects.create(module=self.module, title=f'Lesson {i}') for i in range(3)]
+        self.enrollment = CourseEnrollment.objects.create(
+            student=self.user,
+            course=self.course,
+            status='enrolled',
+            payment_status='free'
+        )
+
+    def complete(self, content):
+        progress, _ = ContentProgress.objects.get_or_create(enrollment=self.enrollment, content=content)
+        progress.enrollment = self.enrollment
+        return progress.mark_completed()
+
+    def test_enrollment_seeds_total(self):
+        self.assertEqual(self.enrollment.total_contents_count, 3)
+        self.assertEqual(self.enrollment.completed_contents_count, 0)
+
+    def test_mark_completed_updates_counters(self):
+        module_progress = self.complete(self.contents[0])
+        self.assertEqual(module_progress.completed_contents_count, 1)
+        self.assertEqual(module_progress.total_contents_count, 3)
+        self.assertEqual(self.enrollment.completed_contents_count, 1)
+        self.assertEqual(float(self.enrollment.progress_percentage), 33.33)
+
+        # Completing twice does not double count
+        progress = ContentProgress.objects.get(enrollment=self.enrollment, content=self.contents[0])
+        self.assertIsNone(progress.mark_completed())
+        self.enrollment.refresh_from_db()
+        self.assertEqual(self.enrollment.completed_contents_count, 1)
+
+    def test_completing_all_contents_completes_module_and_course(self):
+        for content in self.contents:
+            module_progress = self.complete(content)
+        self.assertTrue(module_progress.is_completed)
+        self.assertEqual(self.enrollment.status, 'completed')
+
+    def test_mark_completed_query_count_is_constant(self):
+        self.complete(self.contents[0])
+        for i in range(20):
+            Content.objects.create(module=self.module, title=f'Extra {i}')
+        progress, _ = ContentProgress.objects.get_or_create(enrollment=self.enrollment, content=self.contents[1])
+        progress.enrollment = self.enrollment
+        self.enrollment.get_completion_bitmap()
+        with self.assertNumQueries(14):
+            progress.mark_completed()
+
+    def test_content_added_and_deleted_adjust_totals(self):
+        self.complete(self.contents[0])
+        Content.objects.create(module=self.module, title='New lesson')
+        self.enrollment.refresh_from_db()
+        self.assertEqual(self.enrollment.total_contents_count, 4)
+
+        self.contents[0].delete()
+        self.enrollment.refresh_from_db()
+        module_progress = ModuleProgress.objects.get(enrollment=self.enrollment, module=self.module)
+        self.assertEqual(self.enrollment.total_contents_count, 3)
+        self.assertEqual(self.enrollment.completed_contents_count, 0)
+        self.assertEqual(module_progress.total_contents_count, 3)
+        self.assertEqual(module_progress.completed_contents_count, 0)
+
+    def test_content_moved_between_modules(self):
+        other_module = Module.objects.create(course=self.course, title='Module 2')
+        self.complete(self.contents[0])
+        ModuleProgress.objects.create(enrollment=self.enrollment, module=other_module)
+
+        content = self.contents[0]
+        content.module = other_module
+        content.save()
+
+        old_progress = ModuleProgress.objects.get(enrollment=self.enrollment, module=self.module)
+        new_progress = ModuleProgress.objects.get(enrollment=self.enrollment, module=other_module)
+        self.enrollment.refresh_from_db()
+        self.assertEqual((old_progress.completed_contents_count, old_progress.total_contents_count), (0, 2))
+        self.assertEqual((new_progress.completed_contents_count, new_progress.total_contents_count), (1, 1))
+        self.assertEqual((self.enrollment.completed_contents_count, self.enrollment.total_contents_count), (1, 3))
+
+    def test_reconcile_command_repairs_drift(self):
+        self.complete(self.contents[0])
+        CourseEnrollment.objects.filter(pk=self.enrollment.pk).update(
+            completed_contents_count=7, total_contents_count=0
+        )
+        ModuleProgress.objects.filter(enrollment=self.enrollment).update(completed_contents_count=5)
+
+        call_command('reconcile_progress_counters', stdout=StringIO())
+
+        self.enrollment.refresh_from_db()
+        module_progress = ModuleProgress.objects.get(enrollment=self.enrollment, module=self.module)
+        self.assertEqual((self.enrollment.completed_contents_count, self.enrollment.total_contents_count), (1, 3))
+        self.assertEqual((module_progress.completed_contents_count, module_progress.total_contents_count), (1, 3))
+
+
+class CourseOutlineTestCase(TestCase):
+    """Course outline is cached and invalidated on structure changes"""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='instructor', password='testpass')
+        self.subject = Subject.objects.create(title='Test Subject', slug='test-subject')
+        self.course = Course.objects.create(
+            owner=self.user,
+            subject=self.subject,
+            title='Test Course',
+            slug='test-course',
+            overview='Test',
+            is_free=True
+        )
+        self.module = Module.objects.create(course=self.course, title='Module 1')
+        self.contents = [Content.objects.create(module=self.module, title=f'Lesson {i}') for i in range(2)]
+
+    def test_outline_is_cached(self):
+        outline = get_course_outline(self.course)
+        self.assertEqual(outline.content_ids, [c.pk for c in self.contents])
+        with self.assertNumQueries(0):
+            cached = get_course_outline(self.course)
+        self.assertEqual(cached.modules, outline.modules)
+
+    def test_content_save_invalidates_outline(self):
+        get_course_outline(self.course)
+        Content.objects.create(module=self.module, title='Lesson 2')
+        self.assertEqual(len(get_course_outline(self.course).contents), 3)
+
+        self.contents[0].delete()
+        self.assertEqual(len(get_course_outline(self.course).contents), 2)
+
+    def test_reorder_invalidates_outline(self):
+        get_course_outline(self.course)
+        self.client.force_login(self.user)
+        self.client.post(
+            reverse('content_order'),
+            data={str(self.contents[0].pk): 5, str(self.contents[1].pk): 1},
+            content_type='application/json'
+        )
+        self.assertEqual(
+            get_course_outline(self.course).content_ids,
+            [self.contents[1].pk, self.contents[0].pk]
+        )
+
+    def test_navigation_crosses_module_boundaries(self):
+        empty = Module.objects.create(course=self.course, title='Module 2')
+        last = Module.objects.create(course=self.course, title='Module 3')
+        final = Content.objects.create(module=last, title='Lesson 3')
+        outline = get_course_outline(self.course)
+
+        with self.assertNumQueries(0):
+            self.assertEqual(outline.get_next_content(self.contents[1].pk)['id'], final.pk)
+            self.assertEqual(outline.get_previous_content(final.pk)['id'], self.contents[1].pk)
+            self.assertIsNone(outline.get_previous_content(self.contents[0].pk))
+            self.assertIsNone(outline.get_next_content(final.pk))
+            self.assertEqual(outline.get_next_module(self.module.pk)['id'], empty.pk)
+            self.assertIsNone(outline.get_previous_module(self.module.pk))
+            self.assertIsNone(outline.get_first_content(empty.pk))
+
+        self.assertEqual(self.module.get_next_in_order(), empty)
+        self.assertEqual(last.get_first_content(), final)
+
+    def test_content_view_navigation(self):
+        student = User.objects.create_user(username='student', password='testpass')
+        enrollment = CourseEnrollment.objects.create(student=student, course=self.course, status='enrolled')
+        ModuleProgress.objects.create(enrollment=enrollment, module=self.module, is_completed=True)
+        next_module = Module.objects.create(course=self.course, title='Module 2')
+        next_content = Content.objects.create(module=next_module, title='Lesson 2')
+        self.assertEqual(enrollment.get_current_module(), next_module)
+
+        self.client.force_login(student)
+        response = self.client.get(
+            reverse('student_content_view', args=[self.course.pk, self.module.pk, self.contents[1].pk])
+        )
+        self.assertEqual(response.context['previous_content']['id'], self.contents[0].pk)
+        self.assertEqual(response.context['next_content']['id'], next_content.pk)
+        self.assertEqual(response.context['next_module']['id'], next_module.pk)
+
+    def test_course_detail_navigation(self):
+        student = User.objects.create_user(username='learner', password='testpass')
+        CourseEnrollment.objects.create(student=student, course=self.course, status='enrolled')
+        next_module = Module.objects.create(course=self.course, title='Module 2')
+
+        self.client.force_login(student)
+        response = self.client.get(reverse('student_course_detail_module', args=[self.course.pk, self.module.pk]))
+        self.assertEqual(response.status_code, 200)
+        self.assertIsNone(response.context['previous_module'])
+        self.assertEqual(response.context['next_module']['id'], next_module.pk)
+        self.assertContains(
+            response, reverse('student_course_detail_module', args=[self.course.pk, next_module.pk])
+        )
+
+
+class ContentWithItemsTestCase(TestCase):
+    """Content items are loaded with one query per item type"""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='instructor', password='testpass')
+        self.subject = Subject.objects.create(title='Test Subject', slug='test-subject')
+        self.course = Course.objects.create(
+            owner=self.user,
+            subject=self.subject,
+            title='Test Course',
+            slug='test-course',
+            overview='Test',
+            is_free=True
+        )
+        self.module = Module.objects.create(course=self.course, title='Module 1')
+        for i in range(3):
+            content = Content.objects.create(module=self.module, title=f'Lesson {i}')
+            video = Video.objects.create(owner=self.user, title=f'Video {i}', url='https://youtu.be/dQw4w9WgXcQ')
+            text = Text.objects.create(owner=self.user, title=f'Text {i}', content='Body')
+            ContentItem.objects.create(content=content, item=video)
+            ContentItem.objects.create(content=content, item=text)
+        # Content types are cached per process, warm them like a running server
+        ContentType.objects.get_for_models(Video, Text)
+
+    def test_with_items_query_count(self):
+        # contents, content items, videos, texts
+        with self.assertNumQueries(4):
+            contents = list(Content.objects.filter(module=self.module).with_items())
+            items = [content_item.item for content in contents for content_item in content.items.all()]
+
+        self.assertEqual([item.title for item in items[:2]], ['Video 0', 'Text 0'])
+        with self.assertNumQueries(0):
+            self.assertEqual([c.get_first_item().title for c in contents], ['Video 0', 'Video 1', 'Video 2'])
+            self.assertEqual({c.get_primary_content_type() for c in contents}, {'video'})
+
+    def test_first_item_without_prefetch(self):
+        content = Content.objects.filter(module=self.module).first()
+        self.assertEqual(content.get_primary_content_type(), 'video')
+        self.assertEqual(content.get_first_item().title, 'Video 0')
+
+
+class RenderedContentTestCase(TestCase):
+    """Rendered item HTML is cached per item version"""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='instructor', password='testpass')
+
+    def test_text_rendered_on_save(self):
+        text = Text.objects.create(owner=self.user, title='Intro', content='# Hello\n\n*world*')
+        self.assertIn('<em>world</em>', text.rendered_html)
+
+        text.content = '**bold**'
+        text.save(update_fields=['content'])
+        text.refresh_from_db()
+        self.assertIn('<strong>bold</strong>', text.rendered_html)
+
+    def test_text_rendered_only_when_content_changes(self):
+        with mock.patch('courses.models.prerender_markdown', return_value='<p>Body</p>') as prerender:
+            text = Text.objects.create(owner=self.user, title='Intro', content='Body')
+            text.title = 'Renamed'
+            text.save()
+            text.save(update_fields=['title'])
+            prerender.assert_called_once_with('Body')
+
+            text.content = 'New body'
+            text.save()
+            self.assertEqual(prerender.call_count, 2)
+
+    def test_render_failure_falls_back_to_display_time(self):
+        with mock.patch('courses.rendering.render_markdown', side_effect=KeyError('configs')), \
+                self.assertLogs('courses.rendering', 'ERROR'):
+            text = Text.objects.create(owner=self.user, title='Intro', content='*world*')
+        self.assertEqual(Text.objects.get(pk=text.pk).rendered_html, '')
+
+        with mock.patch('courses.templatetags.course.render_markdown', return_value='<em>world</em>'):
+            self.assertIn('<em>world</em>', render_item(text))
+
+    def test_render_is_cached_until_item_changes(self):
+        video = Video.objects.create(owner=self.user, title='Lesson', url='https://youtu.be/dQw4w9WgXcQ')
+        html = video.render()
+        self.assertIn('Lesson', html)
+
+        with mock.patch('courses.rendering.render_to_string') as render_to_string:
+            self.assertEqual(video.render(), html)
+        render_to_string.assert_not_called()
+
+        video.title = 'Renamed lesson'
+        video.save()
+        self.assertIn('Renamed lesson', video.render())
+
+
+class CompletionBitmapTestCase(TestCase):
+    """Completion bitmap helpers and their sync with ContentProgress"""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='student', password='testpass')
+        self.subject = Subject.objects.create(title='Test Subject', slug='test-subject')
+        self.course = Course.objects.create(
+            owner=self.user,
+            subject=self.subject,
+            title='Test Course',
+            slug='test-course',
+            overview='Test',
+            is_free=True
+        )
+        self.module = Module.objects.create(course=self.course, title='Module 1')
+        self.contents = [Content.objects.create(module=self.module, title=f'Lesson {i}') for i in range(10)]
+        self.enrollment = CourseEnrollment.objects.create(
+            student=self.user,
+            course=self.course,
+            status='enrolled',
+            payment_status='free'
+        )
+
+    def complete(self, content):
+        progress, _ = ContentProgress.objects.get_or_create(enrollment=self.enrollment, content=content)
+        progress.enrollment = self.enrollment
+        return progress.mark_completed()
+
+    def test_bit_operations(self):
+        bitmap = CompletionBitmap()
+        for position in (0, 3, 9):
+            bitmap.set(position)
+        self.assertTrue(bitmap.is_set(9))
+        self.assertFalse(bitmap.is_set(4))
+        self.assertFalse(bitmap.is_set(100))
+        self.assertEqual(bitmap.count(), 3)
+        self.assertEqual(bitmap.count(size=4), 2)
+        self.assertEqual(bitmap.first_unset(10), 1)
+        self.assertEqual(CompletionBitmap(bitmap.to_bytes()), bitmap)
+
+        full = CompletionBitmap.from_positions(range(8))
+        self.assertEqual(full.first_unset(8), None)
+        self.assertEqual(full.first_unset(9), 8)
+
+    def test_mark_completed_sets_bit(self):
+        self.complete(self.contents[0])
+        self.complete(self.contents[9])
+        self.enrollment.refresh_from_db()
+
+        with self.assertNumQueries(0):
+            bitmap = self.enrollment.get_completion_bitmap()
+        self.assertEqual(bitmap.count(), 2)
+        self.assertTrue(self.enrollment.is_content_completed(self.contents[9].pk))
+        self.assertEqual(self.enrollment.get_next_incomplete_content()['id'], self.contents[1].pk)
+
+    def test_bitmap_rebuilt_when_outline_changes(self):
+        self.complete(self.contents[1])
+        self.contents[0].delete()
+        self.enrollment.refresh_from_db()
+
+        bitmap = self.enrollment.get_completion_bitmap()
+        self.assertTrue(bitmap.is_set(0))
+        self.assertEqual(bitmap.count(), 1)
+        self.assertEqual(self.enrollment.get_next_incomplete_content()['id'], self.contents[2].pk)
+
+
+class InstructorStudentsOverviewTestCase(TestCase):
+    """Students overview is built from grouped aggregates"""
+
+    def setUp(self):
+        self.instructor = User.objects.create_user(username='instructor', password='testpass')
+        self.subject = Subject.objects.create(title='Test Subject', slug='test-subject')
+        self.courses = [
+            Course.objects.create(
+                owner=self.instructor,
+                subject=self.subject,
+                title=f'Course {i}',
+                slug=f'course-{i}',
+                overview='Test',
+                is_free=True
+            )
+            for i in range(2)
+        ]
+        self.url = reverse('instructor_students_overview')
+        self.client.force_login(self.instructor)
+
+    def enroll_students(self, count, offset=0):
+        for i in range(offset, offset + count):
+            student = User.objects.create_user(username=f'student{i}', password='testpass')
+            for course in self.courses:
+                CourseEnrollment.objects.create(student=student, course=course, status='enrolled')
+
+    def test_statistics(self):
+        self.enroll_students(2)
+        CourseEnrollment.objects.filter(course=self.courses[0]).update(status='completed', progress_percentage=100)
+
+        response = self.client.get(self.url)
+
+        self.assertEqual(response.context['total_students'], 2)
+        self.assertEqual(response.context['total_enrollments'], 4)
+        self.assertEqual(response.context['completed_enrollments'], 2)
+        self.assertEqual(response.context['avg_progress'], 50)
+        student_data = response.context['students_data'][0]
+        self.assertEqual(student_data['total_courses'], 2)
+        self.assertEqual(student_data['completed_courses'], 1)
+        self.assertEqual(len(student_data['enrollments']), 2)
+        course_data = {d['course'].pk: d for d in response.context['courses_data']}
+        self.assertEqual(course_data[self.courses[0].pk]['completed_students'], 2)
+
+    def test_query_count_does_not_grow_with_students(self):
+        self.enroll_students(2)
+        self.client.get(self.url)  # warm site-wide settings cache
+        with CaptureQueriesContext(connection) as small:
+            self.client.get(self.url)
+        self.enroll_students(8, offset=2)
+        with CaptureQueriesContext(connection) as large:
+            response = self.client.get(self.url)
+        self.assertEqual(len(small), len(large))
+        self.assertEqual(response.context['students_data'].paginator.count, 10)
+
+
+class InstructorCourseStudentsTestCase(TestCase):
+    """Course students page is annotated and paginated in SQL"""
+
+    def setUp(self):
+        self.instructor = User.objects.create_user(username='instructor', password='testpass')
+        self.subject = Subject.objects.create(title='Test Subject', slug='test-subject')
+        self.course = Course.objects.create(
+            owner=self.instructor,
+            subject=self.subject,
+            title='Test Course',
+            slug='test-course',
+            overview='Test',
+            is_free=True
+        )
+        self.module = Module.objects.create(course=self.course, title='Module 1')
+        self.content = Content.objects.create(module=self.module, title='Lesson')
+        self.url = reverse('instructor_course_students', args=[self.course.pk])
+        self.client.force_login(self.instructor)
+
+    def enroll_students(self, count, offset=0):
+        enrollments = []
+        for i in range(offset, offset + count):
+            student = User.objects.create_user(username=f'student{i}', password='testpass')
+            enrollment = CourseEnrollment.objects.create(student=student, course=self.course, status='enrolled')
+            for _ in range(7):
+                LearningSession.objects.create(enrollment=enrollment, content=self.content)
+            enrollments.append(enrollment)
+        return enrollments
+
+    def test_student_details(self):
+        enrollment = self.enroll_students(2)[0]
+        progress = ContentProgress.objects.create(enrollment=enrollment, content=self.content)
+        progress.mark_completed()
+
+        response = self.client.get(self.url)
+
+        details = {d['enrollment'].pk: d for d in response.context['students_detailed']}
+        self.assertEqual(details[enrollment.pk]['completed_modules'], 1)
+        self.assertEqual(details[enrollment.pk]['completed_contents'], 1)
+        self.assertEqual(details[enrollment.pk]['total_contents'], 1)
+        self.assertEqual(len(details[enrollment.pk]['recent_sessions']), 5)
+        self.assertEqual(response.context['modules_stats'][0]['completed_count'], 1)
+        self.assertEqual(response.context['modules_stats'][0]['completion_rate'], 50)
+
+    def test_query_count_does_not_grow_with_students(self):
+        self.enroll_students(2)
+        self.client.get(self.url)  # warm site-wide settings cache
+        with CaptureQueriesContext(connection) as small:
+            self.client.get(self.url)
+        self.enroll_students(8, offset=2)
+        with CaptureQueriesContext(connection) as large:
+            response = self.client.get(self.url)
+        self.assertEqual(len(small), len(large))
+        self.assertEqual(response.context['students_detailed'].paginator.count, 10)
+
+
+class CourseStatsRollupTestCase(TestCase):
+    """Course analytics rollup is maintained incrementally and matches a full refresh"""
+
+    fields = [
+        'total_students', 'active_students', 'completed_students', 'paused_students', 'progress_sum',
+        'total_modules', 'total_contents', 'total_sessions', 'module_completions', 'total_orders', 'total_revenue',
+    ]
+
+    def setUp(self):
+        self.instructor = User.objects.create_user(username='instructor', password='testpass')
+        self.subject = Subject.objects.create(title='Test Subject', slug='test-subject')
+        self.course = Course.objects.create(
+            owner=self.instructor,
+            subject=self.subject,
+            title='Test Course',
+            slug='test-course',
+            overview='Test',
+            is_free=True
+        )
+        self.module = Module.objects.create(course=self.course, title='Module 1')
+        self.contents = [Content.objects.create(module=self.module, title=f'Lesson {i}') for i in range(2)]
+        self.rollup = CourseStatsService.get_rollup(self.course)
+
+    def enroll(self, username):
+        student = User.objects.create_user(username=username, password='testpass')
+        return CourseEnrollment.objects.create(student=student, course=self.course, status='enrolled')
+
+    def assertMatchesRefresh(self):
+        incremental = CourseStatsRollup.objects.get(course=self.course)
+        refreshed = CourseStatsService.refresh(self.course)
+        for field in self.fields:
+            self.assertEqual(getattr(incremental, field), getattr(refreshed, field), field)
+
+    def test_incremental_updates_match_refresh(self):
+        first = self.enroll('student1')
+        second = self.enroll('student2')
+        for content in self.contents:
+            progress = ContentProgress.objects.create(enrollment=first, content=content)
+            progress.enrollment = first
+            progress.mark_completed()
+        LearningSession.objects.create(enrollment=second, content=self.contents[0])
+        second.status = 'paused'
+        second.save()
+        Module.objects.create(course=self.course, title='Module 2')
+        Content.objects.create(module=self.module, title='Lesson 3')
+
+        incremental = CourseStatsRollup.objects.get(course=self.course)
+        self.assertEqual(incremental.total_students, 2)
+        self.assertEqual(incremental.completed_students, 1)
+        self.assertEqual(incremental.paused_students, 1)
+        self.assertEqual(incremental.get_module_completed_count(self.module.pk), 1)
+        self.assertMatchesRefresh()
+
+        second.delete()
+        self.module.delete()
+        self.assertMatchesRefresh()
+
+    def test_subscription_pause_and_restore_match_refresh(self):
+        subscriber = User.objects.create_user(username='subscriber', password='testpass')
+        CourseEnrollment.objects.create(
+            student=subscriber, course=self.course, status='enrolled', access_type='subscription'
+        )
+
+        EnrollmentService.revoke_subscription_access(subscriber)
+        self.assertEqual(CourseStatsRollup.objects.get(course=self.course).paused_students, 1)
+        self.assertMatchesRefresh()
+
+        EnrollmentService.restore_subscription_access(subscriber, None)
+        self.assertEqual(CourseStatsRollup.objects.get(course=self.course).active_students, 1)
+        self.assertMatchesRefresh()
+
+    def test_views_read_rollup(self):
+        self.enroll('student1')
+        request = RequestFactory().get('/')
+        request.user = self.instructor
+
+        response = InstructorCourseAnalyticsView.as_view()(request, pk=self.course.pk)
+        response.context = response.context_data
+
+        self.assertEqual(response.context['total_students'], 1)
+        self.assertEqual(response.context['active_students'], 1)
+        self.assertEqual(response.context['modules_data'][0]['total_contents'], 2)
+
+    def test_refresh_command(self):
+        CourseStatsRollup.objects.filter(course=self.course).update(total_students=42)
+        call_command('refresh_course_stats', stdout=StringIO())
+        self.assertEqual(CourseStatsRollup.objects.get(course=self.course).total_students, 0)
+
+
+class ResolveAccessBulkTestCase(TestCase):
+    """Access for many courses is resolved in a constant number of queries"""
+
+    def setUp(self):
+        cache.clear()
+        self.instructor = User.objects.create_user(username='instructor', password='testpass')
+        self.student = User.objects.create_user(username='student', password='testpass')
+        self.subject = Subject.objects.create(title='Test Subject', slug='test-subject')
+
+    def create_course(self, slug, **kwargs):
+        defaults = {'owner': self.instructor, 'is_free': True, 'pricing_type': 'free'}
+        defaults.update(kwargs)
+        return Course.objects.create(subject=self.subject, title=slug, slug=slug, overview='Test', **defaults)
+
+    def test_reasons(self):
+        free = self.create_course('free')
+        paid = self.create_course('paid', is_free=False, price=100, pricing_type='one_time')
+        pending = self.create_course('pending', is_free=False, price=100, pricing_type='one_time')
+        other = self.create_course('other', is_free=False, price=100, pricing_type='one_time')
+        own = self.create_course('own', owner=self.student)
+        CourseEnrollment.objects.create(student=self.student, course=free, status='enrolled')
+        CourseEnrollment.objects.create(
+            student=self.student, course=paid, status='enrolled', payment_status='paid', payment_amount=100
+        )
+        CourseEnrollment.objects.create(student=self.student, course=pending, status='enrolled')
+
+        access = CourseAccessService.resolve_access_bulk(self.student, [free, paid, pending, other, own])
+
+        self.assertEqual(access[free.pk], (True, 'free'))
+        self.assertEqual(access[paid.pk], (True, 'purchased'))
+        self.assertEqual(access[pending.pk], (False, 'payment_pending'))
+        self.assertEqual(access[other.pk], (False, 'not_enrolled'))
+        self.assertEqual(access[own.pk], (True, 'owner'))
+        for course in [free, paid, pending, other, own]:
+            self.assertEqual(course.user_has_access(self.student), access[course.pk][0])
+
+    def test_query_count_is_constant(self):
+        courses = [self.create_course(f'course-{i}', pricing_type='both', is_free=False, price=100) for i in range(5)]
+        for course in courses[:3]:
+            CourseEnrollment.objects.create(student=self.student, course=course, status='enrolled')
+
+        with self.assertNumQueries(2):
+            access = CourseAccessService.resolve_access_bulk(self.student, courses)
+        self.assertEqual(access[courses[0].pk], (False, 'payment_pending'))
+
+    def test_student_course_list_marks_access(self):
+        free = self.create_course('free')
+        pending = self.create_course('pending', is_free=False, price=100, pricing_type='one_time')
+        CourseEnrollment.objects.create(student=self.student, course=free, status='enrolled')
+        CourseEnrollment.objects.create(student=self.student, course=pending, status='enrolled')
+        self.client.force_login(self.student)
+
+        response = self.client.get(reverse('student_course_list'))
+
+        has_access = {e.course_id: e.has_access for e in response.context['enrollments']}
+        self.assertEqual(has_access, {free.pk: True, pending.pk: False})
+        self.assertEqual(response.context['accessible_courses'], 1)
+
+
+class LearningSessionServiceTestCase(TestCase):
+    """Learning sessions are coalesced in the cache and flushed in batches"""
+
+    def setUp(self):
+        cache.clear()
+        self.instructor = User.objects.create_user(username='instructor', password='testpass')
+        self.student = User.objects.create_user(username='student', password='testpass')
+        self.subject = Subject.objects.create(title='Test Subject', slug='test-subject')
+        self.course = Course.objects.create(
+            owner=self.instructor,
+            subject=self.subject,
+            title='Test Course',
+            slug='test-course',
+            overview='Test',
+            status='published',
+            is_free=True
+        )
+        self.module = Module.objects.create(course=self.course, title='Module 1')
+        self.content = Content.objects.create(module=self.module, title='Lesson')
+        self.enrollment = CourseEnrollment.objects.create(student=self.student, course=self.course, status='enrolled')
+        self.now = timezone.now()
+
+    def at(self, minutes):
+        return mock.patch('courses.session_service.timezone.now', return_value=self.now + timedelta(minutes=minutes))
+
+    def test_page_views_are_coalesced(self):
+        self.client.force_login(self.student)
+        url = reverse('student_content_view', args=[self.course.pk, self.module.pk, self.content.pk])
+        for _ in range(3):
+            self.client.get(url)
+        self.assertFalse(LearningSession.objects.exists())
+
+        LearningSessionService.close(self.enrollment, self.content)
+        self.assertEqual(LearningSessionService.flush(), 1)
+        self.assertEqual(LearningSession.objects.count(), 1)
+        self.assertEqual(CourseStatsService.get_rollup(self.course).total_sessions, 1)
+
+    def test_flush_writes_closed_and_idle_sessions(self):
+        CourseStatsService.refresh(self.course)
+        other = Content.objects.create(module=self.module, title='Other lesson')
+        with self.at(0):
+            LearningSessionService.touch(self.enrollment, self.content)
+            LearningSessionService.touch(self.enrollment, other)
+        with self.at(10):
+            LearningSessionService.touch(self.enrollment, self.content)
+        with self.at(15):
+            session = LearningSessionService.close(self.enrollment, self.content)
+        self.assertEqual(session.ended_at - session.started_at, timedelta(minutes=15))
+
+        with self.at(20):
+            self.assertEqual(LearningSessionService.flush(), 1)
+            self.assertEqual(LearningSessionService.pending_count(), 0)
+        with self.at(60):
+            # The other session went idle and ends at its last activity
+            self.assertEqual(LearningSessionService.flush(), 1)
+            self.assertEqual(LearningSessionService.pending_count(), 0)
+
+        idle = LearningSession.objects.get(content=other)
+        self.assertEqual(idle.started_at, idle.ended_at)
+        self.assertEqual(CourseStatsService.get_rollup(self.course).total_sessions, 2)
+
+    def test_long_open_session_does_not_hold_back_others(self):
+        other = Content.objects.create(module=self.module, title='Other lesson')
+        with self.at(0):
+            LearningSessionService.touch(self.enrollment, self.content)
+        for minute in range(1, 100, 10):
+            with self.at(minute):
+                # The first session keeps heartbeating while others open and close
+                LearningSessionService.touch(self.enrollment, self.content)
+                LearningSessionService.touch(self.enrollment, other)
+                LearningSessionService.close(self.enrollment, other)
+                self.assertEqual(LearningSessionService.pending_count(), 1)
+                self.assertEqual(LearningSessionService.flush(), 1)
+                self.assertEqual(LearningSessionService.pending_count(), 0)
+
+        with self.at(100):
+            LearningSessionService.close(self.enrollment, self.content)
+            self.assertEqual(LearningSessionService.flush(), 1)
+        session = LearningSession.objects.get(content=self.content)
+        self.assertEqual(session.ended_at - session.started_at, timedelta(minutes=100))
+
+    def test_idle_session_is_replaced(self):
+        with self.at(0):
+            first = LearningSessionService.touch(self.enrollment, self.content)
+        with self.at(45):
+            second = LearningSessionService.touch(self.enrollment, self.content)
+        self.assertNotEqual(first.started_at, second.started_at)
+        with self.at(50):
+            LearningSessionService.close(self.enrollment, self.content)
+            self.assertEqual(LearningSessionService.flush(), 2)
+
+    def test_concurrent_first_views_start_one_session(self):
+        # Both requests read the open key before either claimed it
+        key = _open_key(self.enrollment.pk, self.content.pk)
+        entry = {
+            'enrollment_id': self.enrollment.pk,
+            'course_id': self.course.pk,
+            'content_id': self.content.pk,
+            'started_at': self.now,
+            'ended_at': None,
+            'last_seen': self.now,
+        }
+        first, _ = LearningSessionService._start(key, None, dict(entry))
+        second, _ = LearningSessionService._start(key, None, dict(entry))
+        self.assertEqual(first, second)
+
+        # Replacing an ended session is claimed the same way
+        with self.at(45):
+            LearningSessionService.touch(self.enrollment, self.content)
+        third, _ = LearningSessionService._start(key, first, dict(entry))
+        self.assertNotEqual(third, first)
+        self.assertEqual(cache.get(key), third)
+
+        with self.at(50):
+            LearningSessionService.close(self.enrollment, self.content)
+            LearningSessionService.flush()
+        self.assertEqual(LearningSession.objects.count(), 2)
+
+    def test_activity_flushes_after_interval(self):
+        with self.at(0):
+            LearningSessionService.touch(self.enrollment, self.content)
+            LearningSessionService.close(self.enrollment, self.content)
+        self.assertEqual(LearningSessionService.pending_count(), 1)
+
+        # The interval since the last flush has passed
+        cache.delete(_FLUSH_DUE_KEY)
+        with self.at(1):
+            LearningSessionService.touch(self.enrollment, self.content)
+        self.assertEqual(LearningSessionService.pending_count(), 0)
+        self.assertEqual(LearningSession.objects.count(), 1)
+
+
+class DailyLearningTimeTestCase(TestCase):
+    """Learning time totals and streaks come from the daily rollup"""
+
+    def setUp(self):
+        cache.clear()
+        self.instructor = User.objects.create_user(username='instructor', password='testpass')
+        self.student = User.objects.create_user(username='student', password='testpass')
+        self.subject = Subject.objects.create(title='Test Subject', slug='test-subject')
+        self.course = Course.objects.create(
+            owner=self.instructor,
+            subject=self.subject,
+            title='Test Course',
+            slug='test-course',
+            overview='Test',
+            status='published',
+            is_free=True
+        )
+        self.module = Module.objects.create(course=self.course, title='Module 1')
+        self.content = Content.objects.create(module=self.module, title='Lesson')
+        self.enrollment = CourseEnrollment.objects.create(student=self.student, course=self.course, status='enrolled')
+        # Freeze the clock at local midday, so minutes-ago and days-ago sessions never straddle midnight
+        self.now = timezone.localtime().replace(hour=12, minute=0, second=0, microsecond=0)
+        clock = mock.patch('django.utils.timezone.now', return_value=self.now)
+        clock.start()
+        self.addCleanup(clock.stop)
+
+    def create_session(self, days_ago, minutes):
+        started_at = self.now - timedelta(days=days_ago)
+        return LearningSession.objects.create(
+            enrollment=self.enrollment,
+            content=self.content,
+            started_at=started_at,
+            ended_at=started_at + timedelta(minutes=minutes)
+        )
+
+    def test_ended_sessions_are_recorded(self):
+        session = LearningSession.objects.create(
+            enrollment=self.enrollment, content=self.content, started_at=self.now - timedelta(minutes=20)
+        )
+        session.end_session()
+        LearningTimeService.record([self.create_session(1, 10)])
+
+        summary = LearningTimeService.get_summary(student=self.student)
+        self.assertEqual(summary['total_sessions'], 2)
+        self.assertEqual(summary['current_streak'], 2)
+        self.assertAlmostEqual(summary['total_seconds'], 30 * 60, delta=5)
+
+    def test_streak_requires_recent_activity(self):
+        LearningTimeService.record([self.create_session(days, 5) for days in (2, 3, 5)])
+        self.assertEqual(LearningTimeService.get_summary(enrollment=self.enrollment)['current_streak'], 0)
+
+        LearningTimeService.record([self.create_session(1, 5)])
+        self.assertEqual(LearningTimeService.get_summary(enrollment=self.enrollment)['current_streak'], 3)
+
+    def test_backfill_command(self):
+        for days in (0, 0, 1):
+            self.create_session(days, 15)
+        call_command('backfill_learning_time', stdout=StringIO())
+
+        summary = LearningTimeService.get_summary(student=self.student)
+        self.assertEqual(summary['total_seconds'], 45 * 60)
+        self.assertEqual(summary['current_streak'], 2)
+        self.assertEqual(DailyLearningTime.objects.count(), 2)
+
+    def test_dashboard_reads_rollup(self):
+        LearningTimeService.record([self.create_session(0, 90)])
+        self.client.force_login(self.student)
+
+        response = self.client.get(reverse('student_dashboard'))
+
+        self.assertEqual(response.context['total_learning_time'], 1.5)
+        self.assertEqual(response.context['learning_streak'], 1)
+
+
+class SessionRetentionTestCase(TestCase):
+    """Old learning sessions are summarized, archived and deleted"""
+
+    def setUp(self):
+        cache.clear()
+        media_root = tempfile.TemporaryDirectory()
+        self.addCleanup(media_root.cleanup)
+        settings_override = self.settings(MEDIA_ROOT=media_root.name)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        self.instructor = User.objects.create_user(username='instructor', password='testpass')
+        self.student = User.objects.create_user(username='student', password='testpass')
+        self.subject = Subject.objects.create(title='Test Subject', slug='test-subject')
+        self.course = Course.objects.create(
+            owner=self.instructor,
+            subject=self.subject,
+            title='Test Course',
+            slug='test-course',
+            overview='Test',
+            is_free=True
+        )
+        self.module = Module.objects.create(course=self.course, title='Module 1')
+        self.content = Content.objects.create(module=self.module, title='Lesson')
+        self.enrollment = CourseEnrollment.objects.create(student=self.student, course=self.course, status='enrolled')
+        now = timezone.now()
+        for days_ago in (400, 300, 300, 1):
+            LearningSession.objects.create(
+                enrollment=self.enrollment,
+                content=self.content,
+                started_at=now - timedelta(days=days_ago),
+                ended_at=now - timedelta(days=days_ago) + timedelta(minutes=10)
+            )
+
+    def test_archive_keeps_recent_sessions_and_summaries(self):
+        CourseStatsService.refresh(self.course)
+        out = StringIO()
+        call_command('archive_learning_sessions', days=180, batch_size=2, stdout=out)
+
+        self.assertIn('Archived 3 learning session(s) to 2 file(s)', out.getvalue())
+        self.assertEqual(LearningSession.objects.count(), 1)
+        self.assertEqual(CourseStatsService.get_rollup(self.course).total_sessions, 1)
+
+        # Archived days are summarized before their sessions are deleted
+        summary = LearningTimeService.get_summary(enrollment=self.enrollment)
+        self.assertEqual(summary['total_sessions'], 3)
+        self.assertEqual(summary['total_seconds'], 30 * 60)
+
+        # Backfilling later must not drop the summaries of archived days
+        call_command('backfill_learning_time', stdout=StringIO())
+        self.assertEqual(LearningTimeService.get_summary(enrollment=self.enrollment)['total_sessions'], 4)
+
+    def test_archive_files_contain_sessions(self):
+        cutoff_date = SessionRetentionService.get_cutoff_date(180)
+        result = SessionRetentionService.archive(cutoff_date)
+
+        self.assertEqual(len(result['files']), 1)
+        with default_storage.open(result['files'][0]) as archive:
+            rows = [json.loads(line) for line in gzip.decompress(archive.read()).splitlines()]
+        self.assertEqual(len(rows), 3)
+        self.assertEqual({row['enrollment_id'] for row in rows}, {self.enrollment.pk})
+
+    def test_dry_run_deletes_nothing(self):
+        out = StringIO()
+        call_command('archive_learning_sessions', dry_run=True, stdout=out)
+        self.assertIn('3 learning session(s)', out.getvalue())
+        self.assertEqual(LearningSession.objects.count(), 4)
+
+
+class OrderingTestCase(TestCase):
+    """Positions are assigned per scope and bulk reorders use one UPDATE"""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='instructor', password='testpass')
+        self.subject = Subject.objects.create(title='Test Subject', slug='test-subject')
+        self.course = Course.objects.create(
+            owner=self.user,
+            subject=self.subject,
+            title='Test Course',
+            slug='test-course',
+            overview='Test',
+            is_free=True
+        )
+        self.modules = [Module.objects.create(course=self.course, title=f'Module {i}') for i in range(2)]
+
+    def test_positions_are_scoped(self):
+        first = [Content.objects.create(module=self.modules[0], title=f'Lesson {i}') for i in range(3)]
+        other = Content.objects.create(module=self.modules[1], title='Other')
+        self.assertEqual([c.order for c in first], [0, 1, 2])
+        self.assertEqual(other.order, 0)
+
+        first[2].delete()
+        with transaction.atomic():
+            self.assertEqual(Content.objects.create(module=self.modules[0], title='Next').order, 2)
+
+    def test_new_positions_are_assigned_in_a_transaction(self):
+        with mock.patch('courses.fields.transaction.atomic', wraps=transaction.atomic) as atomic:
+            Content.objects.create(module=self.modules[0], title='Lesson')
+            atomic.assert_called_once()
+            Content.objects.create(module=self.modules[0], title='Placed', order=5)
+            atomic.assert_called_once()
+
+    def test_apply_order_single_update(self):
+        contents = [Content.objects.create(module=self.modules[0], title=f'Lesson {i}') for i in range(5)]
+        orders = {str(content.pk): 4 - i for i, content in enumerate(contents)}
+
+        # Savepoint, SELECT of the allowed rows, one UPDATE, release
+        with self.assertNumQueries(4):
+            pks = apply_order(Content.objects.filter(module=self.modules[0]), orders)
+
+        self.assertEqual(sorted(pks), sorted(c.pk for c in contents))
+        self.assertEqual(
+            list(Content.objects.filter(module=self.modules[0]).values_list('pk', flat=True)),
+            [c.pk for c in reversed(contents)]
+        )
+
+    def test_reorder_ignores_foreign_rows(self):
+        other_user = User.objects.create_user(username='other', password='testpass')
+        self.client.force_login(other_user)
+        self.client.post(
+            reverse('module_order'),
+            data={str(self.modules[0].pk): 1, str(self.modules[1].pk): 0},
+            content_type='application/json'
+        )
+        self.assertEqual([m.order for m in Module.objects.filter(course=self.course)], [0, 1])
+
+
+class CloningServiceTestCase(TestCase):
+    """Courses, modules and contents are copied with bulk inserts"""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='instructor', password='testpass')
+        self.subject = Subject.objects.create(title='Test Subject', slug='test-subject')
+        self.course = self.create_course('test-course', contents=2)
+
+    def create_course(self, slug, contents):
+        course = Course.objects.create(
+            owner=self.user,
+            subject=self.subject,
+            title='Test Course',
+            slug=slug,
+            overview='Test',
+            status='published',
+            is_free=True
+        )
+        for m in range(2):
+            module = Module.objects.create(course=course, title=f'Module {m}')
+            for c in range(contents):
+                content = Content.objects.create(module=module, title=f'Lesson {m}.{c}')
+                video = Video.objects.create(owner=self.user, title='Video', url='https://youtu.be/dQw4w9WgXcQ')
+                image = Image.objects.create(owner=self.user, title='Image', file='images/lesson.png')
+                ContentItem.objects.create(content=content, item=video)
+                ContentItem.objects.create(content=content, item=image)
+        return course
+
+    def test_clone_course(self):
+        student = User.objects.create_user(username='student', password='testpass')
+        CourseEnrollment.objects.create(student=student, course=self.course, status='enrolled')
+        self.course.refresh_from_db()
+
+        copy = CloningService.clone_course(self.course, self.user)
+
+        self.assertEqual((copy.slug, copy.status, copy.title), ('test-course-copy', 'draft', 'Test Course (Copy)'))
+        self.assertEqual(Course.objects.get(pk=copy.pk).enrolled_count, 0)
+        self.assertEqual(
+            [(m.title, m.order) for m in copy.modules.all()],
+            [(m.title, m.order) for m in self.course.modules.all()]
+        )
+        self.assertEqual(len(get_course_outline(copy).content_ids), 4)
+        copied_items = ContentItem.objects.filter(content__module__course=copy)
+        self.assertEqual(copied_items.count(), 8)
+        self.assertFalse(set(copied_items.values_list('object_id', flat=True)) & set(
+            ContentItem.objects.filter(content__module__course=self.course).values_list('object_id', flat=True)
+        ))
+        image = Image.objects.get(pk=copied_items.filter(content_type__model='image').first().object_id)
+        self.assertEqual(image.file.name, 'images/lesson.png')
+
+        self.assertEqual(CloningService.clone_course(self.course, self.user).slug, 'test-course-copy-2')
+
+    def test_clone_course_query_count_is_constant(self):
+        large = self.create_course('large-course', contents=10)
+        with CaptureQueriesContext(connection) as small_queries:
+            CloningService.clone_course(self.course, self.user)
+        with CaptureQueriesContext(connection) as large_queries:
+            CloningService.clone_course(large, self.user)
+        self.assertEqual(len(small_queries), len(large_queries))
+
+    def test_clones_are_searchable(self):
+        def found(course, query):
+            return CourseSearchService.search(Course.objects.filter(pk=course.pk), query).exists()
+
+        copy = CloningService.clone_course(self.course, self.user)
+        self.assertTrue(found(copy, 'module'))
+
+        module = self.course.modules.first()
+        module.title = 'Decorators'
+        module.save()
+        other = Course.objects.create(
+            owner=self.user, subject=self.subject, title='Other', slug='other', overview='Test', is_free=True
+        )
+        CloningService.clone_module(module, self.user, course=other)
+        self.assertTrue(found(other, 'decorators'))
+
+    def test_clone_contents_updates_progress_totals(self):
+        student = User.objects.create_user(username='student', password='testpass')
+        enrollment = CourseEnrollment.objects.create(student=student, course=self.course, status='enrolled')
+        module = self.course.modules.first()
+
+        copies = CloningService.clone_contents(module.contents.all(), module, self.user)
+
+        self.assertEqual([c.title for c in copies], ['Lesson 0.0 (Copy)', 'Lesson 0.1 (Copy)'])
+        self.assertEqual([c.order for c in copies], [2, 3])
+        enrollment.refresh_from_db()
+        self.assertEqual(enrollment.total_contents_count, 6)
+        self.assertEqual(len(get_course_outline(self.course).content_ids), 6)
+
+    def test_clone_endpoints(self):
+        self.client.force_login(self.user)
+        response = self.client.post(reverse('course_clone', args=[self.course.pk]))
+        copy = Course.objects.get(slug='test-course-copy')
+        self.assertRedirects(response, reverse('course_edit', args=[copy.pk]), fetch_redirect_response=False)
+
+        response = self.client.post(f'/api/v1/courses/{self.course.slug}/clone/')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json()['data']['slug'], 'test-course-copy-2')
+
+        module = self.course.modules.first()
+        response = self.client.post(f'/api/v1/modules/{module.pk}/clone/')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(self.course.modules.last().contents.count(), 2)
+
+
+class ItemCleanupTestCase(TestCase):
+    """Items are deleted with their contents and unreferenced items are collected"""
+
+    def setUp(self):
+        cache.clear()
+        media_root = tempfile.TemporaryDirectory()
+        self.addCleanup(media_root.cleanup)
+        settings_override = self.settings(MEDIA_ROOT=media_root.name)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        self.user = User.objects.create_user(username='instructor', password='testpass')
+        self.subject = Subject.objects.create(title='Test Subject', slug='test-subject')
+        self.course = Course.objects.create(
+            owner=self.user,
+            subject=self.subject,
+            title='Test Course',
+            slug='test-course',
+            overview='Test',
+            is_free=True
+        )
+        self.module = Module.objects.create(course=self.course, title='Module 1')
+        self.contents = [Content.objects.create(module=self.module, title=f'Lesson {i}') for i in range(3)]
+        for content in self.contents:
+            self.add_image(content, f'images/{content.pk}.png')
+            ContentItem.objects.create(
+                content=content,
+                item=Video.objects.create(owner=self.user, title='Video', url='https://youtu.be/dQw4w9WgXcQ')
+            )
+
+    def add_image(self, content, name):
+        default_storage.save(name, ContentFile(b'png'))
+        image = Image.objects.create(owner=self.user, title='Image', file=name)
+        ContentItem.objects.create(content=content, item=image)
+        return image
+
+    def test_delete_contents_removes_items_and_files(self):
+        first = self.contents[0]
+        with self.captureOnCommitCallbacks(execute=True):
+            deleted = ItemCleanupService.delete_contents(Content.objects.filter(pk=first.pk))
+
+        self.assertEqual(deleted, 1)
+        self.assertEqual((Image.objects.count(), Video.objects.count()), (2, 2))
+        self.assertFalse(default_storage.exists(f'images/{first.pk}.png'))
+        self.assertTrue(default_storage.exists(f'images/{self.contents[1].pk}.png'))
+
+    def test_shared_files_are_kept(self):
+        CloningService.clone_contents(Content.objects.filter(pk=self.contents[0].pk), self.module, self.user)
+        with self.captureOnCommitCallbacks(execute=True):
+            ItemCleanupService.delete_contents(Content.objects.filter(pk=self.contents[0].pk))
+
+        self.assertTrue(default_storage.exists(f'images/{self.contents[0].pk}.png'))
+
+    def test_collect_orphaned_items(self):
+        # Items left behind by a cascading module delete
+        Module.objects.create(course=self.course, title='Module 2')
+        other = Content.objects.create(module=self.course.modules.last(), title='Lesson')
+        orphan = self.add_image(other, 'images/orphan.png')
+        other.module.delete()
+        Image.objects.filter(pk=orphan.pk).update(created=timezone.now() - timedelta(days=1))
+        fresh = Image.objects.create(owner=self.user, title='Uploading', file='images/fresh.png')
+
+        self.assertEqual(ItemCleanupService.collect(dry_run=True)['image'], 1)
+        with self.captureOnCommitCallbacks(execute=True):
+            counts = ItemCleanupService.collect(batch_size=1)
+
+        self.assertEqual(counts, {'text': 0, 'video': 0, 'image': 1, 'file': 0})
+        self.assertFalse(Image.objects.filter(pk=orphan.pk).exists())
+        self.assertTrue(Image.objects.filter(pk=fresh.pk).exists())
+        self.assertFalse(default_storage.exists('images/orphan.png'))
+        self.assertEqual(Image.objects.count(), 4)
+
+    def test_bulk_delete_view(self):
+        self.client.force_login(self.user)
+        response = self.client.post(
+            reverse('bulk_content_operations', args=[self.module.pk]),
+            {'operation': 'delete', 'content_ids': [c.pk for c in self.contents[:2]]}
+        )
+
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(list(self.module.contents.all()), [self.contents[2]])
+        self.assertEqual(ContentItem.objects.count(), 2)
+        self.assertEqual((Image.objects.count(), Video.objects.count()), (1, 1))
+
+    def test_collect_command(self):
+        out = StringIO()
+        call_command('collect_orphaned_items', '--dry-run', stdout=out)
+        self.assertIn('0 orphaned item(s) would be deleted', out.getvalue())
+
+
+class SeatReservationTestCase(TestCase):
+    """Course.enrolled_count follows enrollment transitions and guards max_capacity"""
+
+    def setUp(self):
+        cache.clear()
+        self.instructor = User.objects.create_user(username='instructor', password='testpass')
+        self.subject = Subject.objects.create(title='Test Subject', slug='test-subject')
+        self.course = Course.objects.create(
+            owner=self.instructor,
+            subject=self.subject,
+            title='Test Course',
+            slug='test-course',
+            overview='Test',
+            status='published',
+            is_free=True,
+            max_capacity=2
+        )
+        self.students = [User.objects.create_user(username=f'student{i}', password='testpass') for i in range(3)]
+
+    def reserve(self, student, **kwargs):
+        return EnrollmentService.reserve_seat(
+            student, self.course, {'status': 'enrolled', 'payment_status': 'free', 'access_type': 'free'}, **kwargs
+        )
+
+    def seats(self):
+        return Course.objects.values_list('enrolled_count', flat=True).get(pk=self.course.pk)
+
+    def test_counter_follows_status_transitions(self):
+        enrollment = CourseEnrollment.objects.create(student=self.students[0], course=self.course, status='enrolled')
+        CourseEnrollment.objects.create(student=self.students[1], course=self.course, status='pending')
+        self.assertEqual(self.seats(), 1)
+
+        enrollment.status = 'completed'
+        enrollment.save()
+        self.assertEqual(self.seats(), 1)
+        enrollment.status = 'withdrawn'
+        enrollment.save(update_fields=['status'])
+        self.assertEqual(self.seats(), 0)
+        enrollment.status = 'enrolled'
+        enrollment.save()
+        enrollment.delete()
+        self.assertEqual(self.seats(), 0)
+
+    def test_reserve_seat_enforces_capacity(self):
+        self.reserve(self.students[0])
+        self.reserve(self.students[1])
+        self.assertEqual(self.course.enrolled_count, 2)
+
+        with self.assertRaises(CourseFullError):
+            self.reserve(self.students[2])
+        self.assertFalse(CourseEnrollment.objects.filter(student=self.students[2]).exists())
+        self.assertEqual(self.seats(), 2)
+
+        self.reserve(self.students[2], enforce_capacity=False)
+        self.assertEqual(self.seats(), 3)
+
+    def test_capacity_checks_do_not_query(self):
+        self.reserve(self.students[0])
+        course = Course.objects.get(pk=self.course.pk)
+        with self.assertNumQueries(0):
+            self.assertEqual(course.get_available_spots(), 1)
+            self.assertFalse(course.is_full())
+
+    def test_enroll_view_waitlists_when_full(self):
+        self.reserve(self.students[0])
+        self.reserve(self.students[1])
+        self.client.force_login(self.students[2])
+
+        # Lose the race: the capacity pre-check passes, the reservation does not
+        with mock.patch.object(Course, 'is_full', return_value=False):
+            response = self.client.post(reverse('student_enroll_course', args=[self.course.pk]))
+
+        self.assertRedirects(response, reverse('course_detail', args=[self.course.slug]), fetch_redirect_response=False)
+        self.assertFalse(CourseEnrollment.objects.filter(student=self.students[2]).exists())
+        self.assertTrue(CourseWaitlist.objects.filter(course=self.course, student=self.students[2]).exists())
+
+    def test_refresh_recounts_seats(self):
+        self.reserve(self.students[0])
+        Course.objects.filter(pk=self.course.pk).update(enrolled_count=5)
+        CourseStatsService.refresh(self.course)
+        self.assertEqual(self.seats(), 1)
+
+
+class WaitlistServiceTestCase(TestCase):
+    """Waitlist positions come from a cached rank map and freed seats are promoted"""
+
+    def setUp(self):
+        cache.clear()
+        self.instructor = User.objects.create_user(username='instructor', password='testpass')
+        self.subject = Subject.objects.create(title='Test Subject', slug='test-subject')
+        self.course = Course.objects.create(
+            owner=self.instructor,
+            subject=self.subject,
+            title='Test Course',
+            slug='test-course',
+            overview='Test',
+            status='published',
+            is_free=True,
+            max_capacity=1
+        )
+        self.enrolled = User.objects.create_user(username='enrolled', password='testpass')
+        self.enrollment = CourseEnrollment.objects.create(student=self.enrolled, course=self.course, status='enrolled')
+        self.waiting = [User.objects.create_user(username=f'waiting{i}', password='testpass') for i in range(3)]
+        self.entries = [CourseWaitlist.objects.create(course=self.course, student=student) for student in self.waiting]
+
+    def test_positions_are_cached(self):
+        self.entries[2].priority = 0
+        self.entries[2].save()
+
+        self.assertEqual([e.get_position() for e in self.entries], [2, 3, 1])
+        with self.assertNumQueries(0):
+            self.assertEqual(self.entries[0].get_position(), 2)
+
+        late = CourseWaitlist.objects.create(course=self.course, student=self.instructor)
+        self.assertEqual(late.get_position(), 4)
+
+    def test_withdrawal_promotes_head_of_free_course(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.enrollment.status = 'withdrawn'
+            self.enrollment.save()
+
+        self.assertTrue(CourseEnrollment.objects.filter(
+            course=self.course, student=self.waiting[0], status='enrolled'
+        ).exists())
+        self.assertEqual([e.get_position() for e in self.course.waitlist_entries.all()], [1, 2])
+        self.assertEqual(Course.objects.get(pk=self.course.pk).enrolled_count, 1)
+
+    def test_paid_course_marks_offers_once(self):
+        Course.objects.filter(pk=self.course.pk).update(pricing_type='one_time', is_free=False, price=100, max_capacity=3)
+
+        promoted = WaitlistService.promote(self.course.pk)
+        self.assertEqual([entry.student for entry in promoted], self.waiting[:2])
+        self.assertEqual(
+            list(self.course.waitlist_entries.filter(notified_of_opening=True).values_list('student', flat=True)),
+            [student.pk for student in self.waiting[:2]]
+        )
+        self.assertEqual(WaitlistService.promote(self.course.pk), [])
+
+    def test_subscription_pause_frees_seat_and_restore_waits_for_one(self):
+        plan = SubscriptionPlan.objects.create(
+            name='Monthly', slug='monthly', price=Decimal('99000'), billing_cycle='monthly', is_active=True
+        )
+        subscription = SubscriptionService.create_subscription(self.enrolled, plan)
+        CourseEnrollment.objects.filter(pk=self.enrollment.pk).update(
+            access_type='subscription', subscription=subscription
+        )
+
+        with self.captureOnCommitCallbacks(execute=True):
+            EnrollmentService.revoke_subscription_access(self.enrolled)
+        replacement = CourseEnrollment.objects.get(course=self.course, student=self.waiting[0])
+        self.assertEqual(replacement.status, 'enrolled')
+
+        # Full again: the subscriber stays paused at the head of the queue
+        self.assertEqual(EnrollmentService.restore_subscription_access(self.enrolled, subscription), 0)
+        self.assertEqual(CourseEnrollment.objects.get(pk=self.enrollment.pk).status, 'paused')
+        self.assertEqual(self.course.waitlist_entries.get(student=self.enrolled).get_position(), 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            replacement.status = 'withdrawn'
+            replacement.save()
+        self.assertEqual(CourseEnrollment.objects.get(pk=self.enrollment.pk).status, 'enrolled')
+        self.assertFalse(self.course.waitlist_entries.filter(student=self.enrolled).exists())
+        self.assertEqual(Course.objects.get(pk=self.course.pk).enrolled_count, 1)
+
+    def test_offers_are_emailed_and_expire(self):
+        Course.objects.filter(pk=self.course.pk).update(pricing_type='one_time', is_free=False, price=100, max_capacity=2)
+        for student in self.waiting:
+            student.email = f'{student.username}@example.com'
+            student.save()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            WaitlistService.promote(self.course.pk)
+        self.assertEqual([message.to for message in mail.outbox], [['waiting0@example.com']])
+
+        CourseWaitlist.objects.filter(notified_of_opening=True).update(
+            offered_at=timezone.now() - OFFER_EXPIRY - timedelta(minutes=1)
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(WaitlistService.promote_all(), 1)
+
+        self.assertFalse(self.course.waitlist_entries.filter(student=self.waiting[0]).exists())
+        self.assertTrue(self.course.waitlist_entries.get(student=self.waiting[1]).notified_of_opening)
+        self.assertEqual(mail.outbox[-1].to, ['waiting1@example.com'])
+
+    def test_management_page(self):
+        self.client.force_login(self.instructor)
+        url = reverse('course_waitlist_management', args=[self.course.pk])
+
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([entry.position for entry in response.context['entries']], [1, 2, 3])
+
+        self.assertEqual(self.client.post(url).status_code, 302)
+
+
+class ResumePointerTestCase(TestCase):
+    """The enrollment stores where the student continues learning"""
+
+    def setUp(self):
+        cache.clear()
+        self.instructor = User.objects.create_user(username='instructor', password='testpass')
+        self.student = User.objects.create_user(username='student', password='testpass')
+        self.subject = Subject.objects.create(title='Test Subject', slug='test-subject')
+        self.course = Course.objects.create(
+            owner=self.instructor,
+            subject=self.subject,
+            title='Test Course',
+            slug='test-course',
+            overview='Test',
+            status='published',
+            is_free=True
+        )
+        self.modules = [Module.objects.create(course=self.course, title=f'Module {i}') for i in range(2)]
+        self.contents = [
+            Content.objects.create(module=module, title=f'Lesson {i}')
+            for module in self.modules for i in range(2)
+        ]
+        self.enrollment = CourseEnrollment.objects.create(student=self.student, course=self.course, status='enrolled')
+        self.client.force_login(self.student)
+
+    def pointer(self):
+        return CourseEnrollment.objects.values_list('current_module', 'current_content').get(pk=self.enrollment.pk)
+
+    def test_view_and_completion_move_pointer(self):
+        content = self.contents[1]
+        self.client.get(reverse('student_content_view', args=[self.course.pk, content.module_id, content.pk]))
+        self.assertEqual(self.pointer(), (self.modules[0].pk, content.pk))
+
+        self.client.post(reverse('mark_content_complete', args=[self.course.pk, content.module_id, content.pk]))
+        self.assertEqual(self.pointer(), (self.modules[0].pk, self.contents[0].pk))
+
+        for content in self.contents:
+            ContentProgress.objects.get_or_create(enrollment=self.enrollment, content=content)[0].mark_completed()
+        self.assertEqual(self.pointer(), (None, None))
+
+    def test_course_detail_uses_pointer(self):
+        self.enrollment.set_resume_point(self.contents[2].pk, self.modules[1].pk)
+
+        response = self.client.get(reverse('student_course_detail', args=[self.course.pk]))
+
+        self.assertEqual(response.context['current_module']['id'], self.modules[1].pk)
+        self.assertEqual(response.context['current_module_first_content']['id'], self.contents[2].pk)
+
+    def test_moving_content_updates_pointer(self):
+        self.enrollment.set_resume_point(self.contents[0].pk, self.modules[0].pk)
+        self.contents[0].module = self.modules[1]
+        self.contents[0].save()
+        self.assertEqual(self.pointer(), (self.modules[1].pk, self.contents[0].pk))
+
+        self.contents[0].delete()
+        self.assertEqual(self.pointer(), (self.modules[1].pk, None))
+
+
+class LandingPageSnapshotTestCase(TestCase):
+    """The landing page is served from a cached snapshot and fragments"""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='instructor', password='testpass', role='instructor')
+        self.subject = Subject.objects.create(title='Test Subject', slug='test-subject')
+        self.course = Course.objects.create(
+            owner=self.user,
+            subject=self.subject,
+            title='Test Course',
+            slug='test-course',
+            overview='Test',
+            status='published',
+            is_free=True
+        )
+
+    def test_warm_page_skips_database(self):
+        call_command('refresh_landing_snapshot', stdout=StringIO())
+        self.client.get(reverse('landing'))
+
+        with self.assertNumQueries(0):
+            response = self.client.get(reverse('landing'))
+
+        self.assertContains(response, 'Test Course')
+        self.assertEqual(response.context['total_instructors'], 1)
+
+    def test_publishing_refreshes_featured_courses(self):
+        self.client.get(reverse('landing'))
+
+        Course.objects.create(
+            owner=self.user,
+            subject=self.subject,
+            title='New Course',
+            slug='new-course',
+            overview='Test',
+            status='published',
+            is_free=True
+        )
+
+        response = self.client.get(reverse('landing'))
+        self.assertContains(response, 'New Course')
+        self.assertEqual(response.context['total_courses'], 2)
+
+
+class CourseCatalogCacheTestCase(TestCase):
+    """The public catalog is cached and invalidated by course and subject changes"""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='instructor', password='testpass')
+        self.subject = Subject.objects.create(title='Test Subject', slug='test-subject')
+        self.other_subject = Subject.objects.create(title='Other Subject', slug='other-subject')
+        self.course = Course.objects.create(
+            owner=self.user,
+            subject=self.subject,
+            title='Test Course',
+            slug='test-course',
+            overview='Test',
+            status='published',
+            is_free=True
+        )
+        self.draft = Course.objects.create(
+            owner=self.user,
+            subject=self.subject,
+            title='Draft Course',
+            slug='draft-course',
+            overview='Test',
+            is_free=True
+        )
+
+    def listed(self, url_args=None):
+        url = reverse('course_list_subject', args=url_args) if url_args else reverse('course_list')
+        return [course['title'] for course in self.client.get(url).context['courses']]
+
+    def test_cached_reads_skip_database(self):
+        catalog.get_course_cards(catalog.get_course_ids())
+        catalog.get_subjects()
+
+        with self.assertNumQueries(0):
+            cards = catalog.get_course_cards(catalog.get_course_ids())
+            subjects = catalog.get_subjects()
+
+        self.assertEqual([card['title'] for card in cards], ['Test Course'])
+        self.assertEqual({s['slug']: s['total_courses'] for s in subjects}, {'test-subject': 1, 'other-subject': 0})
+
+    def test_publishing_appears_immediately(self):
+        self.assertEqual(self.listed(), ['Test Course'])
+
+        self.draft.status = 'published'
+        self.draft.save()
+        self.assertEqual(self.listed(), ['Draft Course', 'Test Course'])
+
+        self.course.subject = self.other_subject
+        self.course.save()
+        self.assertEqual(self.listed(['other-subject']), ['Test Course'])
+        self.assertEqual(self.listed(['test-subject']), ['Draft Course'])
+
+        self.course.delete()
+        self.assertEqual(self.listed(), ['Draft Course'])
+
+    def test_card_changes_are_invalidated(self):
+        self.listed()
+
+        self.course.title = 'Renamed Course'
+        self.course.save()
+        Module.objects.create(course=self.course, title='Module 1')
+        self.subject.title = 'Renamed Subject'
+        self.subject.save()
+
+        card = self.client.get(reverse('course_list')).context['courses'][0]
+        self.assertEqual(card['title'], 'Renamed Course')
+        self.assertEqual(card['total_modules'], 1)
+        self.assertEqual(card['subject']['title'], 'Renamed Subject')
+
+    def test_unknown_subject_is_404(self):
+        response = self.client.get(reverse('course_list_subject', args=['missing']))
+        self.assertEqual(response.status_code, 404)
+
+
+class CourseSearchTestCase(TestCase):
+    """Courses are found through their maintained search documents"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='instructor', password='testpass', role='instructor')
+        self.subject = Subject.objects.create(title='Programming', slug='programming')
+        self.python = Course.objects.create(
+            owner=self.user,
+            subject=self.subject,
+            title='Python Basics',
+            slug='python-basics',
+            overview='Learn to program',
+            status='published',
+            is_free=True
+        )
+        self.django = Course.objects.create(
+            owner=self.user,
+            subject=self.subject,
+            title='Web Development',
+            slug='web-development',
+            overview='Build websites with Django, a Python framework',
+            status='published',
+            is_free=True
+        )
+
+    def search(self, query, **kwargs):
+        return list(CourseSearchService.search(Course.objects.all(), query, **kwargs).values_list('title', flat=True))
+
+    def test_title_matches_rank_first(self):
+        self.assertEqual(self.search('python'), ['Python Basics', 'Web Development'])
+        self.assertEqual(self.search('python framework'), ['Web Development'])
+        self.assertEqual(self.search('"python*" -'), ['Python Basics', 'Web Development'])
+
+    def test_document_follows_modules_and_text(self):
+        module = Module.objects.create(course=self.python, title='Decorators')
+        self.assertEqual(self.search('decorators'), ['Python Basics'])
+
+        content = Content.objects.create(module=module, title='Lesson')
+        # bulk_create skips Markdown rendering, which is not under test here
+        text = Text.objects.bulk_create([Text(owner=self.user, title='Notes', content='Generators yield values')])[0]
+        with self.captureOnCommitCallbacks(execute=True):
+            item = ContentItem.objects.create(content=content, item=text)
+        self.assertEqual(self.search('generators'), ['Python Basics'])
+
+        self.subject.title = 'Software'
+        self.subject.save()
+        self.assertCountEqual(self.search('software'), ['Python Basics', 'Web Development'])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            item.delete()
+            module.delete()
+        self.assertEqual(self.search('generators'), [])
+        self.assertEqual(self.search('decorators'), [])
+
+    def test_autocomplete_matches_prefix(self):
+        draft = Course.objects.create(
+            owner=self.user, subject=self.subject, title='Python Advanced', slug='python-advanced', overview='Draft'
+        )
+
+        self.assertEqual([course['title'] for course in CourseSearchService.autocomplete('pyth')],
+                         ['Python Basics', 'Web Development'])
+        self.assertEqual(CourseSearchService.autocomplete('web dev'), [
+            {'id': self.django.pk, 'title': 'Web Development', 'slug': 'web-development'}
+        ])
+        self.assertNotIn(draft.title, [course['title'] for course in CourseSearchService.autocomplete('adv')])
+        self.assertEqual(CourseSearchService.autocomplete('  '), [])
+
+    def test_deleting_course_removes_document(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            Module.objects.create(course=self.python, title='Intro')
+            self.python.delete()
+        self.assertFalse(CourseSearchDocument.objects.filter(course_id=self.python.pk).exists())
+        self.assertEqual(self.search('python'), ['Web Development'])
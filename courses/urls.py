@@ -8,6 +8,7 @@ urlpatterns = [
     path("create/", views.CourseCreateView.as_view(), name="course_create"),
     path("<int:pk>/edit/", views.CourseUpdateView.as_view(), name="course_edit"),
     path("<int:pk>/status/", views.CourseQuickStatusView.as_view(), name="course_quick_status"),
+    path("<int:pk>/clone/", views.CourseCloneView.as_view(), name="course_clone"),
     path("<int:pk>/delete/", views.CourseDeleteView.as_view(), name="course_delete"),
     path("<int:pk>/module/", views.CourseModuleUpdateView.as_view(), name="course_module_update"),
 
@@ -56,6 +57,7 @@ urlpatterns = [
     # Instructor Student Management
     path("students/overview/", views.InstructorStudentsOverviewView.as_view(), name="instructor_students_overview"),
     path("students/<int:pk>/", views.InstructorCourseStudentsView.as_view(), name="instructor_course_students"),
+    path("students/<int:pk>/waitlist/", views.CourseWaitlistManagementView.as_view(), name="course_waitlist_management"),
 
     # Public Course Listing
     path('subject/<slug:subject>/', views.CourseListView.as_view(), name='course_list_subject'),
@@ -1,12 +1,9 @@
-import datetime
-
 from braces.views import CsrfExemptMixin, JsonRequestResponseMixin
 from django.apps import apps
 from django.contrib import messages  # Added for enrollment messages
 from django.contrib.auth.mixins import LoginRequiredMixin, PermissionRequiredMixin
-from django.core.cache import cache
 from django.core.paginator import Paginator
-from django.db.models import Q, Avg
+from django.db.models import F, Max, OuterRef, Prefetch, Q, Avg
 from django.db.models.aggregates import Count
 from django.forms import modelform_factory
 from django.http import HttpResponse, JsonResponse, Http404
@@ -22,10 +19,23 @@ from users.forms import CourseEnrollForm
 from .forms import ModuleFormSets
 from users.models import User
 from .models import (
-    Course, Module, Content, ContentItem, Subject, CourseEnrollment,
+    Course, Module, Content, ContentItem, CourseEnrollment,
     ContentProgress, ModuleProgress, LearningSession, CourseWaitlist
 )
+from .access_service import CourseAccessService, CourseFullError, EnrollmentService
+from .catalog import get_course_cards, get_course_ids, get_subjects
+from .cleanup_service import ItemCleanupService
+from .cloning_service import CloningService
 from .decorators import CourseAccessMixin  # Added for dual pricing access control
+from .landing_service import LANDING_FRAGMENT_TIMEOUT, LandingPageService
+from .learning_time_service import LearningTimeService
+from .ordering import apply_order
+from .outline import bump_structure_version, bump_structure_versions, get_course_outline
+from .progress_service import count_subquery
+from .search_service import CourseSearchService
+from .session_service import LearningSessionService
+from .stats_service import CourseStatsService
+from .waitlist_service import QUEUE_ORDER, WaitlistService
 
 from courses.utils import landing_page_features, landing_page_testimonials
 
@@ -34,42 +44,32 @@ class LandingPageView(TemplateResponseMixin, View):
     template_name = 'landing/index.html'
 
     def get(self, request):
+        from core.models import GlobalSettings
         from core.utils import get_setting, is_feature_enabled
-        
-        # Get featured courses count from settings
-        featured_count = get_setting('featured_courses_count', 6)
-        
-        # Featured courses (published only)
-        featured_courses = Course.objects.filter(status='published').annotate(
-            total_modules=Count('modules')
-        ).order_by('-created')[:featured_count]
-
-        # Statistics
-        total_students = User.objects.count()
-        total_courses = Course.objects.filter(status='published').count()
-        total_instructors = User.objects.filter(role='instructor').count()
-
-        # Get subscription plans for pricing section (only if enabled)
-        subscription_plans = []
-        if is_feature_enabled('subscriptions') and get_setting('show_pricing', True):
-            from subscriptions.models import SubscriptionPlan
-            subscription_plans = SubscriptionPlan.objects.filter(
-                is_active=True
-            ).order_by('display_order', 'price')[:3]  # Show top 3 plans
+
+        # Featured courses, statistics and plans come from the periodically refreshed snapshot
+        snapshot = LandingPageService.get_snapshot()
+
+        show_pricing = get_setting('show_pricing', True) and is_feature_enabled('subscriptions')
 
         context = {
-            'featured_courses': featured_courses,
-            'total_students': total_students,
-            'total_courses': total_courses,
-            'total_instructors': total_instructors,
+            'featured_courses': snapshot['featured_courses'],
+            'total_students': snapshot['total_students'],
+            'total_courses': snapshot['total_courses'],
+            'total_instructors': snapshot['total_instructors'],
             'features': landing_page_features,
             'testimonials': landing_page_testimonials,
-            'subscription_plans': subscription_plans,
+            # Get subscription plans for pricing section (only if enabled)
+            'subscription_plans': snapshot['subscription_plans'] if show_pricing else [],
             # Landing page section toggles from global settings
             'show_stats': get_setting('show_stats_section', True),
             'show_featured': get_setting('show_featured_courses', True),
             'show_testimonials': get_setting('show_testimonials', True),
-            'show_pricing': get_setting('show_pricing', True) and is_feature_enabled('subscriptions'),
+            'show_pricing': show_pricing,
+            # Keys of the cached template fragments
+            'fragment_timeout': LANDING_FRAGMENT_TIMEOUT,
+            'settings_version': GlobalSettings.get_settings_version(),
+            'snapshot_version': snapshot['version'],
         }
         return self.render_to_response(context)
 
@@ -80,41 +80,30 @@ class CourseListView(ListView):
     paginate_by = 4  # Show 6 courses per page
     context_object_name = 'courses'
 
-    def get_queryset(self):
+    def get_subject(self):
+        """Resolve the subject filter from the cached sidebar subjects"""
         subject_slug = self.kwargs.get('subject')
-        # Include 'published' in cache key to avoid cache pollution between admin and public views
-        cache_key = f"course_list_published_{subject_slug}" if subject_slug else "course_list_published"
-        queryset = cache.get(cache_key)
-        
-        if queryset is None:
-            # SECURITY: Only show published courses to the public
-            # This ensures draft and archived courses are not visible to students/public
-            queryset = Course.objects.filter(status='published').annotate(total_modules=Count('modules')).order_by(
-                '-created')
-            if subject_slug:
-                subject = get_object_or_404(Subject, slug=subject_slug)
-                queryset = queryset.filter(subject=subject)
-            cache.set(cache_key, list(queryset), timeout=300)  # cache sebagai list
-            return queryset
-        return queryset
+        if not subject_slug:
+            return None
+        for subject in get_subjects():
+            if subject['slug'] == subject_slug:
+                return subject
+        raise Http404("Subject not found")
 
-    def get_context_data(self, **kwargs):
-        context = super().get_context_data(**kwargs)
-
-        # Get all subjects for sidebar
-        subjects = cache.get('all_subjects')
-        if not subjects:
-            subjects = Subject.objects.annotate(total_courses=Count('courses', filter=Q(courses__status='published')))
-            cache.set('all_subjects', subjects)
-        context['subjects'] = subjects
+    def get_queryset(self):
+        # Only ids are listed here; cards are loaded for the current page in paginate_queryset
+        self.subject = self.get_subject()
+        return get_course_ids(self.subject['pk'] if self.subject else None)
 
-        # Get current subject if filtering
-        subject_slug = self.kwargs.get('subject')
-        if subject_slug:
-            context['subject'] = get_object_or_404(Subject, slug=subject_slug)
-        else:
-            context['subject'] = None
+    def paginate_queryset(self, queryset, page_size):
+        paginator, page, object_list, is_paginated = super().paginate_queryset(queryset, page_size)
+        page.object_list = get_course_cards(object_list)
+        return paginator, page, page.object_list, is_paginated
 
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['subjects'] = get_subjects()
+        context['subject'] = self.subject
         return context
 
     def get(self, request, *args, **kwargs):
@@ -169,15 +158,18 @@ class CourseDetailView(DetailView):
 
 class ModuleOrderView(CsrfExemptMixin, JsonRequestResponseMixin, View):
     def post(self, request):
-        for id, order in self.request_json.items():
-            Module.objects.filter(id=id, course__owner=request.user).update(order=order)
+        modules = Module.objects.filter(course__owner=request.user)
+        pks = apply_order(modules, self.request_json)
+        # update() bypasses signals, so invalidate cached outlines explicitly
+        bump_structure_versions(modules.filter(pk__in=pks).values_list('course_id', flat=True))
         return self.render_json_response({'saved': 'OK'})
 
 
 class ContentOrderView(CsrfExemptMixin, JsonRequestResponseMixin, View):
     def post(self, request):
-        for id, order in self.request_json.items():
-            Content.objects.filter(id=id, module__course__owner=request.user).update(order=order)
+        contents = Content.objects.filter(module__course__owner=request.user)
+        pks = apply_order(contents, self.request_json)
+        bump_structure_versions(contents.filter(pk__in=pks).values_list('module__course_id', flat=True))
         return self.render_json_response({'saved': 'OK'})
 
 
@@ -185,11 +177,9 @@ class ContentItemOrderView(CsrfExemptMixin, JsonRequestResponseMixin, View):
     """View untuk mengatur urutan ContentItem dalam Content"""
 
     def post(self, request):
-        for id, order in self.request_json.items():
-            ContentItem.objects.filter(
-                id=id,
-                content__module__course__owner=request.user
-            ).update(order=order)
+        items = ContentItem.objects.filter(content__module__course__owner=request.user)
+        pks = apply_order(items, self.request_json)
+        bump_structure_versions(items.filter(pk__in=pks).values_list('content__module__course_id', flat=True))
         return self.render_json_response({'saved': 'OK'})
 
 
@@ -333,7 +323,13 @@ class ModuleContentListView(TemplateResponseMixin, View):
     template_name = 'courses/manage/module/content_list.html'
 
     def get(self, request, module_id):
-        module = get_object_or_404(Module, id=module_id, course__owner=request.user)
+        module = get_object_or_404(
+            Module.objects.select_related('course').prefetch_related(
+                Prefetch('contents', queryset=Content.objects.with_items())
+            ),
+            id=module_id,
+            course__owner=request.user
+        )
         return self.render_to_response({'module': module})
 
 
@@ -341,12 +337,8 @@ class ContentDeleteView(View):
     def post(self, request, id):
         content = get_object_or_404(Content, id=id, module__course__owner=request.user)
         module = content.module
-        # Hapus semua ContentItem dan item terkait
-        for content_item in content.items.all():
-            if content_item.item:
-                content_item.item.delete()
-            content_item.delete()
-        content.delete()
+        # Hapus Content beserta semua ContentItem dan item terkait
+        ItemCleanupService.delete_contents(Content.objects.filter(pk=content.pk))
 
         if request.headers.get('HX-Request'):
             return HttpResponse(
@@ -431,9 +423,7 @@ class ContentItemDeleteView(View):
         module = content.module
 
         # Hapus item dan ContentItem
-        if content_item.item:
-            content_item.item.delete()
-        content_item.delete()
+        ItemCleanupService.delete_content_items(ContentItem.objects.filter(pk=content_item.pk))
 
         if request.headers.get('HX-Request'):
             return HttpResponse(
@@ -526,11 +516,7 @@ class ManageCourseListView(OwnerCourseMixin, ListView):
         queryset = super().get_queryset()
         search = self.request.GET.get('search', '')
         if search:
-            queryset = queryset.filter(
-                Q(title__icontains=search) |
-                Q(overview__icontains=search) |
-                Q(subject__title__icontains=search)
-            )
+            queryset = CourseSearchService.search(queryset, search)
         return queryset
 
     def get_context_data(self, **kwargs):
@@ -597,6 +583,31 @@ class StudentEnrollCourseView(LoginRequiredMixin, View):
     """Handle student course enrollment with waitlist and approval support"""
 
     def post(self, request, pk):
+        try:
+            return self.enroll(request, pk)
+        except CourseFullError:
+            # The last seat was taken between the capacity check and the reservation
+            course = get_object_or_404(Course, pk=pk, status='published')
+            if course.waitlist_enabled:
+                return self.join_waitlist(request, course)
+            messages.error(request, 'Cannot enroll: Course full - no waitlist')
+            return redirect('course_detail', slug=course.slug)
+
+    def join_waitlist(self, request, course):
+        waitlist_entry, created = CourseWaitlist.objects.get_or_create(
+            course=course,
+            student=request.user
+        )
+
+        position = waitlist_entry.get_position()
+        if created:
+            messages.info(request, f'Course is full. You have been added to the waitlist at position {position}.')
+        else:
+            messages.info(request, f'You are already on the waitlist at position {position}.')
+
+        return redirect('course_detail', slug=course.slug)
+
+    def enroll(self, request, pk):
         # SECURITY: Only allow enrollment in published courses
         # This prevents students from enrolling in draft or archived courses
         course = get_object_or_404(Course, pk=pk, status='published')
@@ -624,8 +635,6 @@ class StudentEnrollCourseView(LoginRequiredMixin, View):
             if pricing_type == 'free' or course.is_free:
                 # Enroll directly for free
                 enrollment_data = {
-                    'student': user,
-                    'course': course,
                     'status': 'enrolled' if course.enrollment_type == 'open' else 'pending',
                     'payment_status': 'free',
                     'access_type': 'free',
@@ -634,7 +643,7 @@ class StudentEnrollCourseView(LoginRequiredMixin, View):
                 if course.enrollment_type in ['approval', 'restricted']:
                     enrollment_data['approval_requested_at'] = timezone.now()
                 
-                enrollment = CourseEnrollment.objects.create(**enrollment_data)
+                enrollment = EnrollmentService.reserve_seat(user, course, enrollment_data)
                 
                 if course.enrollment_type == 'open':
                     course.students.add(user)
@@ -666,8 +675,6 @@ class StudentEnrollCourseView(LoginRequiredMixin, View):
                     enrollment_status = 'enrolled' if course.enrollment_type == 'open' else 'pending'
                     
                     enrollment_data = {
-                        'student': user,
-                        'course': course,
                         'status': enrollment_status,
                         'payment_status': 'subscription',
                         'access_type': 'subscription',
@@ -676,7 +683,7 @@ class StudentEnrollCourseView(LoginRequiredMixin, View):
                     if course.enrollment_type in ['approval', 'restricted']:
                         enrollment_data['approval_requested_at'] = timezone.now()
                     
-                    enrollment = CourseEnrollment.objects.create(**enrollment_data)
+                    enrollment = EnrollmentService.reserve_seat(user, course, enrollment_data)
                     
                     if course.enrollment_type == 'open':
                         course.students.add(user)
@@ -722,8 +729,6 @@ class StudentEnrollCourseView(LoginRequiredMixin, View):
                     enrollment_status = 'enrolled' if course.enrollment_type == 'open' else 'pending'
                     
                     enrollment_data = {
-                        'student': user,
-                        'course': course,
                         'status': enrollment_status,
                         'payment_status': 'subscription',
                         'access_type': 'subscription',
@@ -732,7 +737,7 @@ class StudentEnrollCourseView(LoginRequiredMixin, View):
                     if course.enrollment_type in ['approval', 'restricted']:
                         enrollment_data['approval_requested_at'] = timezone.now()
                     
-                    enrollment = CourseEnrollment.objects.create(**enrollment_data)
+                    enrollment = EnrollmentService.reserve_seat(user, course, enrollment_data)
                     
                     if course.enrollment_type == 'open':
                         course.students.add(user)
@@ -764,19 +769,7 @@ class StudentEnrollCourseView(LoginRequiredMixin, View):
 
         elif message == "Course full - can join waitlist":
             # Add to waitlist
-            waitlist_entry, created = CourseWaitlist.objects.get_or_create(
-                course=course,
-                student=user
-            )
-
-            if created:
-                position = waitlist_entry.get_position()
-                messages.info(request, f'Course is full. You have been added to the waitlist at position {position}.')
-            else:
-                position = waitlist_entry.get_position()
-                messages.info(request, f'You are already on the waitlist at position {position}.')
-
-            return redirect('course_detail', slug=course.slug)
+            return self.join_waitlist(request, course)
 
         else:
             # Cannot enroll
@@ -844,12 +837,17 @@ class StudentCourseListView(LoginRequiredMixin, ListView):
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
 
-        # Add statistics - only count accessible courses
+        # Add statistics - only count accessible courses, resolved in bulk
         all_enrollments = CourseEnrollment.objects.filter(student=self.request.user)
-        accessible_enrollments = [e for e in all_enrollments if e.can_access_course()]
+        courses = Course.objects.filter(course_enrollments__student=self.request.user).distinct()
+        access = CourseAccessService.resolve_access_bulk(self.request.user, courses)
+
+        context['enrollments'] = list(context['enrollments'])
+        for enrollment in context['enrollments']:
+            enrollment.has_access = access[enrollment.course_id][0]
 
         context['total_courses'] = all_enrollments.count()
-        context['accessible_courses'] = len(accessible_enrollments)
+        context['accessible_courses'] = sum(1 for can_access, _ in access.values() if can_access)
         context['active_courses'] = all_enrollments.filter(
             status='enrolled',
             payment_status__in=['paid', 'free']
@@ -909,32 +907,31 @@ class StudentCourseDetailView(LoginRequiredMixin, CourseAccessMixin, DetailView)
 
         context['enrollment'] = enrollment
 
-        # Use optimized utility function to get all modules data with progress (fixes N+1 queries)
-        from .utils import get_prefetched_modules_data, bulk_prefetch_content_progress
+        # Course structure comes from the cached outline; only progress rows are queried
+        from .utils import get_prefetched_modules_data
         
         modules_data = get_prefetched_modules_data(course, enrollment)
         context['modules_data'] = modules_data
-
-        # Get all content progress for contents_data
-        content_progress_map, _ = bulk_prefetch_content_progress(enrollment, course)
-        
-        all_contents_data = []
-        for module_data in modules_data:
-            for content_item in module_data['contents_with_progress']:
-                all_contents_data.append({
-                    'content': content_item['content'],
-                    'progress': content_progress_map.get(content_item['content'].id),
-                    'is_completed': content_item['is_completed']
-                })
-        
-        context['contents_data'] = all_contents_data
-
-        current_module = enrollment.get_current_module()
+        context['contents_data'] = [
+            content_item
+            for module_data in modules_data
+            for content_item in module_data['contents_with_progress']
+        ]
+
+        # "Continue learning" target: the stored resume pointer, resolved against the cached outline
+        outline = get_course_outline(course)
+        current_content = outline.get_content(enrollment.current_content_id)
+        if current_content:
+            current_module = outline.get_module(current_content['module_id'])
+        else:
+            # Nothing viewed yet: first content of the first module not completed
+            current_module = next(
+                (module_data['module'] for module_data in modules_data if not module_data['progress'].is_completed),
+                None
+            )
+            current_content = current_module['contents'][0] if current_module and current_module['contents'] else None
         context['current_module'] = current_module
-
-        # Add first content of current module for direct link
-        if current_module:
-            context['current_module_first_content'] = current_module.contents.first()
+        context['current_module_first_content'] = current_content
 
         return context
 
@@ -974,18 +971,20 @@ class StudentModuleDetailView(LoginRequiredMixin, DetailView):
             module=module
         )
 
-        # Use bulk prefetch for content progress (fixes N+1 queries)
-        from .utils import bulk_prefetch_content_progress
-        content_progress_map, _ = bulk_prefetch_content_progress(enrollment, course)
+        # Completion state comes from the enrollment bitmap; only this module's
+        # progress rows are loaded (for completion dates)
+        outline = get_course_outline(course)
+        completion = enrollment.get_completion_bitmap(outline)
+        content_progress_map = {
+            cp.content_id: cp
+            for cp in ContentProgress.objects.filter(enrollment=enrollment, content__module=module)
+        }
 
-        # Get content progress using prefetched data
         contents_data = []
-        completed_count = 0
         for content in module.contents.all():
             content_progress = content_progress_map.get(content.id)
-            is_completed = content_progress.is_completed if content_progress else False
-            if is_completed:
-                completed_count += 1
+            position = outline.positions.get(content.id)
+            is_completed = position is not None and completion.is_set(position)
 
             contents_data.append({
                 'content': content,
@@ -993,16 +992,12 @@ class StudentModuleDetailView(LoginRequiredMixin, DetailView):
                 'is_completed': is_completed
             })
 
-        # Add counts to module_progress for template
-        module_progress.completed_contents_count = completed_count
-        module_progress.total_contents_count = len(contents_data)
-
         context['enrollment'] = enrollment
         context['module_progress'] = module_progress
         context['contents_data'] = contents_data
         context['course'] = course
-        context['previous_module'] = module.get_previous_in_order()
-        context['next_module'] = module.get_next_in_order()
+        context['previous_module'] = outline.get_previous_module(module.pk)
+        context['next_module'] = outline.get_next_module(module.pk)
 
         return context
 
@@ -1033,7 +1028,7 @@ class StudentContentView(LoginRequiredMixin, DetailView):
         return Content.objects.filter(
             module__pk=self.kwargs['module_pk'],
             module__course__pk=self.kwargs['pk']
-        ).select_related('module', 'module__course')
+        ).select_related('module', 'module__course').with_items()
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
@@ -1059,46 +1054,31 @@ class StudentContentView(LoginRequiredMixin, DetailView):
             content=content
         )
 
-        # Start a learning session
-        learning_session = LearningSession.objects.create(
-            enrollment=enrollment,
-            content=content
-        )
-
-        # Get neighboring content (within current module)
-        all_contents = list(module.contents.all())
-        current_index = next(
-            (i for i, c in enumerate(all_contents) if c.id == content.id),
-            None
-        )
+        # Start or extend the buffered learning session
+        learning_session = LearningSessionService.touch(enrollment, content)
+        enrollment.set_resume_point(content.id, module.id)
 
-        previous_content = all_contents[current_index - 1] if current_index and current_index > 0 else None
-        next_content = all_contents[current_index + 1] if current_index is not None and current_index < len(
-            all_contents) - 1 else None
+        # Neighboring content from the cached outline: previous stays within the
+        # module, next continues with the following module's first content
+        outline = get_course_outline(course)
+        previous_content = outline.get_previous_content(content.id)
+        if previous_content and previous_content['module_id'] != module.id:
+            previous_content = None
 
-        # If no next content in current module, get first content of next module
-        if not next_content:
-            next_module = course.modules.filter(order__gt=module.order).first()
-            if next_module:
-                next_content = next_module.contents.first()
-                next_module_context = next_module
-            else:
-                next_module_context = None
-        else:
-            next_module_context = None
+        next_content = outline.get_next_content(content.id)
+        next_module_context = None
+        if next_content and next_content['module_id'] != module.id:
+            next_module_context = outline.get_module(next_content['module_id'])
 
-        # Use optimized utility function for sidebar data (fixes N+1 queries)
-        from .utils import get_prefetched_modules_data, bulk_prefetch_content_progress
+        # Sidebar data: cached course outline plus this enrollment's progress
+        from .utils import get_prefetched_modules_data
         
         modules_data = get_prefetched_modules_data(course, enrollment)
         
-        # Build contents_data from prefetched modules_data
-        content_progress_map, _ = bulk_prefetch_content_progress(enrollment, course)
-        
         contents_data = []
         for module_data in modules_data:
             for content_item in module_data['contents_with_progress']:
-                cont_id = content_item['content'].id
+                cont_id = content_item['content']['id']
                 contents_data.append({
                     'content_id': cont_id,
                     'is_completed': content_item['is_completed']
@@ -1140,28 +1120,17 @@ class MarkContentCompleteView(LoginRequiredMixin, View):
             content=content
         )
 
-        content_progress.mark_completed()
-
-        # End any active learning sessions for this content
-        active_sessions = LearningSession.objects.filter(
-            enrollment=enrollment,
-            content=content,
-            ended_at__isnull=True
-        )
-        for session in active_sessions:
-            session.end_session()
-
-        # Check if module is completed and update
-        module_progress, _ = ModuleProgress.objects.get_or_create(
-            enrollment=enrollment,
-            module=module
-        )
-
-        if module_progress.calculate_completion():
-            module_progress.mark_completed()
+        # Propagates to module and course progress through the stored counters
+        content_progress.enrollment = enrollment
+        module_progress = content_progress.mark_completed()
+        if module_progress is None:
+            module_progress, _ = ModuleProgress.objects.get_or_create(
+                enrollment=enrollment,
+                module=module
+            )
 
-        # Always update course progress after marking content complete
-        enrollment.update_progress()
+        # End the active learning session for this content
+        LearningSessionService.close(enrollment, content)
 
         # Return JSON response for AJAX requests
         if request.headers.get('X-Requested-With') == 'XMLHttpRequest' or request.headers.get('HX-Request'):
@@ -1173,14 +1142,15 @@ class MarkContentCompleteView(LoginRequiredMixin, View):
             })
 
         # Redirect to next content or module
-        next_content = module.contents.filter(order__gt=content.order).first()
-        if next_content:
-            return redirect('student_content_view', pk=pk, module_pk=module_pk, content_pk=next_content.pk)
+        outline = get_course_outline(course)
+        next_content = outline.get_next_content(content.pk)
+        if next_content and next_content['module_id'] == module.pk:
+            return redirect('student_content_view', pk=pk, module_pk=module_pk, content_pk=next_content['id'])
         else:
             # Go to next module or course detail
-            next_module = module.get_next_in_order()
+            next_module = outline.get_next_module(module.pk)
             if next_module:
-                return redirect('student_module_detail', pk=pk, module_pk=next_module.pk)
+                return redirect('student_module_detail', pk=pk, module_pk=next_module['id'])
             else:
                 return redirect('student_course_detail', pk=pk)
 
@@ -1213,21 +1183,20 @@ class StudentDashboardView(LoginRequiredMixin, TemplateResponseMixin, View):
         ).order_by('-started_at')[:10]
 
         # Get courses in progress (recently accessed)
-        in_progress = active_enrollments.filter(
+        in_progress = list(active_enrollments.filter(
             last_accessed__isnull=False
-        ).order_by('-last_accessed')[:5]
+        ).order_by('-last_accessed')[:5])
+        recent_enrollments = list(enrollments[:6])
 
-        # Calculate total learning time (sessions with ended_at)
-        completed_sessions = LearningSession.objects.filter(
-            enrollment__student=user,
-            ended_at__isnull=False
-        )
+        # Only offer "continue" for courses the student can still open
+        shown = recent_enrollments + in_progress
+        access = CourseAccessService.resolve_access_bulk(user, {e.course_id: e.course for e in shown}.values())
+        for enrollment in shown:
+            enrollment.has_access = access[enrollment.course_id][0]
+        in_progress = [enrollment for enrollment in in_progress if enrollment.has_access]
 
-        total_learning_time = sum(
-            [(session.ended_at - session.started_at).total_seconds()
-             for session in completed_sessions],
-            0
-        ) / 3600  # Convert to hours
+        # Learning time and streak from the daily rollup (see courses.learning_time_service)
+        learning_time = LearningTimeService.get_summary(student=user)
 
         # Get modules completed count
         total_modules_completed = ModuleProgress.objects.filter(
@@ -1242,14 +1211,15 @@ class StudentDashboardView(LoginRequiredMixin, TemplateResponseMixin, View):
         ).count()
 
         context = {
-            'enrollments': enrollments[:6],  # Show recent 6
+            'enrollments': recent_enrollments,  # Show recent 6
             'total_courses': total_courses,
             'active_courses': active_enrollments.count(),
             'completed_courses': completed_courses,
             'avg_progress': round(avg_progress, 2),
             'recent_sessions': recent_sessions,
             'in_progress': in_progress,
-            'total_learning_time': round(total_learning_time, 2),
+            'total_learning_time': learning_time['total_hours'],
+            'learning_streak': learning_time['current_streak'],
             'total_modules_completed': total_modules_completed,
             'total_contents_completed': total_contents_completed,
         }
@@ -1271,76 +1241,53 @@ class InstructorCourseAnalyticsView(LoginRequiredMixin, DetailView):
         context = super().get_context_data(**kwargs)
         course = self.object
 
-        # Get all enrollments for this course
         enrollments = CourseEnrollment.objects.filter(
             course=course
         ).select_related('student').order_by('-enrolled_on')
 
-        # Calculate course statistics
-        total_students = enrollments.count()
-        active_students = enrollments.filter(status='enrolled').count()
-        completed_students = enrollments.filter(status='completed').count()
-        avg_progress = enrollments.aggregate(avg=Avg('progress_percentage'))['avg'] or 0
+        # Course statistics come from the materialized rollup (see courses.stats_service)
+        stats = CourseStatsService.get_rollup(course)
+        total_students = stats.total_students
 
-        # Module completion rates
+        # Module completion rates; titles and content counts from the cached outline
         modules_data = []
-        for module in course.modules.all():
-            total_contents = module.contents.count()
-            module_enrollments = ModuleProgress.objects.filter(
-                module=module,
-                enrollment__course=course
-            )
-            completed_count = module_enrollments.filter(is_completed=True).count()
+        for module in get_course_outline(course).modules:
+            completed_count = stats.get_module_completed_count(module['id'])
             completion_rate = (completed_count / total_students * 100) if total_students > 0 else 0
 
             modules_data.append({
                 'module': module,
-                'total_contents': total_contents,
+                'total_contents': len(module['contents']),
                 'completed_count': completed_count,
                 'completion_rate': round(completion_rate, 2)
             })
 
-        # Recent enrollments
-        recent_enrollments = enrollments[:10]
-
-        # Get learning sessions for this course
-        total_sessions = LearningSession.objects.filter(
-            enrollment__course=course
-        ).count()
-
         context.update({
             'enrollments': enrollments,
             'total_students': total_students,
-            'active_students': active_students,
-            'completed_students': completed_students,
-            'avg_progress': round(avg_progress, 2),
+            'active_students': stats.active_students,
+            'completed_students': stats.completed_students,
+            'avg_progress': round(stats.avg_progress, 2),
             'modules_data': modules_data,
-            'recent_enrollments': recent_enrollments,
-            'total_sessions': total_sessions,
+            'recent_enrollments': enrollments[:10],
+            'total_sessions': stats.total_sessions,
         })
 
         # Add revenue statistics from payment system
         try:
             from payments.models import Order
             from django.contrib.contenttypes.models import ContentType
-            from django.db.models import Sum
-            
+
             course_ct = ContentType.objects.get_for_model(Course)
-            orders = Order.objects.filter(
+            recent_orders = Order.objects.filter(
                 content_type=course_ct,
                 object_id=course.pk,
                 status='completed'
-            )
-            
-            total_revenue = orders.aggregate(total=Sum('total_amount'))['total'] or 0
-            total_orders = orders.count()
-            
-            # Recent orders
-            recent_orders = orders.select_related('user').order_by('-paid_at')[:5]
-            
+            ).select_related('user').order_by('-paid_at')[:5]
+
             context.update({
-                'total_revenue': total_revenue,
-                'total_orders': total_orders,
+                'total_revenue': stats.total_revenue,
+                'total_orders': stats.total_orders,
                 'recent_orders': recent_orders,
                 'currency': course.currency,
             })
@@ -1399,6 +1346,7 @@ class StudentProgressDetailView(LoginRequiredMixin, TemplateResponseMixin, View)
             'student': enrollment.student,
             'modules_progress': modules_progress,
             'learning_sessions': learning_sessions,
+            'learning_time': LearningTimeService.get_summary(enrollment=enrollment),
         }
 
         return self.render_to_response(context)
@@ -1409,64 +1357,28 @@ class InstructorStudentsOverviewView(LoginRequiredMixin, TemplateResponseMixin,
     template_name = 'courses/instructor/students_overview.html'
 
     def get(self, request):
-        # Get all courses owned by the instructor
-        instructor_courses = Course.objects.filter(owner=request.user).prefetch_related('modules')
-
-        # Get all enrollments for instructor's courses
-        all_enrollments = CourseEnrollment.objects.filter(
-            course__in=instructor_courses
-        ).select_related('student', 'course').order_by('-last_accessed')
-
-        # Calculate overall statistics
-        total_students = all_enrollments.values('student').distinct().count()
+        instructor_courses = Course.objects.filter(owner=request.user)
+        all_enrollments = CourseEnrollment.objects.filter(course__owner=request.user)
+
+        # Overall statistics in a single aggregate query
+        totals = all_enrollments.aggregate(
+            total_students=Count('student', distinct=True),
+            total_enrollments=Count('id'),
+            active_enrollments=Count('id', filter=Q(status='enrolled')),
+            completed_enrollments=Count('id', filter=Q(status='completed')),
+            paused_enrollments=Count('id', filter=Q(status='paused')),
+            avg_progress=Avg('progress_percentage'),
+        )
         total_courses = instructor_courses.count()
-        total_enrollments = all_enrollments.count()
 
-        # Status breakdown
-        active_enrollments = all_enrollments.filter(status='enrolled').count()
-        completed_enrollments = all_enrollments.filter(status='completed').count()
-        paused_enrollments = all_enrollments.filter(status='paused').count()
-
-        # Average progress
-        avg_progress = all_enrollments.aggregate(avg=Avg('progress_percentage'))['avg'] or 0
-
-        # Get unique students with their enrollment data
-        students_data = []
-        processed_students = set()
-
-        for enrollment in all_enrollments:
-            if enrollment.student.id not in processed_students:
-                student = enrollment.student
-                student_enrollments = all_enrollments.filter(student=student)
-
-                # Calculate student statistics
-                student_total_courses = student_enrollments.count()
-                student_active_courses = student_enrollments.filter(status='enrolled').count()
-                student_completed_courses = student_enrollments.filter(status='completed').count()
-                student_avg_progress = student_enrollments.aggregate(
-                    avg=Avg('progress_percentage')
-                )['avg'] or 0
-
-                # Get latest activity
-                latest_enrollment = student_enrollments.order_by('-last_accessed').first()
-
-                students_data.append({
-                    'student': student,
-                    'total_courses': student_total_courses,
-                    'active_courses': student_active_courses,
-                    'completed_courses': student_completed_courses,
-                    'avg_progress': round(student_avg_progress, 1),
-                    'latest_course': latest_enrollment.course if latest_enrollment else None,
-                    'last_accessed': latest_enrollment.last_accessed if latest_enrollment else None,
-                    'enrollments': list(student_enrollments)
-                })
-
-                processed_students.add(student.id)
-
-        # Sort by last accessed (most recent first)
-        students_data.sort(
-            key=lambda x: x['last_accessed'] or datetime.datetime.min.replace(tzinfo=datetime.timezone.utc),
-            reverse=True)
+        # Per-student statistics grouped in the database, most recently active first
+        student_rows = all_enrollments.values('student').annotate(
+            total_courses=Count('id'),
+            active_courses=Count('id', filter=Q(status='enrolled')),
+            completed_courses=Count('id', filter=Q(status='completed')),
+            avg_progress=Avg('progress_percentage'),
+            last_accessed=Max('last_accessed'),
+        ).order_by(F('last_accessed').desc(nulls_last=True), 'student')
 
         # Pagination with multiples of 5
         per_page = request.GET.get('per_page', '5')
@@ -1478,40 +1390,62 @@ class InstructorStudentsOverviewView(LoginRequiredMixin, TemplateResponseMixin,
         except (ValueError, TypeError):
             per_page = 5
 
-        paginator = Paginator(students_data, per_page)
+        paginator = Paginator(student_rows, per_page)
         page_number = request.GET.get('page', 1)
         students_page = paginator.get_page(page_number)
 
+        # Load students and enrollments only for the rows on this page
+        page_rows = list(students_page.object_list)
+        student_ids = [row['student'] for row in page_rows]
+        students = User.objects.in_bulk(student_ids)
+        enrollments_by_student = {}
+        page_enrollments = all_enrollments.filter(student_id__in=student_ids).select_related(
+            'course'
+        ).order_by(F('last_accessed').desc(nulls_last=True))
+        for enrollment in page_enrollments:
+            enrollments_by_student.setdefault(enrollment.student_id, []).append(enrollment)
+
+        students_data = []
+        for row in page_rows:
+            student_enrollments = enrollments_by_student.get(row['student'], [])
+            latest_enrollment = student_enrollments[0] if student_enrollments else None
+            students_data.append({
+                'student': students.get(row['student']),
+                'total_courses': row['total_courses'],
+                'active_courses': row['active_courses'],
+                'completed_courses': row['completed_courses'],
+                'avg_progress': round(row['avg_progress'] or 0, 1),
+                'latest_course': latest_enrollment.course if latest_enrollment else None,
+                'last_accessed': row['last_accessed'],
+                'enrollments': student_enrollments
+            })
+        students_page.object_list = students_data
+
         # Available per_page options (multiples of 5)
         per_page_options = [5, 10, 15, 20, 25, 30, 35, 40, 45, 50]
 
-        # Course-wise enrollment statistics
-        courses_data = []
-        for course in instructor_courses:
-            course_enrollments = all_enrollments.filter(course=course)
-            course_total_students = course_enrollments.count()
-            course_active_students = course_enrollments.filter(status='enrolled').count()
-            course_completed_students = course_enrollments.filter(status='completed').count()
-            course_avg_progress = course_enrollments.aggregate(
-                avg=Avg('progress_percentage')
-            )['avg'] or 0
-
-            courses_data.append({
+        # Course-wise enrollment statistics from the materialized rollups
+        courses = list(instructor_courses.select_related('subject'))
+        rollups = CourseStatsService.get_rollups([course.pk for course in courses])
+        courses_data = [
+            {
                 'course': course,
-                'total_students': course_total_students,
-                'active_students': course_active_students,
-                'completed_students': course_completed_students,
-                'avg_progress': round(course_avg_progress, 1)
-            })
+                'total_students': rollups[course.pk].total_students,
+                'active_students': rollups[course.pk].active_students,
+                'completed_students': rollups[course.pk].completed_students,
+                'avg_progress': round(rollups[course.pk].avg_progress, 1)
+            }
+            for course in courses
+        ]
 
         context = {
-            'total_students': total_students,
+            'total_students': totals['total_students'],
             'total_courses': total_courses,
-            'total_enrollments': total_enrollments,
-            'active_enrollments': active_enrollments,
-            'completed_enrollments': completed_enrollments,
-            'paused_enrollments': paused_enrollments,
-            'avg_progress': round(avg_progress, 1),
+            'total_enrollments': totals['total_enrollments'],
+            'active_enrollments': totals['active_enrollments'],
+            'completed_enrollments': totals['completed_enrollments'],
+            'paused_enrollments': totals['paused_enrollments'],
+            'avg_progress': round(totals['avg_progress'] or 0, 1),
             'students_data': students_page,  # Use paginated data
             'courses_data': courses_data,
             'per_page': per_page,
@@ -1528,68 +1462,52 @@ class InstructorCourseStudentsView(LoginRequiredMixin, TemplateResponseMixin, Vi
     def get(self, request, pk):
         course = get_object_or_404(Course, pk=pk, owner=request.user)
 
-        # Get all enrollments for this course
-        enrollments = CourseEnrollment.objects.filter(
-            course=course
-        ).select_related('student').order_by('-last_accessed')
-
-        # Calculate statistics
-        total_students = enrollments.count()
-        active_students = enrollments.filter(status='enrolled').count()
-        completed_students = enrollments.filter(status='completed').count()
-        paused_students = enrollments.filter(status='paused').count()
-        avg_progress = enrollments.aggregate(avg=Avg('progress_percentage'))['avg'] or 0
-
-        # Get module completion data for each student
-        students_detailed = []
-        for enrollment in enrollments:
-            # Get module progress
-            modules_progress = ModuleProgress.objects.filter(
-                enrollment=enrollment
-            ).select_related('module')
-
-            completed_modules = modules_progress.filter(is_completed=True).count()
-            total_modules = course.modules.count()
-
-            # Get content progress
-            content_progress = ContentProgress.objects.filter(
-                enrollment=enrollment
-            )
-
-            completed_contents = content_progress.filter(is_completed=True).count()
-            total_contents = Content.objects.filter(module__course=course).count()
-
-            # Get recent learning sessions
-            recent_sessions = LearningSession.objects.filter(
-                enrollment=enrollment
-            ).order_by('-started_at')[:5]
+        enrollments = CourseEnrollment.objects.filter(course=course)
 
-            students_detailed.append({
-                'enrollment': enrollment,
-                'student': enrollment.student,
-                'completed_modules': completed_modules,
-                'total_modules': total_modules,
-                'completed_contents': completed_contents,
-                'total_contents': total_contents,
-                'recent_sessions': recent_sessions,
-            })
+        # Calculate statistics in a single aggregate query
+        stats = enrollments.aggregate(
+            total_students=Count('id'),
+            active_students=Count('id', filter=Q(status='enrolled')),
+            completed_students=Count('id', filter=Q(status='completed')),
+            paused_students=Count('id', filter=Q(status='paused')),
+            avg_progress=Avg('progress_percentage'),
+        )
+        total_students = stats['total_students']
+        total_modules = course.modules.count()
 
-        # Module-wise completion statistics
+        # Module-wise completion statistics in one grouped query
         modules_stats = []
-        for module in course.modules.all():
-            module_progress_all = ModuleProgress.objects.filter(
-                module=module,
-                enrollment__course=course
-            )
-            completed_count = module_progress_all.filter(is_completed=True).count()
-            completion_rate = (completed_count / total_students * 100) if total_students > 0 else 0
-
+        for module in course.modules.annotate(
+            completed_count=count_subquery(
+                ModuleProgress.objects.filter(
+                    module=OuterRef('pk'), enrollment__course=course, is_completed=True
+                ),
+                'module'
+            ),
+            contents_count=count_subquery(Content.objects.filter(module=OuterRef('pk')), 'module'),
+        ):
+            completion_rate = (module.completed_count / total_students * 100) if total_students > 0 else 0
             modules_stats.append({
                 'module': module,
-                'completed_count': completed_count,
+                'completed_count': module.completed_count,
                 'completion_rate': round(completion_rate, 1)
             })
 
+        # Per-student data is annotated in SQL and only loaded for the current page;
+        # content counts come from the enrollment's denormalized counters
+        students = enrollments.select_related('student').annotate(
+            completed_modules=count_subquery(
+                ModuleProgress.objects.filter(enrollment=OuterRef('pk'), is_completed=True),
+                'enrollment'
+            )
+        ).prefetch_related(
+            Prefetch(
+                'learning_sessions',
+                queryset=LearningSession.objects.order_by('-started_at')[:5],
+                to_attr='recent_sessions'
+            )
+        ).order_by(F('last_accessed').desc(nulls_last=True), 'pk')
+
         # Pagination with multiples of 5
         per_page = request.GET.get('per_page', '5')
         try:
@@ -1600,9 +1518,21 @@ class InstructorCourseStudentsView(LoginRequiredMixin, TemplateResponseMixin, Vi
         except (ValueError, TypeError):
             per_page = 5
 
-        paginator = Paginator(students_detailed, per_page)
+        paginator = Paginator(students, per_page)
         page_number = request.GET.get('page', 1)
         students_page = paginator.get_page(page_number)
+        students_page.object_list = [
+            {
+                'enrollment': enrollment,
+                'student': enrollment.student,
+                'completed_modules': enrollment.completed_modules,
+                'total_modules': total_modules,
+                'completed_contents': enrollment.completed_contents_count,
+                'total_contents': enrollment.total_contents_count,
+                'recent_sessions': enrollment.recent_sessions,
+            }
+            for enrollment in students_page.object_list
+        ]
 
         # Available per_page options (multiples of 5)
         per_page_options = [5, 10, 15, 20, 25, 30, 35, 40, 45, 50]
@@ -1612,10 +1542,11 @@ class InstructorCourseStudentsView(LoginRequiredMixin, TemplateResponseMixin, Vi
             'enrollments': enrollments,
             'students_detailed': students_page,
             'total_students': total_students,
-            'active_students': active_students,
-            'completed_students': completed_students,
-            'paused_students': paused_students,
-            'avg_progress': round(avg_progress, 1),
+            'total_modules': total_modules,
+            'active_students': stats['active_students'],
+            'completed_students': stats['completed_students'],
+            'paused_students': stats['paused_students'],
+            'avg_progress': round(stats['avg_progress'] or 0, 1),
             'modules_stats': modules_stats,
             'per_page': per_page,
             'per_page_options': per_page_options,
@@ -1624,7 +1555,44 @@ class InstructorCourseStudentsView(LoginRequiredMixin, TemplateResponseMixin, Vi
         return self.render_to_response(context)
 
 
+class CourseWaitlistManagementView(LoginRequiredMixin, TemplateResponseMixin, View):
+    """Waitlist of a course with cached positions; POST offers free seats to the queue"""
+    template_name = 'courses/instructor/course_waitlist.html'
+    paginate_by = 25
+
+    def get(self, request, pk):
+        course = get_object_or_404(Course, pk=pk, owner=request.user)
+        entries = course.waitlist_entries.select_related('student').order_by(*QUEUE_ORDER)
+
+        page = Paginator(entries, self.paginate_by).get_page(request.GET.get('page', 1))
+        ranks = WaitlistService.get_ranks(course.pk)
+        for entry in page.object_list:
+            entry.position = ranks.get(entry.pk)
+
+        return self.render_to_response({
+            'course': course,
+            'entries': page,
+            'available_spots': course.get_available_spots(),
+        })
+
+    def post(self, request, pk):
+        course = get_object_or_404(Course, pk=pk, owner=request.user)
+        promoted = WaitlistService.promote(course)
+        if promoted:
+            messages.success(request, f'{len(promoted)} siswa dari daftar tunggu mendapat kursi.')
+        else:
+            messages.info(request, 'Tidak ada kursi kosong untuk daftar tunggu.')
+        return redirect('course_waitlist_management', pk=course.pk)
+
+
+class CourseCloneView(LoginRequiredMixin, View):
+    """Duplicate a course with all modules and contents as a new draft"""
 
+    def post(self, request, pk):
+        course = get_object_or_404(Course, pk=pk, owner=request.user)
+        copy = CloningService.clone_course(course, request.user)
+        messages.success(request, f'Kursus "{course.title}" berhasil diduplikasi sebagai draft "{copy.title}".')
+        return redirect('course_edit', pk=copy.pk)
 
 
 class CourseQuickStatusView(LoginRequiredMixin, View):
@@ -1678,85 +1646,25 @@ class BulkContentOperationsView(LoginRequiredMixin, View):
             return redirect('module_content_list', module_id=module.id)
 
         if operation == 'delete':
-            # Bulk delete selected content
+            # Bulk delete selected content with their items, one query per item type
             deleted_count = 0
-            for content_id in content_ids:
-                try:
-                    content = get_object_or_404(Content, id=content_id, module=module)
-                    # Delete all content items and their actual items
-                    for content_item in content.items.all():
-                        if content_item.item:
-                            content_item.item.delete()
-                    content.delete()
-                    deleted_count += 1
-                except Exception as e:
-                    messages.error(request, f'Error deleting content ID {content_id}: {str(e)}')
+            try:
+                deleted_count = ItemCleanupService.delete_contents(
+                    Content.objects.filter(id__in=content_ids, module=module)
+                )
+            except Exception as e:
+                messages.error(request, f'Error deleting content: {str(e)}')
 
             if deleted_count > 0:
                 messages.success(request, f'{deleted_count} konten berhasil dihapus.')
 
         elif operation == 'duplicate':
-            # Bulk duplicate selected content
-            duplicated_count = 0
-            for content_id in content_ids:
-                try:
-                    original_content = get_object_or_404(Content, id=content_id, module=module)
-
-                    # Create duplicate content
-                    new_content = Content.objects.create(
-                        module=module,
-                        title=f"{original_content.title} (Copy)",
-                        order=original_content.order + 100  # Place at end
-                    )
+            # Bulk duplicate selected content with its items
+            contents = Content.objects.filter(id__in=content_ids, module=module)
+            duplicated = CloningService.clone_contents(contents, module, request.user)
 
-                    # Duplicate all content items
-                    for content_item in original_content.items.all():
-                        if content_item.item:
-                            original_item = content_item.item
-
-                            # Create copy of the content item
-                            new_item = type(original_item).objects.create(
-                                owner=request.user,
-                                title=f"{original_item.title} (Copy)",
-                                created=timezone.now(),
-                                updated=timezone.now()
-                            )
-
-                            # Copy type-specific fields
-                            if hasattr(original_item, 'text'):
-                                new_item.text = original_item.text
-                            elif hasattr(original_item, 'file'):
-                                new_item.file = original_item.file
-                            elif hasattr(original_item, 'url'):
-                                new_item.url = original_item.url
-                                if hasattr(original_item, 'video_platform'):
-                                    new_item.video_platform = original_item.video_platform
-                                if hasattr(original_item, 'duration'):
-                                    new_item.duration = original_item.duration
-                                if hasattr(original_item, 'transcript'):
-                                    new_item.transcript = original_item.transcript
-                                if hasattr(original_item, 'captions_enabled'):
-                                    new_item.captions_enabled = original_item.captions_enabled
-                                if hasattr(original_item, 'auto_play'):
-                                    new_item.auto_play = original_item.auto_play
-                                if hasattr(original_item, 'minimum_watch_percentage'):
-                                    new_item.minimum_watch_percentage = original_item.minimum_watch_percentage
-
-                            new_item.save()
-
-                            # Create content item relationship
-                            ContentItem.objects.create(
-                                content=new_content,
-                                item=new_item,
-                                order=content_item.order
-                            )
-
-                    duplicated_count += 1
-                except Exception as e:
-                    messages.error(request, f'Error duplicating content ID {content_id}: {str(e)}')
-
-            if duplicated_count > 0:
-                messages.success(request, f'{duplicated_count} konten berhasil diduplikasi.')
+            if duplicated:
+                messages.success(request, f'{len(duplicated)} konten berhasil diduplikasi.')
 
         elif operation == 'reorder':
             # Bulk reorder - expect order data in request
@@ -1765,11 +1673,8 @@ class BulkContentOperationsView(LoginRequiredMixin, View):
                 try:
                     import json
                     orders = json.loads(order_data)
-                    for content_id, order in orders.items():
-                        Content.objects.filter(
-                            id=int(content_id),
-                            module=module
-                        ).update(order=int(order))
+                    apply_order(Content.objects.filter(module=module), orders)
+                    bump_structure_version(module.course_id)
                     messages.success(request, 'Urutan konten berhasil diperbarui.')
                 except Exception as e:
                     messages.error(request, f'Error reordering content: {str(e)}')
@@ -1818,21 +1723,14 @@ class BulkContentItemOperationsView(LoginRequiredMixin, View):
             return redirect('module_content_list', module_id=content.module.id)
 
         if operation == 'delete':
-            # Bulk delete selected content items
+            # Bulk delete selected content items, one query per item type
             deleted_count = 0
-            for item_id in item_ids:
-                try:
-                    content_item = get_object_or_404(
-                        ContentItem,
-                        id=item_id,
-                        content=content
-                    )
-                    if content_item.item:
-                        content_item.item.delete()
-                    content_item.delete()
-                    deleted_count += 1
-                except Exception as e:
-                    messages.error(request, f'Error deleting item ID {item_id}: {str(e)}')
+            try:
+                deleted_count = ItemCleanupService.delete_content_items(
+                    ContentItem.objects.filter(id__in=item_ids, content=content)
+                )
+            except Exception as e:
+                messages.error(request, f'Error deleting items: {str(e)}')
 
             if deleted_count > 0:
                 messages.success(request, f'{deleted_count} item konten berhasil dihapus.')
@@ -1844,11 +1742,8 @@ class BulkContentItemOperationsView(LoginRequiredMixin, View):
                 try:
                     import json
                     orders = json.loads(order_data)
-                    for item_id, order in orders.items():
-                        ContentItem.objects.filter(
-                            id=int(item_id),
-                            content=content
-                        ).update(order=int(order))
+                    apply_order(ContentItem.objects.filter(content=content), orders)
+                    bump_structure_version(content.module.course_id)
                     messages.success(request, 'Urutan item konten berhasil diperbarui.')
                 except Exception as e:
                     messages.error(request, f'Error reordering items: {str(e)}')
@@ -0,0 +1,158 @@
+"""
+Course Waitlist Services
+Keeps a cached rank map per course so waitlist positions are read without a
+COUNT per entry, and offers freed seats to the head of the queue.
+"""
+
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .access_service import EnrollmentService
+from .emails import send_waitlist_offer_email
+from .models import Course, CourseEnrollment, CourseWaitlist
+
+RANKS_CACHE_TIMEOUT = 60 * 60
+PROMOTION_BATCH_SIZE = 100
+
+# An offered seat is held this long before it passes to the next student
+OFFER_EXPIRY = timedelta(hours=48)
+
+QUEUE_ORDER = ('priority', 'joined_waitlist', 'pk')
+
+
+def _ranks_key(course_id):
+    return f"course_waitlist_ranks_{course_id}"
+
+
+class WaitlistService:
+    """Waitlist positions and promotion"""
+
+    @staticmethod
+    def get_ranks(course_id):
+        """
+        Get dense 1-indexed positions of a course's waitlist.
+
+        Returns:
+            dict: {waitlist entry id: position}
+        """
+        key = _ranks_key(course_id)
+        ranks = cache.get(key)
+        if ranks is None:
+            entry_ids = CourseWaitlist.objects.filter(
+                course_id=course_id
+            ).order_by(*QUEUE_ORDER).values_list('pk', flat=True)
+            ranks = {entry_id: position for position, entry_id in enumerate(entry_ids, start=1)}
+            cache.set(key, ranks, RANKS_CACHE_TIMEOUT)
+        return ranks
+
+    @classmethod
+    def get_position(cls, entry):
+        """Get the position of a waitlist entry (1-indexed)"""
+        position = cls.get_ranks(entry.course_id).get(entry.pk)
+        if position is None:
+            # Joined after the ranks were cached
+            cls.invalidate(entry.course_id)
+            position = cls.get_ranks(entry.course_id).get(entry.pk)
+        return position
+
+    @staticmethod
+    def invalidate(course_id):
+        cache.delete(_ranks_key(course_id))
+
+    @staticmethod
+    def _expired_offers(now):
+        # Offers from before offered_at existed have no timestamp and count as expired
+        return Q(notified_of_opening=True) & (Q(offered_at__lte=now - OFFER_EXPIRY) | Q(offered_at__isnull=True))
+
+    @staticmethod
+    def _auto_enrolls(course):
+        # Free open courses need neither payment nor approval, so promoted students are enrolled
+        return course.enrollment_type == 'open' and (course.pricing_type == 'free' or course.is_free)
+
+    @classmethod
+    @transaction.atomic
+    def promote(cls, course, batch_size=PROMOTION_BATCH_SIZE):
+        """
+        Offer free seats to the head of the queue, at most ``batch_size``.
+
+        Students of free open courses, and renewed subscribers whose paused
+        enrollment could not be restored, are enrolled right away, which
+        removes their waitlist entry. Everyone else is marked ``notified_of_opening``,
+        emailed, and keeps their entry until they enroll. An offered seat is
+        held for ``OFFER_EXPIRY``; unanswered offers are then dropped from the
+        queue and their seats offered to the next students.
+
+        Args:
+            course: Course instance or id
+
+        Returns:
+            list: Promoted CourseWaitlist entries
+        """
+        course_id = getattr(course, 'pk', course)
+        course = Course.objects.select_for_update().filter(pk=course_id).first()
+        if course is None:
+            # Deleted before a deferred promotion ran
+            return []
+
+        now = timezone.now()
+        queue = CourseWaitlist.objects.filter(course=course)
+        queue.filter(cls._expired_offers(now)).delete()
+
+        limit = batch_size
+        if course.max_capacity:
+            offered = queue.filter(notified_of_opening=True).count()
+            limit = min(limit, course.max_capacity - course.enrolled_count - offered)
+        if limit <= 0:
+            return []
+
+        entries = list(queue.filter(notified_of_opening=False).select_related('student').order_by(*QUEUE_ORDER)[:limit])
+        if not entries:
+            return entries
+
+        # Renewed subscribers queued by restore_subscription_access get their paused enrollment back
+        paused = set(CourseEnrollment.objects.filter(
+            course=course,
+            student__in=[entry.student_id for entry in entries],
+            status='paused',
+            access_type='subscription',
+            subscription__status__in=['active', 'trial'],
+            subscription__current_period_end__gt=now,
+        ).values_list('student_id', flat=True))
+
+        offers = []
+        for entry in entries:
+            if entry.student_id in paused:
+                EnrollmentService.reserve_seat(entry.student, course, {'status': 'enrolled'})
+            elif cls._auto_enrolls(course):
+                EnrollmentService.reserve_seat(entry.student, course, {
+                    'status': 'enrolled',
+                    'payment_status': 'free',
+                    'access_type': 'free',
+                })
+                course.students.add(entry.student)
+            else:
+                offers.append(entry)
+
+        if offers:
+            CourseWaitlist.objects.filter(pk__in=[entry.pk for entry in offers]).update(
+                notified_of_opening=True, offered_at=now
+            )
+            for entry in offers:
+                entry.offered_at = now
+                transaction.on_commit(lambda entry=entry: send_waitlist_offer_email(entry))
+
+        for entry in entries:
+            entry.notified_of_opening = True
+        return entries
+
+    @classmethod
+    def promote_all(cls, batch_size=PROMOTION_BATCH_SIZE):
+        """Promote waitlisted students of every course with free seats. Returns the promoted count."""
+        course_ids = list(CourseWaitlist.objects.filter(
+            Q(notified_of_opening=False) | cls._expired_offers(timezone.now())
+        ).order_by().values_list('course_id', flat=True).distinct())
+        return sum(len(cls.promote(course_id, batch_size=batch_size)) for course_id in course_ids)
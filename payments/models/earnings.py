@@ -1,9 +1,12 @@
 from decimal import Decimal
 
 from django.conf import settings
+from django.core.cache import cache
 from django.db import models
 from django.utils import timezone
 
+from core.caching import get_or_compute
+
 
 class PlatformSettings(models.Model):
     """Singleton model for platform-wide revenue settings"""
@@ -37,12 +40,12 @@ class PlatformSettings(models.Model):
         # Ensure only one instance exists
         self.pk = 1
         super().save(*args, **kwargs)
+        cache.delete('platform_settings')
 
     @classmethod
     def get_settings(cls):
-        """Get or create platform settings singleton"""
-        settings, _ = cls.objects.get_or_create(pk=1)
-        return settings
+        """Get or create platform settings singleton (cached for 1 hour)"""
+        return get_or_compute('platform_settings', lambda: cls.objects.get_or_create(pk=1)[0], timeout=3600)
 
 
 class InstructorEarning(models.Model):
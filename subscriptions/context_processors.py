@@ -11,7 +11,7 @@ def subscription_context(request):
     }
     
     if request.user.is_authenticated and request.user.role == 'student':
-        subscription = SubscriptionService.get_user_subscription(request.user)
+        subscription = SubscriptionService.get_active_subscription(request.user)
         context['user_has_subscription'] = subscription is not None
         context['user_subscription'] = subscription
     
@@ -0,0 +1,25 @@
+"""
+Request-scoped memo for subscription lookups.
+"""
+
+from .services import SubscriptionService
+
+
+class SubscriptionMemoMiddleware:
+    """
+    Resolve a user's subscription at most once per request.
+
+    Context processors, access checks and per-enrollment checks all ask
+    SubscriptionService for the same answer; the memo is dropped when the
+    request finishes.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        token = SubscriptionService.start_request_memo()
+        try:
+            return self.get_response(request)
+        finally:
+            SubscriptionService.end_request_memo(token)
@@ -1,4 +1,5 @@
-from django.db.models.signals import post_save
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
 from payments.signals import payment_completed
 
@@ -33,6 +34,17 @@ def activate_subscription_on_payment(sender, order, user, **kwargs):
         )
 
 
+@receiver(post_save, sender=UserSubscription)
+@receiver(post_delete, sender=UserSubscription)
+def invalidate_subscription_cache(sender, instance, **kwargs):
+    """
+    Drop the cached active subscription so the next lookup sees the change.
+    """
+    SubscriptionService.invalidate_user_subscription(instance.user_id)
+    # Again after commit, in case a concurrent request re-cached the old state
+    transaction.on_commit(lambda: SubscriptionService.invalidate_user_subscription(instance.user_id))
+
+
 @receiver(post_save, sender=UserSubscription)
 def handle_subscription_status_change(sender, instance, created, **kwargs):
     """
@@ -1,6 +1,8 @@
-from datetime import timedelta
-from typing import Optional, TYPE_CHECKING
+from contextvars import ContextVar
+from datetime import datetime, timedelta
+from typing import NamedTuple, Optional, TYPE_CHECKING
 
+from django.core.cache import cache
 from django.db import transaction
 from django.utils import timezone
 
@@ -10,6 +12,25 @@ if TYPE_CHECKING:
     from django.contrib.auth import get_user_model
     User = get_user_model()
 
+# Per-request memo of {user_id: ActiveSubscription or None}, set up by
+# SubscriptionMemoMiddleware; outside a request it stays None (no memo)
+_subscription_memo: ContextVar[Optional[dict]] = ContextVar('subscription_memo', default=None)
+
+# Cross-request cache of a user's active subscription
+SUBSCRIPTION_CACHE_TIMEOUT = 300
+_NO_SUBSCRIPTION = 'none'
+
+
+class ActiveSubscription(NamedTuple):
+    """Read-only snapshot of an active subscription, safe to cache and share"""
+    pk: int
+    plan_id: int
+    status: str
+    current_period_end: datetime
+
+    def days_remaining(self):
+        return max(0, (self.current_period_end - timezone.now()).days)
+
 
 class SubscriptionService:
     """
@@ -25,25 +46,87 @@ class SubscriptionService:
     @classmethod
     def user_has_active_subscription(cls, user: 'User') -> bool:
         """Check if user has an active subscription"""
+        return cls.get_active_subscription(user) is not None
+
+    @classmethod
+    def get_active_subscription(cls, user: 'User') -> Optional[ActiveSubscription]:
+        """
+        Get a read-only snapshot of user's current active subscription.
+
+        Resolved at most once per request (see SubscriptionMemoMiddleware) and
+        cached across requests for a short time; both are invalidated when a
+        UserSubscription of the user is saved.
+        """
         if not user or not user.is_authenticated:
-            return False
-        return UserSubscription.objects.filter(
-            user=user,
-            status__in=['active', 'trial'],
-            current_period_end__gt=timezone.now()
-        ).exists()
+            return None
+
+        memo = _subscription_memo.get()
+        if memo is not None and user.pk in memo:
+            return memo[user.pk]
+
+        cache_key = cls._cache_key(user.pk)
+        subscription = cache.get(cache_key)
+        if subscription is None:
+            row = UserSubscription.objects.filter(
+                user=user,
+                status__in=['active', 'trial'],
+                current_period_end__gt=timezone.now()
+            ).values_list('pk', 'plan_id', 'status', 'current_period_end').first()
+            subscription = ActiveSubscription(*row) if row else None
+            cache.set(cache_key, subscription or _NO_SUBSCRIPTION, SUBSCRIPTION_CACHE_TIMEOUT)
+        elif subscription == _NO_SUBSCRIPTION:
+            subscription = None
+        elif subscription.current_period_end <= timezone.now():
+            # Period ended while cached; the expiry job updates status in bulk
+            subscription = None
+
+        if memo is not None:
+            memo[user.pk] = subscription
+        return subscription
 
     @classmethod
     def get_user_subscription(cls, user: 'User') -> Optional[UserSubscription]:
-        """Get user's current active subscription"""
-        if not user or not user.is_authenticated:
+        """
+        Get user's current active subscription, loaded from the database.
+
+        Skips the query for users without one. Use get_active_subscription for
+        checks that don't need the model instance.
+        """
+        active = cls.get_active_subscription(user)
+        if active is None:
             return None
         return UserSubscription.objects.filter(
-            user=user,
+            pk=active.pk,
             status__in=['active', 'trial'],
             current_period_end__gt=timezone.now()
         ).select_related('plan').first()
 
+    @staticmethod
+    def _lock(subscription: UserSubscription) -> UserSubscription:
+        """Re-read a subscription with a row lock before changing it"""
+        return UserSubscription.objects.select_for_update().select_related('plan').get(pk=subscription.pk)
+
+    @staticmethod
+    def _cache_key(user_id) -> str:
+        return f"user_active_subscription_{user_id}"
+
+    @classmethod
+    def invalidate_user_subscription(cls, user_id) -> None:
+        """Drop memoized and cached subscription state for a user"""
+        cache.delete(cls._cache_key(user_id))
+        memo = _subscription_memo.get()
+        if memo is not None:
+            memo.pop(user_id, None)
+
+    @staticmethod
+    def start_request_memo():
+        """Start a per-request memo; returns a token for end_request_memo"""
+        return _subscription_memo.set({})
+
+    @staticmethod
+    def end_request_memo(token) -> None:
+        _subscription_memo.reset(token)
+
     @classmethod
     @transaction.atomic
     def create_subscription(
@@ -91,6 +174,7 @@ class SubscriptionService:
         order=None
     ) -> UserSubscription:
         """Renew an existing subscription"""
+        subscription = cls._lock(subscription)
         subscription.renew(order=order)
         return subscription
 
@@ -110,6 +194,7 @@ class SubscriptionService:
             immediately: If True, cancel immediately. Otherwise, cancel at period end.
             reason: Optional cancellation reason
         """
+        subscription = cls._lock(subscription)
         subscription.cancel(immediately=immediately, reason=reason)
         return subscription
 
@@ -122,17 +207,23 @@ class SubscriptionService:
         now = timezone.now()
         
         # Expire subscriptions that have passed their period end
-        expired_count = UserSubscription.objects.filter(
+        expired = dict(UserSubscription.objects.filter(
             status__in=['active', 'trial'],
             current_period_end__lte=now
-        ).update(status='expired')
+        ).values_list('pk', 'user_id'))
+        expired_count = UserSubscription.objects.filter(pk__in=expired).update(status='expired')
 
         # Expire subscriptions marked for cancellation at period end
-        cancelled_count = UserSubscription.objects.filter(
+        cancelled = dict(UserSubscription.objects.filter(
             status='active',
             cancel_at_period_end=True,
             current_period_end__lte=now
-        ).update(status='cancelled')
+        ).values_list('pk', 'user_id'))
+        cancelled_count = UserSubscription.objects.filter(pk__in=cancelled).update(status='cancelled')
+
+        # update() skips the receivers that invalidate cached subscriptions
+        for user_id in {*expired.values(), *cancelled.values()}:
+            cls.invalidate_user_subscription(user_id)
 
         return expired_count + cancelled_count
 
@@ -1,6 +1,8 @@
 from datetime import timedelta
 from decimal import Decimal
+from unittest.mock import patch
 
+from django.core.cache import cache
 from django.test import TestCase, Client
 from django.urls import reverse
 from django.utils import timezone
@@ -184,3 +186,84 @@ class SubscriptionViewTest(TestCase):
         url = reverse('subscriptions:manage')
         response = self.client.get(url)
         self.assertEqual(response.status_code, 200)
+
+
+class SubscriptionMemoTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123',
+            role='student'
+        )
+        self.plan = SubscriptionPlan.objects.create(
+            name='Monthly Plan',
+            slug='monthly-plan',
+            price=Decimal('99000'),
+            billing_cycle='monthly',
+            is_active=True
+        )
+
+    def test_resolved_once_per_request(self):
+        SubscriptionService.create_subscription(self.user, self.plan)
+        cache.clear()
+
+        token = SubscriptionService.start_request_memo()
+        try:
+            with self.assertNumQueries(1):
+                for _ in range(3):
+                    self.assertTrue(SubscriptionService.user_has_active_subscription(self.user))
+        finally:
+            SubscriptionService.end_request_memo(token)
+
+    def test_cached_across_requests(self):
+        SubscriptionService.get_user_subscription(self.user)
+        with self.assertNumQueries(0):
+            self.assertIsNone(SubscriptionService.get_user_subscription(self.user))
+
+    def test_invalidated_on_save(self):
+        self.assertFalse(SubscriptionService.user_has_active_subscription(self.user))
+
+        subscription = SubscriptionService.create_subscription(self.user, self.plan)
+        self.assertTrue(SubscriptionService.user_has_active_subscription(self.user))
+
+        SubscriptionService.cancel_subscription(subscription, immediately=True)
+        self.assertFalse(SubscriptionService.user_has_active_subscription(self.user))
+
+    def test_expired_period_not_served_from_cache(self):
+        subscription = SubscriptionService.create_subscription(self.user, self.plan)
+        self.assertTrue(SubscriptionService.user_has_active_subscription(self.user))
+
+        after_period = subscription.current_period_end + timedelta(minutes=1)
+        with patch('subscriptions.services.timezone.now', return_value=after_period):
+            self.assertFalse(SubscriptionService.user_has_active_subscription(self.user))
+
+    def test_cache_holds_read_only_snapshot(self):
+        subscription = SubscriptionService.create_subscription(self.user, self.plan)
+        SubscriptionService.user_has_active_subscription(self.user)
+
+        with self.assertNumQueries(0):
+            active = SubscriptionService.get_active_subscription(self.user)
+        self.assertEqual((active.pk, active.plan_id, active.status), (subscription.pk, self.plan.pk, 'active'))
+        self.assertFalse(hasattr(active, 'save'))
+
+    def test_writes_use_current_row(self):
+        stale = SubscriptionService.create_subscription(self.user, self.plan)
+        # Renewed by another request after this copy was loaded
+        renewed_until = stale.current_period_end + timedelta(days=30)
+        UserSubscription.objects.filter(pk=stale.pk).update(current_period_end=renewed_until)
+
+        SubscriptionService.cancel_subscription(stale)
+        stale.refresh_from_db()
+        self.assertTrue(stale.cancel_at_period_end)
+        self.assertEqual(stale.current_period_end, renewed_until)
+
+    def test_expiry_job_invalidates_cache(self):
+        subscription = SubscriptionService.create_subscription(self.user, self.plan)
+        self.assertTrue(SubscriptionService.user_has_active_subscription(self.user))
+
+        UserSubscription.objects.filter(pk=subscription.pk).update(current_period_end=timezone.now())
+        self.assertEqual(SubscriptionService.check_and_expire_subscriptions(), 1)
+        self.assertIsNone(cache.get(SubscriptionService._cache_key(self.user.pk)))
+        self.assertFalse(SubscriptionService.user_has_active_subscription(self.user))
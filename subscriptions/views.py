@@ -160,7 +160,7 @@ class CancelSubscriptionView(LoginRequiredMixin, View):
         reason = request.POST.get('reason', '')
         immediately = request.POST.get('immediately') == 'true'
 
-        SubscriptionService.cancel_subscription(
+        subscription = SubscriptionService.cancel_subscription(
             subscription,
             immediately=immediately,
             reason=reason
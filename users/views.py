@@ -9,6 +9,7 @@ from django.views.generic import ListView, DetailView, TemplateView
 from django.views.generic.edit import CreateView, FormView
 from django.shortcuts import redirect, get_object_or_404, render
 from courses.models import Course
+from courses.outline import get_course_outline
 from .forms import CourseEnrollForm, StudentRegistrationForm, StudentLoginForm, InstructorLoginForm, ResendEmailVerificationForm
 from .models import User
 from django.core.cache import cache
@@ -72,6 +73,11 @@ class StudentCourseDetailView(LoginRequiredMixin, StudentOnlyRedirectMixin, Deta
             context['module'] = course.modules.get(id=self.kwargs['module_id'])
         else:
             context['module'] = course.modules.all()[0]
+
+        # Navigation comes from the cached outline instead of Module queries
+        outline = get_course_outline(course)
+        context['previous_module'] = outline.get_previous_module(context['module'].pk)
+        context['next_module'] = outline.get_next_module(context['module'].pk)
         
         # Add enrollment object to context
         context['enrollment'] = course.course_enrollments.filter(student=self.request.user).first()
@@ -92,12 +98,22 @@ class StudentEnrollCourseView(LoginRequiredMixin, StudentOnlyRedirectMixin, Form
     form_class = CourseEnrollForm
 
     def form_valid(self, form):
-        from courses.access_service import EnrollmentService
-        from subscriptions.services import SubscriptionService
+        from courses.access_service import CourseFullError
         from django.contrib import messages
         
         self.course = form.cleaned_data['course']
         
+        try:
+            return self.enroll(form)
+        except CourseFullError:
+            messages.error(self.request, f'Kursus {self.course.title} sudah penuh.')
+            return redirect('course_detail', slug=self.course.slug)
+    
+    def enroll(self, form):
+        from courses.access_service import EnrollmentService
+        from subscriptions.services import SubscriptionService
+        from django.contrib import messages
+        
         # Check pricing type and handle accordingly
         if self.course.pricing_type == 'free':
             # Free course - enroll directly